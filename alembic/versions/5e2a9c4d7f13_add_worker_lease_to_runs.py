@@ -0,0 +1,35 @@
+"""worker lease (worker_id, heartbeat_at, attempts) in runs
+
+Revision ID: 5e2a9c4d7f13
+Revises: b7c7722411be
+Create Date: 2026-10-17 10:12:40.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9c4d7f13'
+down_revision: Union[str, Sequence[str], None] = 'b7c7722411be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('runs', sa.Column('worker_id', sa.Text(), nullable=True))
+    op.add_column('runs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('runs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    # Workers claim the oldest queued run and the reaper scans running leases.
+    op.create_index('ix_runs_status_created_at', 'runs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_runs_status_created_at', table_name='runs')
+    op.drop_column('runs', 'attempts')
+    op.drop_column('runs', 'heartbeat_at')
+    op.drop_column('runs', 'worker_id')
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+from app.application.chat.run_event_sequence import RunEventSequence
+from app.domain.chat.entities import RunEventType
+from app.domain.chat.repositories.run_event_repository import RunEventRepository
+
+
+class BufferedRunEventWriter:
+    """
+    Coalesces token events of one run into micro-batches.
+
+    Token flushes are rate limited to one per max_delay seconds, on the leading
+    edge: a token arriving more than max_delay after the previous token flush is
+    written at once (so the first token of a run never waits for a second one),
+    later tokens are buffered and written with a single append_many() call when the
+    batch is full (max_batch) or the window has passed at the next append. Since
+    the LLM may stall between tokens, streaming callers should also flush once
+    overdue() (seconds_to_deadline() says when). Any other event type first flushes
+    the buffer and is then written on its own, so seq order always matches emission
+    order. Call flush() when the token stream ends.
+
+    buffer_token() may run while flush() writes on another thread; only one flush
+    may run at a time.
+
+    With a RunEventSequence, seqs are allocated here and each write is a plain
+    INSERT; without one the repository assigns them.
+    """
+
+    def __init__(
+        self,
+        *,
+        event_repo: RunEventRepository,
+        run_id: uuid.UUID,
+        sequence: RunEventSequence | None = None,
+        max_batch: int = 32,
+        max_delay: float = 0.025,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.event_repo = event_repo
+        self.run_id = run_id
+        self.sequence = sequence
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._clock = clock
+        self._buffer: list[tuple[RunEventType, dict]] = []
+        self._last_flush_at = -math.inf
+        self._lock = threading.Lock()
+
+    def append(self, *, type: RunEventType, data: dict) -> None:
+        if type != RunEventType.token:
+            self.flush()
+            seq = self.sequence.next() if self.sequence is not None else None
+            self.event_repo.append(run_id=self.run_id, type=type, data=data, seq=seq)
+            return
+
+        if self.buffer_token(data=data):
+            self.flush()
+
+    def buffer_token(self, *, data: dict) -> bool:
+        """
+        Buffer a token without writing it. Returns True when the batch is due,
+        so async callers can run flush() off the event loop.
+        """
+        with self._lock:
+            self._buffer.append((RunEventType.token, data))
+            return len(self._buffer) >= self.max_batch or self._overdue()
+
+    def overdue(self) -> bool:
+        """True when buffered tokens have waited for the max_delay window."""
+        with self._lock:
+            return bool(self._buffer) and self._overdue()
+
+    def seconds_to_deadline(self) -> float:
+        """Seconds until buffered tokens are overdue (max_delay when nothing is buffered)."""
+        with self._lock:
+            if not self._buffer:
+                return self.max_delay
+            return max(0.0, self._last_flush_at + self.max_delay - self._clock())
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            self._last_flush_at = self._clock()
+            first_seq = self.sequence.reserve(len(batch)) if self.sequence is not None else None
+        self.event_repo.append_many(run_id=self.run_id, events=batch, first_seq=first_seq)
+
+    def _overdue(self) -> bool:
+        return self._clock() - self._last_flush_at >= self.max_delay
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 import uuid
 
+from app.application.chat.cancellation import RunCanceller
 from app.domain.chat.entities import RunStatus
 from app.domain.chat.repositories.run_repository import RunRepository
 
@@ -11,8 +12,9 @@ class CancelRunResult:
 
 
 class CancelRunUseCase:
-    def __init__(self, run_repo: RunRepository):
+    def __init__(self, run_repo: RunRepository, canceller: RunCanceller | None = None):
         self.run_repo = run_repo
+        self.canceller = canceller
 
     def execute(self, *, run_id: uuid.UUID) -> CancelRunResult:
         run = self.run_repo.get_run(run_id=run_id)
@@ -24,4 +26,8 @@ class CancelRunUseCase:
             return CancelRunResult(status=run.status.value)
 
         self.run_repo.set_status(run_id=run_id, status=RunStatus.canceled)
+
+        # Wake the executor now instead of waiting for its next status check.
+        if self.canceller is not None:
+            self.canceller.cancel(run_id=run_id)
         return CancelRunResult(status=RunStatus.canceled.value)
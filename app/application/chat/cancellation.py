@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Reason of a cancel issued because this process lost the run's lease: the run was
+# requeued and may already be executing elsewhere, so it must stop without writing.
+LEASE_LOST = "lease_lost"
+
+
+class CancellationToken:
+    """
+    Cancellation flag for one run, checked by the executor between tokens.
+
+    is_canceled() is an in-memory check. If a poll function is given, it is also
+    consulted at most once every poll_interval seconds, so a cancel that never
+    reaches this process (lost notification, other deployment) is still picked up
+    with bounded staleness instead of costing one query per token.
+
+    Callbacks registered with add_callback() run once, on the thread that cancels;
+    executors use them to abort the in-flight LLM request. reason tells why the run
+    was canceled ("canceled" by the client, or LEASE_LOST).
+    """
+
+    def __init__(
+        self,
+        *,
+        poll: Callable[[], bool] | None = None,
+        poll_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._event = threading.Event()
+        self._poll = poll
+        self._poll_interval = poll_interval
+        self._clock = clock
+        self._last_poll = clock()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+        self.reason: str | None = None
+
+    @property
+    def canceled(self) -> bool:
+        """In-memory state only (never polls)."""
+        return self._event.is_set()
+
+    def is_canceled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._poll is not None:
+            now = self._clock()
+            if now - self._last_poll >= self._poll_interval:
+                self._last_poll = now
+                if self._poll():
+                    self.cancel()
+                    return True
+        return False
+
+    def cancel(self, reason: str = "canceled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Cancellation callback failed")
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+class RunCanceller(ABC):
+    """Port used by CancelRunUseCase to tell the executor of a run to stop."""
+
+    @abstractmethod
+    def cancel(self, *, run_id: uuid.UUID) -> None:
+        raise NotImplementedError
+
+
+class CancellationRegistry(RunCanceller):
+    """
+    In-process registry of the tokens of the runs executing in this process.
+
+    Executors register() when a run starts and discard() when it ends;
+    cancel() for a run that isn't running here is a no-op.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: dict[uuid.UUID, CancellationToken] = {}
+
+    def register(
+        self,
+        *,
+        run_id: uuid.UUID,
+        poll: Callable[[], bool] | None = None,
+        poll_interval: float = 1.0,
+    ) -> CancellationToken:
+        token = CancellationToken(poll=poll, poll_interval=poll_interval)
+        with self._lock:
+            self._tokens[run_id] = token
+        return token
+
+    def discard(self, *, run_id: uuid.UUID) -> None:
+        with self._lock:
+            self._tokens.pop(run_id, None)
+
+    def cancel(self, *, run_id: uuid.UUID, reason: str = "canceled") -> None:
+        with self._lock:
+            token = self._tokens.get(run_id)
+        if token is not None:
+            token.cancel(reason)
+
+    def __contains__(self, run_id: uuid.UUID) -> bool:
+        with self._lock:
+            return run_id in self._tokens
@@ -1,6 +1,8 @@
 import time
 import uuid
 
+from app.application.chat.cancellation import CancellationRegistry
+from app.application.chat.run_event_sequence import RunEventSequence
 from app.application.chat.run_executor import RunExecutor
 from app.domain.chat.entities import RunEventType, RunStatus
 from app.domain.chat.repositories.run_repository import RunRepository
@@ -14,17 +16,26 @@ class FakeRunExecutor(RunExecutor):
         run_repo: RunRepository,
         event_repo: RunEventRepository,
         thread_repo: ThreadRepository,
+        cancellations: CancellationRegistry | None = None,
     ):
         self.run_repo = run_repo
         self.event_repo = event_repo
         self.thread_repo = thread_repo
+        self.cancellations = cancellations or CancellationRegistry()
 
     def start(self, *, thread_id: uuid.UUID, run_id: uuid.UUID) -> None:
+        seq = None
         try:
+            cancel = self.cancellations.register(
+                run_id=run_id,
+                poll=lambda: self.run_repo.get_status(run_id=run_id) == RunStatus.canceled,
+            )
+            seq = RunEventSequence.for_run(event_repo=self.event_repo, run_id=run_id)
             self.run_repo.set_status(run_id=run_id, status=RunStatus.running)
 
             self.event_repo.append(
                 run_id=run_id,
+                seq=seq.next(),
                 type=RunEventType.tool_start,
                 data={"tool": "db.query", "input": {"sql": "SELECT 1"}},
             )
@@ -32,16 +43,18 @@ class FakeRunExecutor(RunExecutor):
 
             self.event_repo.append(
                 run_id=run_id,
+                seq=seq.next(),
                 type=RunEventType.tool_end,
                 data={"tool": "db.query", "output": {"rows": [[1]]}},
             )
 
             text = "Hello 👋. This is a hardcoded run streamed via SSE and stored in Postgres."
             for token in text.split(" "):
-                run = self.run_repo.get_run(run_id=run_id)
-                if run and run.status == RunStatus.canceled:
+                if cancel.is_canceled():
+                    self.run_repo.set_status(run_id=run_id, status=RunStatus.canceled)
                     self.event_repo.append(
                         run_id=run_id,
+                        seq=seq.next(),
                         type=RunEventType.canceled,
                         data={"reason": "canceled"},
                     )
@@ -49,6 +62,7 @@ class FakeRunExecutor(RunExecutor):
 
                 self.event_repo.append(
                     run_id=run_id,
+                    seq=seq.next(),
                     type=RunEventType.token,
                     data={"text": token + " "},
                 )
@@ -56,6 +70,7 @@ class FakeRunExecutor(RunExecutor):
 
             self.event_repo.append(
                 run_id=run_id,
+                seq=seq.next(),
                 type=RunEventType.final,
                 data={"text": text},
             )
@@ -67,16 +82,21 @@ class FakeRunExecutor(RunExecutor):
             # Persist the "done" signal as an event too (so SSE replay matches DB)
             self.event_repo.append(
                 run_id=run_id,
+                seq=seq.next(),
                 type=RunEventType.state,
                 data={"status": "done"},
             )
 
         except Exception as e:
             try:
-                self.event_repo.append(
-                    run_id=run_id,
-                    type=RunEventType.error,
-                    data={"error": str(e)},
-                )
+                if seq is not None:
+                    self.event_repo.append(
+                        run_id=run_id,
+                        seq=seq.next(),
+                        type=RunEventType.error,
+                        data={"error": str(e)},
+                    )
             finally:
                 self.run_repo.set_status(run_id=run_id, status=RunStatus.error, error=str(e))
+        finally:
+            self.cancellations.discard(run_id=run_id)
@@ -18,7 +18,7 @@ class PostMessageCreateRunUseCase:
     - create a queued run (status="queued")
     - return run_id (frontend will use GET /api/runs/{run_id}/events (SSE))
 
-    Run execution (fake/langgraph) is started outside this use case (e.g., FastAPI BackgroundTasks),
+    Run execution (fake/langgraph) is started outside this use case (the RunScheduler),
     so the HTTP request stays fast.
     """
 
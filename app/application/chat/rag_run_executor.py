@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 import uuid
 
+from app.application.chat.buffered_event_writer import BufferedRunEventWriter
+from app.application.chat.cancellation import LEASE_LOST, CancellationRegistry, CancellationToken
+from app.application.chat.run_event_sequence import RunEventSequence
 from app.application.chat.run_executor import RunExecutor
 
 logger = logging.getLogger(__name__)
@@ -11,6 +16,7 @@ from app.domain.chat.repositories.run_repository import RunRepository
 from app.domain.chat.repositories.run_event_repository import RunEventRepository
 from app.domain.chat.repositories.thread_repository import ThreadRepository
 from app.domain.chat.services.llm_chat_service import LLMChatService
+from app.domain.chat.services.run_metrics import RunMetrics, RunTimings
 from app.infrastructure.rag.rag_chat_service import RagChatService
 
 _SYSTEM_PROMPT = """\
@@ -53,6 +59,20 @@ class RagRunExecutor(RunExecutor):
 
     Lifecycle mirrors FakeRunExecutor:
       tool_start → tool_end → token* → final → state(done)
+
+    Token events are written through a BufferedRunEventWriter, so a long answer
+    costs one INSERT per micro-batch instead of one per token. Seqs come from a
+    RunEventSequence owned by this executor for the run's lifetime.
+
+    Cancellation is checked in memory per token through the run's CancellationToken
+    (signaled by CancelRunUseCase); the DB status is only re-read every
+    cancel_poll_interval seconds as a fallback. A cancel also closes the in-flight
+    LLM stream. A cancel with reason LEASE_LOST (the run was requeued to another
+    worker) stops the run without writing anything else: events and status now
+    belong to whoever holds the lease.
+
+    With a RunMetrics, every run reports its RunTimings (history load, retrieval and
+    its stages, time to first token, streaming, total) once it ends.
     """
 
     def __init__(
@@ -63,6 +83,11 @@ class RagRunExecutor(RunExecutor):
         rag_service: RagChatService,
         llm_service: LLMChatService,
         history_turns: int = 6,
+        event_batch_size: int = 32,
+        event_flush_interval: float = 0.025,
+        cancellations: CancellationRegistry | None = None,
+        cancel_poll_interval: float = 1.0,
+        metrics: RunMetrics | None = None,
     ):
         self.run_repo = run_repo
         self.event_repo = event_repo
@@ -70,115 +95,352 @@ class RagRunExecutor(RunExecutor):
         self.rag_service = rag_service
         self.llm_service = llm_service
         self.history_turns = history_turns
+        self.event_batch_size = event_batch_size
+        self.event_flush_interval = event_flush_interval
+        self.cancellations = cancellations or CancellationRegistry()
+        self.cancel_poll_interval = cancel_poll_interval
+        self.metrics = metrics
 
     def start(self, *, thread_id: uuid.UUID, run_id: uuid.UUID) -> None:
+        started = time.perf_counter()
+        timings = RunTimings()
+        status = "error"
+        cancel: CancellationToken | None = None
+        events: BufferedRunEventWriter | None = None
         try:
-            self.run_repo.set_status(run_id=run_id, status=RunStatus.running)
-
-            # --- 1. Read conversation history ---
-            all_messages = self.thread_repo.list_messages(thread_id=thread_id)
-            if not all_messages:
-                raise ValueError("Thread has no messages.")
-
-            current_query = all_messages[-1].content
-            recent_history = all_messages[:-1][-(self.history_turns):]
-
-            logger.info(
-                "[run:%s] START | thread=%s | query=%r | history=%d msgs",
-                run_id, thread_id, current_query[:120], len(recent_history),
-            )
-
-            # --- 2. RAG retrieval ---
-            self.event_repo.append(
-                run_id=run_id,
-                type=RunEventType.tool_start,
-                data={"tool": "rag.search", "input": {"query": current_query}},
-            )
-
-            search_result = self.rag_service.search(current_query)
-            chunks = search_result["results"]
-
-            # Deduplicate cv_ids preserving relevance order
-            seen: set[str] = set()
-            sources: list[str] = []
-            for chunk in chunks:
-                cv_id = chunk["cv_id"]
-                if cv_id not in seen:
-                    seen.add(cv_id)
-                    sources.append(cv_id)
-
-            logger.info(
-                "[run:%s] RAG done | chunks=%d | sources=%s",
-                run_id, len(chunks), sources,
-            )
-
-            self.event_repo.append(
-                run_id=run_id,
-                type=RunEventType.tool_end,
-                data={"tool": "rag.search", "output": {"sources": sources, "chunks": len(chunks)}},
+            cancel = self._register(run_id)
+            events = self._writer(run_id)
+            system, messages, sources = self._prepare(
+                thread_id=thread_id, run_id=run_id, events=events, timings=timings,
             )
 
-            # --- 3. Build prompt ---
-            system = _build_system(chunks)
-            messages = _build_llm_messages(recent_history, current_query)
-
-            logger.info("[run:%s] LLM context (%d chunks → %d sources):", run_id, len(chunks), len(sources))
-            for chunk in chunks:
-                logger.info("  [%s chunk=%d] %s", chunk["cv_id"], chunk["chunk_index"], chunk["text"][:100].replace("\n", " "))
-
             # --- 4. Stream LLM response ---
-            logger.info("[run:%s] LLM streaming start | history=%d msgs", run_id, len(recent_history))
             full_text = ""
             token_count = 0
-            for token in self.llm_service.stream(system=system, messages=messages):
-                run = self.run_repo.get_run(run_id=run_id)
-                if run and run.status == RunStatus.canceled:
-                    logger.info("[run:%s] CANCELED by client after %d tokens", run_id, token_count)
-                    self.event_repo.append(
-                        run_id=run_id,
-                        type=RunEventType.canceled,
-                        data={"reason": "canceled"},
+            try:
+                for token in self.llm_service.stream(
+                    system=system,
+                    messages=messages,
+                    register_abort=cancel.add_callback,
+                ):
+                    if cancel.is_canceled():
+                        break
+                    if not token_count:
+                        timings.first_token_s = time.perf_counter() - started
+                    events.append(
+                        type=RunEventType.token,
+                        data={"text": token},
                     )
-                    return
-
-                self.event_repo.append(
-                    run_id=run_id,
-                    type=RunEventType.token,
-                    data={"text": token},
-                )
-                full_text += token
-                token_count += 1
-
-            logger.info(
-                "[run:%s] LLM streaming done | tokens=%d | chars=%d",
-                run_id, token_count, len(full_text),
+                    full_text += token
+                    token_count += 1
+            except Exception:
+                # Closing the stream on cancel surfaces as a read error here.
+                if not cancel.canceled:
+                    raise
+            if timings.first_token_s is not None:
+                timings.stream_s = time.perf_counter() - started - timings.first_token_s
+            timings.tokens = token_count
+
+            if self._lease_lost(run_id=run_id, cancel=cancel):
+                status = LEASE_LOST
+                return
+            if cancel.canceled:
+                status = "canceled"
+                self._canceled(run_id=run_id, events=events, token_count=token_count)
+                return
+            events.flush()
+
+            self._finish(
+                thread_id=thread_id, run_id=run_id, events=events,
+                full_text=full_text, token_count=token_count, sources=sources,
             )
+            status = "done"
 
-            # --- 5. Persist final response with source indication ---
-            self.event_repo.append(
-                run_id=run_id,
-                type=RunEventType.final,
-                data={"text": full_text, "sources": sources},
+        except Exception as e:
+            if self._lease_lost(run_id=run_id, cancel=cancel):
+                status = LEASE_LOST
+            else:
+                self._fail(run_id=run_id, events=events, error=e)
+        finally:
+            self.cancellations.discard(run_id=run_id)
+            self._observe(timings, status=status, started=started)
+
+    async def astart(self, *, thread_id: uuid.UUID, run_id: uuid.UUID) -> None:
+        """
+        asyncio version of start(): the LLM stream is consumed with astream() on the
+        event loop, so a run costs a task instead of a thread while it waits on tokens.
+
+        Blocking work (DB writes, RAG search) runs in worker threads, one call at a
+        time per run since the repositories share one DB session; a task cancelled
+        during such a call holds the session until the thread is done. A cancel cancels
+        the streaming task, which closes the HTTP stream. Buffered tokens are also
+        flushed on their deadline, so a stalled LLM doesn't hold back tokens already
+        received.
+        """
+        loop = asyncio.get_running_loop()
+        db_lock = asyncio.Lock()
+
+        async def blocking(fn, /, **kwargs):
+            async with db_lock:
+                call = asyncio.ensure_future(asyncio.to_thread(fn, **kwargs))
+                try:
+                    return await asyncio.shield(call)
+                except asyncio.CancelledError:
+                    # The thread can't be stopped and is using the run's session:
+                    # keep the lock until it returns, then let the cancel through.
+                    while not call.done():
+                        try:
+                            await asyncio.wait({call})
+                        except asyncio.CancelledError:
+                            pass
+                    call.exception()
+                    raise
+
+        started = time.perf_counter()
+        timings = RunTimings()
+        status = "error"
+        cancel: CancellationToken | None = None
+        events: BufferedRunEventWriter | None = None
+        try:
+            cancel = self._register(run_id)
+            events = await blocking(self._writer, run_id=run_id)
+            system, messages, sources = await blocking(
+                self._prepare, thread_id=thread_id, run_id=run_id, events=events, timings=timings,
             )
 
-            self.thread_repo.add_assistant_message(thread_id=thread_id, content=full_text)
+            # --- 4. Stream LLM response ---
+            full_text = ""
+            token_count = 0
 
-            self.run_repo.set_status(run_id=run_id, status=RunStatus.done)
-            self.event_repo.append(
-                run_id=run_id,
-                type=RunEventType.state,
-                data={"status": "done"},
+            async def consume() -> None:
+                nonlocal full_text, token_count
+                async for token in self.llm_service.astream(system=system, messages=messages):
+                    if cancel.canceled:
+                        break
+                    if not token_count:
+                        timings.first_token_s = time.perf_counter() - started
+                    if events.buffer_token(data={"text": token}):
+                        await blocking(events.flush)
+                    else:
+                        buffered.set()
+                    full_text += token
+                    token_count += 1
+
+            async def watch_status() -> None:
+                # DB fallback for cancels that never reach this process.
+                while not await blocking(cancel.is_canceled):
+                    await asyncio.sleep(self.cancel_poll_interval)
+
+            stream_done = asyncio.Event()
+            buffered = asyncio.Event()
+
+            async def flush_on_deadline() -> None:
+                # Publishes buffered tokens while the LLM stalls between tokens, and sleeps
+                # on `buffered` while nothing is waiting. Stopped through stream_done, never
+                # cancelled, so a flush is never cut in half.
+                while True:
+                    await buffered.wait()
+                    try:
+                        await asyncio.wait_for(stream_done.wait(), timeout=events.seconds_to_deadline())
+                        return
+                    except asyncio.TimeoutError:
+                        if events.overdue() and not cancel.canceled:
+                            await blocking(events.flush)
+                    if not events.pending:
+                        buffered.clear()
+
+            stream_task = asyncio.ensure_future(consume())
+            watcher = asyncio.ensure_future(watch_status())
+            flusher = asyncio.ensure_future(flush_on_deadline())
+            cancel.add_callback(lambda: loop.call_soon_threadsafe(stream_task.cancel))
+            try:
+                await stream_task
+            except asyncio.CancelledError:
+                if not cancel.canceled:
+                    raise
+            finally:
+                watcher.cancel()
+                stream_done.set()
+                buffered.set()
+                await flusher
+            if timings.first_token_s is not None:
+                timings.stream_s = time.perf_counter() - started - timings.first_token_s
+            timings.tokens = token_count
+
+            if self._lease_lost(run_id=run_id, cancel=cancel):
+                status = LEASE_LOST
+                return
+            if cancel.canceled:
+                status = "canceled"
+                await blocking(self._canceled, run_id=run_id, events=events, token_count=token_count)
+                return
+            await blocking(events.flush)
+
+            await blocking(
+                self._finish,
+                thread_id=thread_id, run_id=run_id, events=events,
+                full_text=full_text, token_count=token_count, sources=sources,
             )
-
-            logger.info("[run:%s] DONE", run_id)
+            status = "done"
 
         except Exception as e:
-            logger.exception("[run:%s] ERROR: %s", run_id, e)
-            try:
-                self.event_repo.append(
-                    run_id=run_id,
+            if self._lease_lost(run_id=run_id, cancel=cancel):
+                status = LEASE_LOST
+            else:
+                await blocking(self._fail, run_id=run_id, events=events, error=e)
+        finally:
+            self.cancellations.discard(run_id=run_id)
+            self._observe(timings, status=status, started=started)
+
+    def _observe(self, timings: RunTimings, *, status: str, started: float) -> None:
+        if self.metrics is None:
+            return
+        timings.total_s = time.perf_counter() - started
+        try:
+            self.metrics.observe_run(timings, status=status)
+        except Exception:
+            logger.exception("Could not record run metrics")
+
+    def _register(self, run_id: uuid.UUID) -> CancellationToken:
+        return self.cancellations.register(
+            run_id=run_id,
+            poll=lambda: self.run_repo.get_status(run_id=run_id) == RunStatus.canceled,
+            poll_interval=self.cancel_poll_interval,
+        )
+
+    def _writer(self, run_id: uuid.UUID) -> BufferedRunEventWriter:
+        return BufferedRunEventWriter(
+            event_repo=self.event_repo,
+            run_id=run_id,
+            sequence=RunEventSequence.for_run(event_repo=self.event_repo, run_id=run_id),
+            max_batch=self.event_batch_size,
+            max_delay=self.event_flush_interval,
+        )
+
+    def _prepare(
+        self,
+        *,
+        thread_id: uuid.UUID,
+        run_id: uuid.UUID,
+        events: BufferedRunEventWriter,
+        timings: RunTimings,
+    ) -> tuple[str, list[dict], list[str]]:
+        """
+        Steps 1-3: history, RAG retrieval and prompt. Returns (system, messages, sources)
+        and records the history and retrieval times in timings.
+        """
+        self.run_repo.set_status(run_id=run_id, status=RunStatus.running)
+
+        # --- 1. Read conversation history ---
+        t0 = time.perf_counter()
+        all_messages = self.thread_repo.list_messages(thread_id=thread_id)
+        timings.history_s = time.perf_counter() - t0
+        if not all_messages:
+            raise ValueError("Thread has no messages.")
+
+        current_query = all_messages[-1].content
+        recent_history = all_messages[:-1][-(self.history_turns):]
+
+        logger.info(
+            "[run:%s] START | thread=%s | query=%r | history=%d msgs",
+            run_id, thread_id, current_query[:120], len(recent_history),
+        )
+
+        # --- 2. RAG retrieval ---
+        events.append(
+            type=RunEventType.tool_start,
+            data={"tool": "rag.search", "input": {"query": current_query}},
+        )
+
+        t0 = time.perf_counter()
+        search_result = self.rag_service.search(current_query, timings=timings.retrieval_stages)
+        timings.retrieval_s = time.perf_counter() - t0
+        chunks = search_result["results"]
+
+        # Deduplicate cv_ids preserving relevance order
+        seen: set[str] = set()
+        sources: list[str] = []
+        for chunk in chunks:
+            cv_id = chunk["cv_id"]
+            if cv_id not in seen:
+                seen.add(cv_id)
+                sources.append(cv_id)
+
+        logger.info(
+            "[run:%s] RAG done | chunks=%d | sources=%s",
+            run_id, len(chunks), sources,
+        )
+
+        events.append(
+            type=RunEventType.tool_end,
+            data={"tool": "rag.search", "output": {"sources": sources, "chunks": len(chunks)}},
+        )
+
+        # --- 3. Build prompt ---
+        system = _build_system(chunks)
+        messages = _build_llm_messages(recent_history, current_query)
+
+        logger.info("[run:%s] LLM context (%d chunks → %d sources):", run_id, len(chunks), len(sources))
+        for chunk in chunks:
+            logger.info("  [%s chunk=%d] %s", chunk["cv_id"], chunk["chunk_index"], chunk["text"][:100].replace("\n", " "))
+
+        logger.info("[run:%s] LLM streaming start | history=%d msgs", run_id, len(recent_history))
+        return system, messages, sources
+
+    def _finish(
+        self,
+        *,
+        thread_id: uuid.UUID,
+        run_id: uuid.UUID,
+        events: BufferedRunEventWriter,
+        full_text: str,
+        token_count: int,
+        sources: list[str],
+    ) -> None:
+        logger.info(
+            "[run:%s] LLM streaming done | tokens=%d | chars=%d",
+            run_id, token_count, len(full_text),
+        )
+
+        # --- 5. Persist final response with source indication ---
+        events.append(
+            type=RunEventType.final,
+            data={"text": full_text, "sources": sources},
+        )
+
+        self.thread_repo.add_assistant_message(thread_id=thread_id, content=full_text)
+
+        self.run_repo.set_status(run_id=run_id, status=RunStatus.done)
+        events.append(
+            type=RunEventType.state,
+            data={"status": "done"},
+        )
+
+        logger.info("[run:%s] DONE", run_id)
+
+    def _canceled(self, *, run_id: uuid.UUID, events: BufferedRunEventWriter, token_count: int) -> None:
+        logger.info("[run:%s] CANCELED by client after %d tokens", run_id, token_count)
+        self.run_repo.set_status(run_id=run_id, status=RunStatus.canceled)
+        events.append(
+            type=RunEventType.canceled,
+            data={"reason": "canceled"},
+        )
+
+    def _lease_lost(self, *, run_id: uuid.UUID, cancel: CancellationToken | None) -> bool:
+        if cancel is None or cancel.reason != LEASE_LOST:
+            return False
+        logger.warning("[run:%s] lease lost, stopping without writing", run_id)
+        return True
+
+    def _fail(self, *, run_id: uuid.UUID, events: BufferedRunEventWriter | None, error: Exception) -> None:
+        logger.error("[run:%s] ERROR: %s", run_id, error, exc_info=error)
+        try:
+            # No writer means the run's seqs couldn't be read: only the status is recorded.
+            if events is not None:
+                # Flushes buffered tokens first so the error lands after them.
+                events.append(
                     type=RunEventType.error,
-                    data={"error": str(e)},
+                    data={"error": str(error)},
                 )
-            finally:
-                self.run_repo.set_status(run_id=run_id, status=RunStatus.error, error=str(e))
+        finally:
+            self.run_repo.set_status(run_id=run_id, status=RunStatus.error, error=str(error))
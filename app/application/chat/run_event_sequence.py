@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+import uuid
+
+from app.domain.chat.repositories.run_event_repository import RunEventRepository
+
+
+class RunEventSequence:
+    """
+    In-memory seq allocator for the events of one run.
+
+    The executor that owns a run is its only event writer, so it can read the
+    last persisted seq once and hand out the following ones locally: every append
+    becomes a single INSERT with no SELECT max(seq). Writers that don't own the
+    run (other processes) should call the repository without a seq instead, which
+    assigns it inside the INSERT.
+    """
+
+    def __init__(self, *, last_seq: int = 0):
+        self._last = last_seq
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_run(cls, *, event_repo: RunEventRepository, run_id: uuid.UUID) -> "RunEventSequence":
+        """Resume after whatever is already persisted (e.g. a run reclaimed after a crash)."""
+        return cls(last_seq=event_repo.last_seq(run_id=run_id))
+
+    def next(self) -> int:
+        return self.reserve(1)
+
+    def reserve(self, n: int) -> int:
+        """Reserve n contiguous seqs and return the first one."""
+        if n < 1:
+            raise ValueError("n must be >= 1")
+        with self._lock:
+            first = self._last + 1
+            self._last += n
+        return first
+
+    @property
+    def last(self) -> int:
+        return self._last
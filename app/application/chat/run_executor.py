@@ -14,7 +14,7 @@ class RunExecutor(ABC):
     - append run events
 
     Must NOT block the HTTP request thread. Intended to be triggered
-    from a background task or worker.
+    from the RunScheduler or a worker.
     """
 
     @abstractmethod
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import uuid
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class RunHeartbeat:
+    """
+    Renews the lease of a running run every interval seconds on a background
+    thread, for as long as the `with` block executing the run lasts.
+
+    beat() returns False once the lease is lost (the run was requeued after a
+    stall, or finished elsewhere); the heartbeat then stops, logs it and calls
+    on_lost, which should stop the executor (e.g. cancel the run's token with
+    LEASE_LOST). A failing beat() is logged and retried on the next tick.
+
+    `async with` runs the same loop as a task instead of a thread (beat() itself
+    still runs in a worker thread, since it blocks on the DB).
+    """
+
+    def __init__(
+        self,
+        *,
+        run_id: uuid.UUID,
+        beat: Callable[[], bool],
+        interval: float = 10.0,
+        on_lost: Callable[[], None] | None = None,
+    ):
+        self.run_id = run_id
+        self._beat = beat
+        self._interval = interval
+        self._on_lost = on_lost
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._task: asyncio.Task | None = None
+        self.lost = False
+
+    def __enter__(self) -> RunHeartbeat:
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{self.run_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def __aenter__(self) -> RunHeartbeat:
+        self._task = asyncio.ensure_future(self._arun())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                alive = self._beat()
+            except Exception as e:
+                logger.warning("[run:%s] heartbeat failed: %s", self.run_id, e)
+                continue
+            if not alive:
+                self._lose()
+                return
+
+    async def _arun(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                alive = await asyncio.to_thread(self._beat)
+            except Exception as e:
+                logger.warning("[run:%s] heartbeat failed: %s", self.run_id, e)
+                continue
+            if not alive:
+                self._lose()
+                return
+
+    def _lose(self) -> None:
+        self.lost = True
+        logger.warning("[run:%s] lease lost, stopping heartbeat", self.run_id)
+        if self._on_lost is not None:
+            try:
+                self._on_lost()
+            except Exception:
+                logger.exception("[run:%s] on_lost callback failed", self.run_id)
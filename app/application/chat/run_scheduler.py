@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import threading
+import uuid
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from app.application.errors import RunQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RunSchedulerStats:
+    running: int
+    queued: int
+    max_concurrency: int
+    max_queue: int
+
+
+class RunScheduler:
+    """
+    Bounded, in-process run queue.
+
+    submit() enqueues a run and returns immediately; max_concurrency worker tasks
+    on the event loop pull runs off the queue and execute run_fn on a dedicated
+    thread pool of the same size, so long LLM runs never occupy the threadpool
+    that serves API requests. At most max_queue runs wait at a time; beyond that
+    submit() raises RunQueueFullError (backpressure).
+
+    run_fn(run_id, thread_id) owns the whole run lifecycle, including errors.
+    If it is a coroutine function it is awaited on the event loop instead, and no
+    thread pool is created: a running run then costs a task, not a thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        run_fn: Callable[[uuid.UUID, uuid.UUID], None] | Callable[[uuid.UUID, uuid.UUID], Awaitable[None]],
+        max_concurrency: int = 4,
+        max_queue: int = 100,
+    ):
+        self._run_fn = run_fn
+        self._is_async = inspect.iscoroutinefunction(run_fn)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[tuple[uuid.UUID, uuid.UUID]] | None = None
+        self._pool: ThreadPoolExecutor | None = None
+        self._workers: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        if not self._is_async:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="run-worker")
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"run-worker-{i}")
+            for i in range(self.max_concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._pool is not None:
+            # Runs still executing in threads are abandoned; like cancelled async runs,
+            # their rows must be released by the caller (see RagRunLauncher.release_claimed).
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def has_capacity(self) -> bool:
+        with self._lock:
+            return self._queued < self.max_queue
+
+    def submit(self, *, run_id: uuid.UUID, thread_id: uuid.UUID) -> int:
+        """
+        Enqueue a run. Safe to call from any thread.
+        Returns its queue position (number of runs waiting ahead of it).
+        """
+        if self._loop is None or self._queue is None:
+            raise RuntimeError("RunScheduler is not started")
+        with self._lock:
+            if self._queued >= self.max_queue:
+                raise RunQueueFullError(f"Run queue is full ({self.max_queue} runs waiting)")
+            position = self._queued
+            self._queued += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (run_id, thread_id))
+        return position
+
+    def stats(self) -> RunSchedulerStats:
+        with self._lock:
+            return RunSchedulerStats(
+                running=self._running,
+                queued=self._queued,
+                max_concurrency=self.max_concurrency,
+                max_queue=self.max_queue,
+            )
+
+    async def _worker(self) -> None:
+        assert self._queue is not None and self._loop is not None
+        while True:
+            run_id, thread_id = await self._queue.get()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                if self._is_async:
+                    await self._aexecute(run_id, thread_id)
+                else:
+                    await self._loop.run_in_executor(self._pool, self._execute, run_id, thread_id)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def _execute(self, run_id: uuid.UUID, thread_id: uuid.UUID) -> None:
+        try:
+            self._run_fn(run_id, thread_id)
+        except Exception:
+            logger.exception("[run:%s] run_fn failed", run_id)
+
+    async def _aexecute(self, run_id: uuid.UUID, thread_id: uuid.UUID) -> None:
+        try:
+            await self._run_fn(run_id, thread_id)
+        except Exception:
+            logger.exception("[run:%s] run_fn failed", run_id)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class RunWorker:
+    """
+    Pull-based run execution for worker processes (the API's RunScheduler is push-based).
+
+    concurrency threads loop on claim_next(), which claims one queued run from the
+    shared queue, executes it and returns True, or returns False when nothing is
+    queued. Idle threads sleep until wake() (e.g. on a "run queued" notification)
+    or at most poll_interval seconds, so a lost notification only adds latency.
+
+    A reaper thread calls requeue_stale() every reap_interval seconds to recover
+    runs whose worker stopped heartbeating.
+
+    stop() lets in-flight runs finish; run() returns once they have.
+    """
+
+    def __init__(
+        self,
+        *,
+        claim_next: Callable[[], bool],
+        requeue_stale: Callable[[], tuple[int, int]],
+        concurrency: int = 2,
+        poll_interval: float = 2.0,
+        reap_interval: float = 15.0,
+    ):
+        self._claim_next = claim_next
+        self._requeue_stale = requeue_stale
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.reap_interval = reap_interval
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self) -> None:
+        threads = [
+            threading.Thread(target=self._slot, name=f"run-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        threads.append(threading.Thread(target=self._reaper, name="run-reaper", daemon=True))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _slot(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                ran = self._claim_next()
+            except Exception:
+                logger.exception("Run worker iteration failed")
+                ran = False
+            if ran:
+                continue
+            self._wakeup.wait(self.poll_interval)
+            if not self._stopped.is_set():
+                self._wakeup.clear()
+
+    def _reaper(self) -> None:
+        while not self._stopped.wait(self.reap_interval):
+            try:
+                requeued, failed = self._requeue_stale()
+            except Exception as e:
+                logger.warning("Requeueing stale runs failed: %s", e)
+                continue
+            if requeued or failed:
+                logger.info("Recovered stale runs | requeued=%d failed=%d", requeued, failed)
+            if requeued:
+                self.wake()
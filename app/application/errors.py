@@ -6,6 +6,10 @@ class ConflictError(AppError):
     """Raised when a resource already exists (HTTP 409)."""
 
 
+class RunQueueFullError(AppError):
+    """Raised when the run scheduler cannot accept more runs (HTTP 429)."""
+
+
 class UserAlreadyExistsError(AppError):
     """Raised when a user already exists (HTTP 401)."""
     def __init__(self, message: str, user_id: int, name: str | None):
@@ -4,7 +4,27 @@ from app.domain.chat.entities import RunEvent, RunEventType
 
 class RunEventRepository(ABC):
     @abstractmethod
-    def append(self, *, run_id: uuid.UUID, type: RunEventType, data: dict) -> RunEvent: ...
+    def append(
+        self, *, run_id: uuid.UUID, type: RunEventType, data: dict, seq: int | None = None
+    ) -> RunEvent:
+        """Persist one event. Without seq, the next seq is assigned in the same INSERT."""
+        ...
+
+    @abstractmethod
+    def append_many(
+        self,
+        *,
+        run_id: uuid.UUID,
+        events: list[tuple[RunEventType, dict]],
+        first_seq: int | None = None,
+    ) -> list[RunEvent]:
+        """Persist several events in one write; they get contiguous seqs in list order."""
+        ...
+
+    @abstractmethod
+    def last_seq(self, *, run_id: uuid.UUID) -> int:
+        """Highest persisted seq for the run (0 if it has no events)."""
+        ...
 
     @abstractmethod
     def list_after(self, *, run_id: uuid.UUID, after_seq: int) -> list[RunEvent]: ...
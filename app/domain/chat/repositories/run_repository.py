@@ -9,5 +9,50 @@ class RunRepository(ABC):
     @abstractmethod
     def get_run(self, *, run_id: uuid.UUID) -> Run | None: ...
 
+    @abstractmethod
+    def list_queued(self, *, limit: int) -> list[Run]:
+        """Oldest queued runs first."""
+        ...
+
+    @abstractmethod
+    def claim_run(self, *, run_id: uuid.UUID, worker_id: str | None = None) -> bool:
+        """Atomically move a queued run to running. False if it was not queued anymore."""
+        ...
+
+    @abstractmethod
+    def claim_next(self, *, worker_id: str) -> Run | None:
+        """
+        Claim the oldest queued run for worker_id without blocking on runs other
+        workers are claiming concurrently. None if nothing is queued.
+        """
+        ...
+
+    @abstractmethod
+    def heartbeat(self, *, run_id: uuid.UUID, worker_id: str) -> bool:
+        """Renew the lease of a running run. False if worker_id does not hold it anymore."""
+        ...
+
+    @abstractmethod
+    def requeue_stale(self, *, stale_after: float, max_attempts: int) -> tuple[int, int]:
+        """
+        Recover running runs whose heartbeat is older than stale_after seconds:
+        back to queued, or to error once they reached max_attempts.
+        Returns (requeued, failed).
+        """
+        ...
+
+    @abstractmethod
+    def release_claimed(self, *, worker_id: str) -> int:
+        """
+        Put the running runs leased to worker_id back in the queue, for a process
+        that stops before they finish. Returns how many were released.
+        """
+        ...
+
+    @abstractmethod
+    def get_status(self, *, run_id: uuid.UUID) -> RunStatus | None:
+        """Read only the status column, bypassing any session cache."""
+        ...
+
     @abstractmethod
     def set_status(self, *, run_id: uuid.UUID, status: RunStatus, error: str | None = None) -> None: ...
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Callable, Iterator
 
 
 class LLMChatService(ABC):
@@ -11,6 +11,13 @@ class LLMChatService(ABC):
     Implementations provide a stream() method that yields text tokens one by one.
     The system parameter carries the RAG context and persona instructions.
     The messages list follows the OpenAI-style role/content format.
+
+    register_abort, when given, is called once the HTTP stream is open with a
+    callable that closes it; callers use it to stop an in-flight completion
+    (e.g. when the run is canceled) from another thread.
+
+    astream() is the asyncio counterpart: it does not pin a thread per stream,
+    and is aborted by cancelling the task that iterates it.
     """
 
     @abstractmethod
@@ -20,6 +27,18 @@ class LLMChatService(ABC):
         system: str,
         messages: list[dict],
         max_tokens: int = 1024,
+        register_abort: Callable[[Callable[[], None]], None] | None = None,
     ) -> Iterator[str]:
         """Yield text tokens incrementally as they arrive from the LLM."""
         raise NotImplementedError
+
+    @abstractmethod
+    def astream(
+        self,
+        *,
+        system: str,
+        messages: list[dict],
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[str]:
+        """Async version of stream(), meant to be implemented as an async generator."""
+        raise NotImplementedError
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import uuid
+
+from app.domain.chat.entities import RunEvent
+
+
+class RunEventSubscription(ABC):
+    """
+    Live feed of RunEvents for a single run.
+
+    Events are delivered in the order they were published. A subscription only
+    sees events published after it was created; older events must be replayed
+    from the RunEventRepository (Last-Event-ID catch-up).
+    """
+
+    @abstractmethod
+    async def get(self, *, timeout: float) -> list[RunEvent]:
+        """Wait up to timeout seconds and return the next batch of events ([] on timeout)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class RunEventBus(ABC):
+    """
+    Port for push-based fan-out of RunEvents to SSE clients.
+
+    The bus is a latency optimization, not the source of truth: events are always
+    persisted in run_events first, so subscribers can recover any missed event
+    from the repository.
+    """
+
+    @abstractmethod
+    def publish(self, *, events: list[RunEvent]) -> None:
+        """Deliver persisted events to every subscriber of their run. Safe to call from any thread."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def subscribe(self, *, run_id: uuid.UUID) -> RunEventSubscription:
+        """Must be called from the event loop that will consume the subscription."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release backend resources (connections, listener threads)."""
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RunTimings:
+    """
+    Where the time of one run went, in seconds. first_token_s is measured from the
+    start of the run and is None when no token arrived; stream_s goes from the first
+    token to the end of the LLM stream. retrieval_stages holds the per-stage seconds
+    of the RAG search (tokenize, encode, faiss, bm25, rrf, materialize).
+    """
+
+    history_s: float = 0.0
+    retrieval_s: float = 0.0
+    first_token_s: float | None = None
+    stream_s: float = 0.0
+    total_s: float = 0.0
+    tokens: int = 0
+    retrieval_stages: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def tokens_per_s(self) -> float | None:
+        return self.tokens / self.stream_s if self.tokens and self.stream_s > 0 else None
+
+
+class RunMetrics(ABC):
+    """
+    Port for run performance metrics (e.g. Prometheus histograms).
+
+    Executors call observe_run once per run, whatever its outcome
+    (status: done | canceled | error | lease_lost). Safe to call from any thread.
+    """
+
+    @abstractmethod
+    def observe_run(self, timings: RunTimings, *, status: str) -> None:
+        raise NotImplementedError
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import uuid
+from collections.abc import Callable
+
+from app.domain.chat.entities import RunEvent
+from app.domain.chat.services.run_event_bus import RunEventBus, RunEventSubscription
+
+logger = logging.getLogger(__name__)
+
+
+class _QueueSubscription(RunEventSubscription):
+    """
+    asyncio.Queue bound to the subscriber's event loop.
+
+    Executors publish from worker threads, so deliveries are handed over to the
+    loop with call_soon_threadsafe instead of touching the queue directly.
+    """
+
+    def __init__(
+        self,
+        *,
+        run_id: uuid.UUID,
+        loop: asyncio.AbstractEventLoop,
+        on_close: Callable[["_QueueSubscription"], None],
+    ):
+        self.run_id = run_id
+        self._loop = loop
+        self._queue: asyncio.Queue[list[RunEvent]] = asyncio.Queue()
+        self._on_close = on_close
+        self._closed = False
+
+    def deliver(self, events: list[RunEvent]) -> None:
+        if self._closed:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, events)
+        except RuntimeError:
+            # Subscriber loop already closed (shutdown); nothing to deliver to.
+            self.close()
+
+    async def get(self, *, timeout: float) -> list[RunEvent]:
+        try:
+            batch = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+        # Drain whatever else is already queued so the SSE writer can flush in one go.
+        while not self._queue.empty():
+            batch = batch + self._queue.get_nowait()
+        return batch
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._on_close(self)
+
+
+class InMemoryRunEventBus(RunEventBus):
+    """
+    Process-local fan-out: publish() hands events straight to the SSE generators
+    subscribed to the run. Only sees events appended inside this process; use
+    PostgresRunEventBus when executors run in other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[uuid.UUID, set[_QueueSubscription]] = {}
+
+    def publish(self, *, events: list[RunEvent]) -> None:
+        by_run: dict[uuid.UUID, list[RunEvent]] = {}
+        for ev in events:
+            by_run.setdefault(ev.run_id, []).append(ev)
+
+        for run_id, run_events in by_run.items():
+            with self._lock:
+                subscribers = list(self._subscribers.get(run_id, ()))
+            for sub in subscribers:
+                sub.deliver(run_events)
+
+    def subscribe(self, *, run_id: uuid.UUID) -> RunEventSubscription:
+        sub = _QueueSubscription(
+            run_id=run_id,
+            loop=asyncio.get_running_loop(),
+            on_close=self._unsubscribe,
+        )
+        with self._lock:
+            self._subscribers.setdefault(run_id, set()).add(sub)
+        return sub
+
+    def subscriber_count(self, *, run_id: uuid.UUID) -> int:
+        with self._lock:
+            return len(self._subscribers.get(run_id, ()))
+
+    def _unsubscribe(self, sub: _QueueSubscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.run_id)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.run_id]
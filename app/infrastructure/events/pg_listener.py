@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+
+import psycopg
+from psycopg import sql
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+
+def dsn_from_database_url(database_url: str) -> str:
+    """Turn a SQLAlchemy URL (postgresql+psycopg://...) into a plain libpq DSN."""
+    url = make_url(database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class PostgresNotifyListener:
+    """
+    One LISTEN connection per process, shared by every component that needs
+    cross-process signals (run events, cancellation).
+
+    Handlers are called on the listener thread and must be cheap: they should only
+    hand the payload over to in-process structures. Register all channels with
+    add_handler() before start().
+    """
+
+    def __init__(self, *, dsn: str, poll_timeout: float = 1.0, reconnect_delay: float = 2.0):
+        self._dsn = dsn
+        self._poll_timeout = poll_timeout
+        self._reconnect_delay = reconnect_delay
+        self._handlers: dict[str, list[Callable[[str], None]]] = {}
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._notify_lock = threading.Lock()
+        self._notify_conn: psycopg.Connection | None = None
+
+    def add_handler(self, channel: str, handler: Callable[[str], None]) -> None:
+        if self._thread is not None:
+            raise RuntimeError("add_handler() must be called before start()")
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def start(self) -> None:
+        if self._thread is not None or not self._handlers:
+            return
+        self._thread = threading.Thread(target=self._run, name="pg-notify-listener", daemon=True)
+        self._thread.start()
+
+    def notify(self, channel: str, payload: str) -> None:
+        """Send NOTIFY on a dedicated autocommit connection (reconnects once on failure)."""
+        with self._notify_lock:
+            for attempt in (1, 2):
+                try:
+                    if self._notify_conn is None or self._notify_conn.closed:
+                        self._notify_conn = psycopg.connect(self._dsn, autocommit=True)
+                    self._notify_conn.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+                    return
+                except psycopg.OperationalError:
+                    self._notify_conn = None
+                    if attempt == 2:
+                        raise
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._poll_timeout + 1.0)
+            self._thread = None
+        with self._notify_lock:
+            if self._notify_conn is not None:
+                self._notify_conn.close()
+                self._notify_conn = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(self._dsn, autocommit=True) as conn:
+                    for channel in self._handlers:
+                        conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+                    logger.info("LISTEN on %s", ", ".join(self._handlers))
+                    while not self._stopped.is_set():
+                        for notify in conn.notifies(timeout=self._poll_timeout):
+                            self._dispatch(notify.channel, notify.payload)
+            except psycopg.Error as e:
+                logger.warning("Postgres listener disconnected: %s (retrying in %.1fs)", e, self._reconnect_delay)
+                self._stopped.wait(self._reconnect_delay)
+
+    def _dispatch(self, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Notify handler failed | channel=%s", channel)
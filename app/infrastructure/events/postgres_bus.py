@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime
+
+from app.domain.chat.entities import RunEvent, RunEventType
+from app.infrastructure.events.in_memory_bus import InMemoryRunEventBus
+from app.infrastructure.events.pg_listener import PostgresNotifyListener
+
+logger = logging.getLogger(__name__)
+
+RUN_EVENTS_CHANNEL = "run_events"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+_MAX_PAYLOAD_BYTES = 7900
+
+
+def _encode_event(ev: RunEvent) -> dict:
+    return {
+        "id": str(ev.id),
+        "run_id": str(ev.run_id),
+        "seq": ev.seq,
+        "type": ev.type.value,
+        "data": ev.data,
+        "created_at": ev.created_at.isoformat() if ev.created_at else None,
+    }
+
+
+def _decode_event(raw: dict) -> RunEvent:
+    return RunEvent(
+        id=uuid.UUID(raw["id"]),
+        run_id=uuid.UUID(raw["run_id"]),
+        seq=int(raw["seq"]),
+        type=RunEventType(raw["type"]),
+        data=raw["data"],
+        created_at=datetime.fromisoformat(raw["created_at"]) if raw["created_at"] else None,
+    )
+
+
+class PostgresRunEventBus(InMemoryRunEventBus):
+    """
+    Multi-worker fan-out over Postgres LISTEN/NOTIFY.
+
+    Events published in this process are delivered locally right away and also
+    broadcast on the run_events channel; every other process re-publishes them
+    to its own subscribers. Events that don't fit in a NOTIFY payload (e.g. a long
+    `final` text) are skipped: subscribers detect the seq gap and replay it from
+    the database.
+    """
+
+    def __init__(self, *, listener: PostgresNotifyListener):
+        super().__init__()
+        self._listener = listener
+        self._origin = uuid.uuid4().hex
+        listener.add_handler(RUN_EVENTS_CHANNEL, self._on_notify)
+
+    def publish(self, *, events: list[RunEvent]) -> None:
+        super().publish(events=events)
+        for payload in self._payloads(events):
+            try:
+                self._listener.notify(RUN_EVENTS_CHANNEL, payload)
+            except Exception as e:
+                # Best effort: remote subscribers fall back to a DB resync.
+                logger.warning("NOTIFY %s failed: %s", RUN_EVENTS_CHANNEL, e)
+                return
+
+    def close(self) -> None:
+        self._listener.close()
+
+    def _payloads(self, events: list[RunEvent]) -> list[str]:
+        """Pack events into as few NOTIFY payloads as fit under the size limit."""
+        envelope = len(self._dump([]).encode("utf-8"))
+        payloads: list[str] = []
+        batch: list[dict] = []
+        size = envelope
+        for ev in events:
+            encoded = _encode_event(ev)
+            ev_size = len(json.dumps(encoded, ensure_ascii=False).encode("utf-8")) + 2  # ", " separator
+            if envelope + ev_size > _MAX_PAYLOAD_BYTES:
+                logger.debug("Event too large for NOTIFY | run=%s seq=%d", ev.run_id, ev.seq)
+                continue
+            if batch and size + ev_size > _MAX_PAYLOAD_BYTES:
+                payloads.append(self._dump(batch))
+                batch, size = [], envelope
+            batch.append(encoded)
+            size += ev_size
+        if batch:
+            payloads.append(self._dump(batch))
+        return payloads
+
+    def _dump(self, batch: list[dict]) -> str:
+        return json.dumps({"origin": self._origin, "events": batch}, ensure_ascii=False)
+
+    def _on_notify(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("origin") == self._origin:
+            return
+        events = [_decode_event(raw) for raw in message.get("events", [])]
+        if events:
+            super().publish(events=events)
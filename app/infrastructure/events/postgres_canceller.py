@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import logging
+import uuid
+
+from app.application.chat.cancellation import CancellationRegistry, RunCanceller
+from app.infrastructure.events.pg_listener import PostgresNotifyListener
+
+logger = logging.getLogger(__name__)
+
+RUN_CANCEL_CHANNEL = "run_cancel"
+
+
+class PostgresRunCanceller(RunCanceller):
+    """
+    Cross-process cancel: signals the local registry and broadcasts the run id on
+    the run_cancel channel, so whichever process executes the run stops at its
+    next token (and closes its LLM stream) without polling the runs table.
+    """
+
+    def __init__(self, *, registry: CancellationRegistry, listener: PostgresNotifyListener):
+        self._registry = registry
+        self._listener = listener
+        listener.add_handler(RUN_CANCEL_CHANNEL, self._on_notify)
+
+    def cancel(self, *, run_id: uuid.UUID) -> None:
+        self._registry.cancel(run_id=run_id)
+        try:
+            self._listener.notify(RUN_CANCEL_CHANNEL, str(run_id))
+        except Exception as e:
+            # The executor's bounded-staleness status check still catches it.
+            logger.warning("NOTIFY %s failed: %s", RUN_CANCEL_CHANNEL, e)
+
+    def _on_notify(self, payload: str) -> None:
+        self._registry.cancel(run_id=uuid.UUID(payload))
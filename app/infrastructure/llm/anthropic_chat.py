@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import json
 import logging
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import nullcontext
 
 import httpx
 
@@ -14,25 +15,51 @@ _ANTHROPIC_VERSION = "2023-06-01"
 logger = logging.getLogger(__name__)
 
 
+def _sse_texts(line: str) -> list[str] | None:
+    """Text deltas carried by one SSE line. None on the [DONE] sentinel."""
+    if not line.startswith("data: "):
+        return []
+    data_str = line[6:]
+    if data_str == "[DONE]":
+        return None
+    try:
+        event = json.loads(data_str)
+    except json.JSONDecodeError:
+        return []
+    if event.get("type") == "content_block_delta":
+        delta = event.get("delta", {})
+        if delta.get("type") == "text_delta":
+            text = delta.get("text", "")
+            if text:
+                return [text]
+    return []
+
+
 class AnthropicChatService(LLMChatService):
     """
     Streams chat completions from the Anthropic Messages API using Server-Sent Events.
 
     The system parameter is passed as Anthropic's top-level system field (not as a message),
     which is the idiomatic way to provide context/persona without consuming conversation turns.
+
+    http_client / async_http_client are long-lived, shared clients (connection pool,
+    HTTP/2); without them each call opens and closes its own client.
     """
 
-    def __init__(self, *, api_key: str, model: str = "claude-3-haiku-20240307"):
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        model: str = "claude-3-haiku-20240307",
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
+    ):
         self._api_key = api_key
         self._model = model
+        self._http_client = http_client
+        self._async_http_client = async_http_client
 
-    def stream(
-        self,
-        *,
-        system: str,
-        messages: list[dict],
-        max_tokens: int = 1024,
-    ) -> Iterator[str]:
+    def _request(self, *, system: str, messages: list[dict], max_tokens: int) -> tuple[dict, dict]:
         headers = {
             "x-api-key": self._api_key,
             "anthropic-version": _ANTHROPIC_VERSION,
@@ -45,25 +72,52 @@ class AnthropicChatService(LLMChatService):
             "messages": messages,
             "stream": True,
         }
+        return headers, payload
+
+    def stream(
+        self,
+        *,
+        system: str,
+        messages: list[dict],
+        max_tokens: int = 1024,
+        register_abort: Callable[[Callable[[], None]], None] | None = None,
+    ) -> Iterator[str]:
+        headers, payload = self._request(system=system, messages=messages, max_tokens=max_tokens)
 
         logger.info("Anthropic stream | model=%s | messages=%d", self._model, len(messages))
-        with httpx.Client(timeout=120.0) as client:
+        client_cm = nullcontext(self._http_client) if self._http_client else httpx.Client(timeout=120.0)
+        with client_cm as client:
             with client.stream("POST", _API_URL, headers=headers, json=payload) as response:
                 response.raise_for_status()
+                if register_abort is not None:
+                    register_abort(response.close)
                 logger.debug("Anthropic HTTP %s", response.status_code)
                 for line in response.iter_lines():
-                    if not line.startswith("data: "):
-                        continue
-                    data_str = line[6:]
-                    if data_str == "[DONE]":
+                    texts = _sse_texts(line)
+                    if texts is None:
+                        break
+                    yield from texts
+
+    async def astream(
+        self,
+        *,
+        system: str,
+        messages: list[dict],
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[str]:
+        headers, payload = self._request(system=system, messages=messages, max_tokens=max_tokens)
+
+        logger.info("Anthropic astream | model=%s | messages=%d", self._model, len(messages))
+        client_cm = (
+            nullcontext(self._async_http_client) if self._async_http_client else httpx.AsyncClient(timeout=120.0)
+        )
+        async with client_cm as client:
+            async with client.stream("POST", _API_URL, headers=headers, json=payload) as response:
+                response.raise_for_status()
+                logger.debug("Anthropic HTTP %s (%s)", response.status_code, response.http_version)
+                async for line in response.aiter_lines():
+                    texts = _sse_texts(line)
+                    if texts is None:
                         break
-                    try:
-                        event = json.loads(data_str)
-                    except json.JSONDecodeError:
-                        continue
-                    if event.get("type") == "content_block_delta":
-                        delta = event.get("delta", {})
-                        if delta.get("type") == "text_delta":
-                            text = delta.get("text", "")
-                            if text:
-                                yield text
+                    for text in texts:
+                        yield text
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import json
 import logging
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import nullcontext
 
 import httpx
 
@@ -13,6 +14,30 @@ _BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
 logger = logging.getLogger(__name__)
 
 
+def _sse_texts(line: str) -> list[str] | None:
+    """Text parts carried by one SSE line. None on the [DONE] sentinel."""
+    if not line.startswith("data: "):
+        return []
+    data_str = line[6:]
+    if data_str.strip() == "[DONE]":
+        return None
+    try:
+        chunk = json.loads(data_str)
+    except json.JSONDecodeError:
+        return []
+    candidates = chunk.get("candidates", [])
+    if not candidates:
+        return []
+    parts = candidates[0].get("content", {}).get("parts", [])
+    texts: list[str] = []
+    for part in parts:
+        if isinstance(part, dict):
+            text = part.get("text", "")
+            if text:
+                texts.append(text)
+    return texts
+
+
 class GeminiChatService(LLMChatService):
     """
     Streams chat completions from the Google Gemini API using Server-Sent Events.
@@ -20,19 +45,25 @@ class GeminiChatService(LLMChatService):
     Uses the streamGenerateContent endpoint with alt=sse.
     The system parameter maps to Gemini's systemInstruction field.
     Message roles are translated: "assistant" → "model" (Gemini convention).
+
+    http_client / async_http_client are long-lived, shared clients (connection pool,
+    HTTP/2); without them each call opens and closes its own client.
     """
 
-    def __init__(self, *, api_key: str, model: str = "models/gemini-2.0-flash"):
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        model: str = "models/gemini-2.0-flash",
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
+    ):
         self._api_key = api_key
         self._model = model.removeprefix("models/")
+        self._http_client = http_client
+        self._async_http_client = async_http_client
 
-    def stream(
-        self,
-        *,
-        system: str,
-        messages: list[dict],
-        max_tokens: int = 1024,
-    ) -> Iterator[str]:
+    def _request(self, *, system: str, messages: list[dict], max_tokens: int) -> tuple[str, dict]:
         url = f"{_BASE_URL}/{self._model}:streamGenerateContent?alt=sse&key={self._api_key}"
 
         contents = [
@@ -48,28 +79,52 @@ class GeminiChatService(LLMChatService):
             "contents": contents,
             "generationConfig": {"maxOutputTokens": max_tokens},
         }
+        return url, payload
+
+    def stream(
+        self,
+        *,
+        system: str,
+        messages: list[dict],
+        max_tokens: int = 1024,
+        register_abort: Callable[[Callable[[], None]], None] | None = None,
+    ) -> Iterator[str]:
+        url, payload = self._request(system=system, messages=messages, max_tokens=max_tokens)
 
         logger.info("Gemini stream | model=%s | messages=%d", self._model, len(messages))
-        with httpx.Client(timeout=120.0) as client:
+        client_cm = nullcontext(self._http_client) if self._http_client else httpx.Client(timeout=120.0)
+        with client_cm as client:
             with client.stream("POST", url, headers={"Content-Type": "application/json"}, json=payload) as response:
                 response.raise_for_status()
+                if register_abort is not None:
+                    register_abort(response.close)
                 logger.debug("Gemini HTTP %s", response.status_code)
                 for line in response.iter_lines():
-                    if not line.startswith("data: "):
-                        continue
-                    data_str = line[6:]
-                    if data_str.strip() == "[DONE]":
+                    texts = _sse_texts(line)
+                    if texts is None:
+                        break
+                    yield from texts
+
+    async def astream(
+        self,
+        *,
+        system: str,
+        messages: list[dict],
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[str]:
+        url, payload = self._request(system=system, messages=messages, max_tokens=max_tokens)
+
+        logger.info("Gemini astream | model=%s | messages=%d", self._model, len(messages))
+        client_cm = (
+            nullcontext(self._async_http_client) if self._async_http_client else httpx.AsyncClient(timeout=120.0)
+        )
+        async with client_cm as client:
+            async with client.stream("POST", url, headers={"Content-Type": "application/json"}, json=payload) as response:
+                response.raise_for_status()
+                logger.debug("Gemini HTTP %s (%s)", response.status_code, response.http_version)
+                async for line in response.aiter_lines():
+                    texts = _sse_texts(line)
+                    if texts is None:
                         break
-                    try:
-                        chunk = json.loads(data_str)
-                    except json.JSONDecodeError:
-                        continue
-                    candidates = chunk.get("candidates", [])
-                    if not candidates:
-                        continue
-                    parts = candidates[0].get("content", {}).get("parts", [])
-                    for part in parts:
-                        if isinstance(part, dict):
-                            text = part.get("text", "")
-                            if text:
-                                yield text
+                    for text in texts:
+                        yield text
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+
+import httpx
+
+# Streams can stay silent for a while between tokens; connecting should not.
+_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "200")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "50")),
+        keepalive_expiry=30.0,
+    )
+
+
+def create_llm_http_client() -> httpx.Client:
+    """Long-lived client for the blocking stream() path, so turns reuse TCP+TLS connections."""
+    return httpx.Client(timeout=_TIMEOUT, limits=_limits())
+
+
+def create_llm_async_http_client() -> httpx.AsyncClient:
+    """
+    Long-lived client for astream(). With HTTP/2 (LLM_HTTP2=1, needs the h2 package)
+    concurrent completions are multiplexed over a few connections per provider.
+    """
+    http2 = os.getenv("LLM_HTTP2", "1") == "1"
+    return httpx.AsyncClient(timeout=_TIMEOUT, limits=_limits(), http2=http2)
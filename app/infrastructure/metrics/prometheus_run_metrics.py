@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+from app.domain.chat.services.run_metrics import RunMetrics, RunTimings
+
+# Retrieval stages take from tens of microseconds (RRF) to tens of milliseconds (encode);
+# run stages from milliseconds (history) to a minute (long LLM answers).
+_SEARCH_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_RUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_TOKENS_PER_S_BUCKETS = (1, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500)
+
+
+class PrometheusRunMetrics(RunMetrics):
+    """
+    RunMetrics as Prometheus histograms in their own registry (one per process):
+
+      rag_search_stage_seconds{stage}  tokenize | encode | faiss | bm25 | rrf | materialize
+      run_stage_seconds{stage}         history | retrieval | first_token | stream | total
+      run_tokens_per_second            LLM streaming throughput
+      runs_total{status}               done | canceled | error | lease_lost
+
+    render() returns the text exposition served at GET /api/metrics.
+    """
+
+    def __init__(self, registry: CollectorRegistry | None = None):
+        self.registry = registry or CollectorRegistry()
+        self.search_stage_seconds = Histogram(
+            "rag_search_stage_seconds",
+            "Time spent in each stage of a RAG search.",
+            ["stage"],
+            buckets=_SEARCH_BUCKETS,
+            registry=self.registry,
+        )
+        self.run_stage_seconds = Histogram(
+            "run_stage_seconds",
+            "Time spent in each phase of a chat run (first_token and total from the run start).",
+            ["stage"],
+            buckets=_RUN_BUCKETS,
+            registry=self.registry,
+        )
+        self.tokens_per_second = Histogram(
+            "run_tokens_per_second",
+            "LLM tokens per second, from the first token to the end of the stream.",
+            buckets=_TOKENS_PER_S_BUCKETS,
+            registry=self.registry,
+        )
+        self.runs = Counter("runs", "Finished chat runs.", ["status"], registry=self.registry)
+
+    def observe_run(self, timings: RunTimings, *, status: str) -> None:
+        for stage, seconds in timings.retrieval_stages.items():
+            self.search_stage_seconds.labels(stage=stage).observe(seconds)
+        stages = {
+            "history": timings.history_s,
+            "retrieval": timings.retrieval_s,
+            "first_token": timings.first_token_s,
+            "stream": timings.stream_s,
+            "total": timings.total_s,
+        }
+        for stage, seconds in stages.items():
+            if seconds is not None:
+                self.run_stage_seconds.labels(stage=stage).observe(seconds)
+        if timings.tokens_per_s is not None:
+            self.tokens_per_second.observe(timings.tokens_per_s)
+        self.runs.labels(status=status).inc()
+
+    def render(self) -> tuple[bytes, str]:
+        """(body, content type) of the Prometheus text exposition."""
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
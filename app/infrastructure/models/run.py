@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, Index, Text, func
+from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, Index, Integer, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -51,6 +51,11 @@ class Run(Base):
 
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Lease held by the process executing the run; a stale heartbeat_at means it died.
+    worker_id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
     thread: Mapped["Thread"] = relationship(back_populates="runs")
     events: Mapped[list["RunEvent"]] = relationship(
         back_populates="run",
@@ -60,4 +65,5 @@ class Run(Base):
 
     __table_args__ = (
         Index("ix_runs_thread_created_at", "thread_id", "created_at"),
+        Index("ix_runs_status_created_at", "status", "created_at"),
     )
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from pathlib import Path
 from typing import Any
 
-from rag.retrieval import run_search_with_model
+from rag.cache import QueryEmbeddingCache, SearchResultCache
+from rag.retrieval import run_search_batch, run_search_with_model
 
 
 class RagChatService:
@@ -11,11 +13,29 @@ class RagChatService:
 
     Holds pre-loaded index data (FAISS + BM25 + chunks) and the embedding model
     as instance state so they are loaded once at startup and reused across requests.
+
+    An optional QueryEmbeddingCache skips the embedding model for repeated queries;
+    with cache_path it is loaded at construction and written back by save_cache().
+    An optional SearchResultCache skips the whole search for identical queries.
+    model may be a MicroBatchEncoder shared by concurrent searches; close() stops it.
     """
 
-    def __init__(self, *, index_data: dict[str, Any], model: Any):
+    def __init__(
+        self,
+        *,
+        index_data: dict[str, Any],
+        model: Any,
+        query_cache: QueryEmbeddingCache | None = None,
+        cache_path: Path | None = None,
+        result_cache: SearchResultCache | None = None,
+    ):
         self._index_data = index_data
         self._model = model
+        self._query_cache = query_cache
+        self._cache_path = cache_path
+        self._result_cache = result_cache
+        if query_cache is not None and cache_path is not None:
+            query_cache.load(cache_path)
 
     def search(
         self,
@@ -24,10 +44,12 @@ class RagChatService:
         topk: int = 5,
         mode: str = "hybrid",
         rrf_k: int = 60,
+        timings: dict[str, float] | None = None,
     ) -> dict[str, Any]:
         """
         Run hybrid RAG search (FAISS + BM25 + RRF reranking by default).
-        Returns the same dict as run_search_with_model.
+        Returns the same dict as run_search_with_model; timings, if given,
+        receives the seconds spent per retrieval stage.
         """
         return run_search_with_model(
             index_data=self._index_data,
@@ -36,4 +58,49 @@ class RagChatService:
             topk=topk,
             mode=mode,
             rrf_k=rrf_k,
+            query_cache=self._query_cache,
+            result_cache=self._result_cache,
+            timings=timings,
+        )
+
+    def search_batch(
+        self,
+        queries: list[str],
+        *,
+        topk: int = 5,
+        mode: str = "hybrid",
+        rrf_k: int = 60,
+    ) -> list[dict[str, Any]]:
+        """
+        search() for many queries at once (one encoder pass, one FAISS search, batched BM25).
+        Returns one dict per query, in order, like run_search_batch.
+        """
+        return run_search_batch(
+            index_data=self._index_data,
+            model=self._model,
+            queries=queries,
+            topk=topk,
+            mode=mode,
+            rrf_k=rrf_k,
+            query_cache=self._query_cache,
+            result_cache=self._result_cache,
         )
+
+    def cache_stats(self) -> dict[str, Any]:
+        return {
+            "index_version": self._index_data.get("version"),
+            "query_embeddings": self._query_cache.stats() if self._query_cache is not None else None,
+            "search_results": self._result_cache.stats() if self._result_cache is not None else None,
+        }
+
+    def save_cache(self) -> int:
+        """Persist the query embedding cache, if one is configured with a path."""
+        if self._query_cache is None or self._cache_path is None:
+            return 0
+        return self._query_cache.save(self._cache_path)
+
+    def close(self) -> None:
+        """Stop the model's background encoder, if it has one."""
+        close = getattr(self._model, "close", None)
+        if callable(close):
+            close()
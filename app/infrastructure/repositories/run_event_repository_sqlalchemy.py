@@ -1,37 +1,113 @@
 import uuid
-from sqlalchemy import select, func
+from sqlalchemy import insert, select, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.domain.chat.entities import RunEvent as DomainRunEvent, RunEventType
 from app.domain.chat.repositories.run_event_repository import RunEventRepository
+from app.domain.chat.services.run_event_bus import RunEventBus
 
 from app.infrastructure.models.run_event import RunEvent
 
+# Retries when two writers race for the same seq (unique (run_id, seq) violation).
+_SEQ_CONFLICT_RETRIES = 5
+
 
 class SqlAlchemyRunEventRepository(RunEventRepository):
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, event_bus: RunEventBus | None = None):
         self.db = db
+        self.event_bus = event_bus
+
+    def append(
+        self, *, run_id: uuid.UUID, type: RunEventType, data: dict, seq: int | None = None
+    ) -> DomainRunEvent:
+        event_id = uuid.uuid4()
+        if seq is not None:
+            seq_value = seq
+        else:
+            # No allocator: compute the next seq inside the INSERT itself.
+            seq_value = (
+                select(func.coalesce(func.max(RunEvent.seq), 0) + 1)
+                .where(RunEvent.run_id == run_id)
+                .scalar_subquery()
+            )
+        stmt = (
+            insert(RunEvent)
+            .values(id=event_id, run_id=run_id, seq=seq_value, type=type, data=data)
+            .returning(RunEvent.seq, RunEvent.created_at)
+        )
+
+        for attempt in range(_SEQ_CONFLICT_RETRIES):
+            try:
+                row = self.db.execute(stmt).one()
+                self.db.commit()
+                break
+            except IntegrityError:
+                self.db.rollback()
+                if seq is not None or attempt == _SEQ_CONFLICT_RETRIES - 1:
+                    raise
+
+        event = DomainRunEvent(
+            id=event_id,
+            run_id=run_id,
+            seq=row.seq,
+            type=type,
+            data=data,
+            created_at=row.created_at,
+        )
+
+        # Publish only after commit so a subscriber can always find the event in the DB.
+        if self.event_bus is not None:
+            self.event_bus.publish(events=[event])
+
+        return event
+
+    def append_many(
+        self,
+        *,
+        run_id: uuid.UUID,
+        events: list[tuple[RunEventType, dict]],
+        first_seq: int | None = None,
+    ) -> list[DomainRunEvent]:
+        if not events:
+            return []
+
+        if first_seq is None:
+            first_seq = self.last_seq(run_id=run_id) + 1
 
-    def append(self, *, run_id: uuid.UUID, type: RunEventType, data: dict) -> DomainRunEvent:
-        # Next seq per run_id (simple approach; OK for technical test)
+        # One multi-row INSERT ... RETURNING + one COMMIT for the whole batch.
+        rows = self.db.scalars(
+            insert(RunEvent).returning(RunEvent, sort_by_parameter_order=True),
+            [
+                {"run_id": run_id, "seq": first_seq + i, "type": type, "data": data}
+                for i, (type, data) in enumerate(events)
+            ],
+        ).all()
+
+        # Map before commit: committing expires the ORM rows and would reload each one.
+        persisted = [
+            DomainRunEvent(
+                id=ev.id,
+                run_id=ev.run_id,
+                seq=ev.seq,
+                type=ev.type,
+                data=ev.data,
+                created_at=ev.created_at,
+            )
+            for ev in rows
+        ]
+        self.db.commit()
+
+        if self.event_bus is not None:
+            self.event_bus.publish(events=persisted)
+
+        return persisted
+
+    def last_seq(self, *, run_id: uuid.UUID) -> int:
         last = self.db.execute(
             select(func.max(RunEvent.seq)).where(RunEvent.run_id == run_id)
         ).scalar_one()
-        seq = int(last or 0) + 1
-
-        ev = RunEvent(run_id=run_id, seq=seq, type=type, data=data)
-        self.db.add(ev)
-        self.db.commit()
-        self.db.refresh(ev)
-
-        return DomainRunEvent(
-            id=ev.id,
-            run_id=ev.run_id,
-            seq=ev.seq,
-            type=ev.type,
-            data=ev.data,
-            created_at=ev.created_at,
-        )
+        return int(last or 0)
 
     def list_after(self, *, run_id: uuid.UUID, after_seq: int) -> list[DomainRunEvent]:
         rows = self.db.execute(
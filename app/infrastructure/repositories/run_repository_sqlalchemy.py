@@ -1,5 +1,6 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from app.domain.chat.entities import Run as DomainRun, RunStatus
@@ -41,6 +42,128 @@ class SqlAlchemyRunRepository(RunRepository):
             error=r.error,
         )
 
+    def list_queued(self, *, limit: int) -> list[DomainRun]:
+        rows = self.db.execute(
+            select(Run)
+            .where(Run.status == RunStatus.queued)
+            .order_by(Run.created_at.asc())
+            .limit(limit)
+        ).scalars().all()
+        return [
+            DomainRun(
+                id=r.id,
+                thread_id=r.thread_id,
+                status=r.status,
+                created_at=r.created_at,
+                started_at=r.started_at,
+                finished_at=r.finished_at,
+                error=r.error,
+            )
+            for r in rows
+        ]
+
+    def claim_run(self, *, run_id: uuid.UUID, worker_id: str | None = None) -> bool:
+        claimed = self.db.execute(
+            update(Run)
+            .where(Run.id == run_id, Run.status == RunStatus.queued)
+            .values(
+                status=RunStatus.running,
+                started_at=datetime.now(timezone.utc),
+                worker_id=worker_id,
+                heartbeat_at=func.now(),
+                attempts=Run.attempts + 1,
+            )
+            .returning(Run.id)
+        ).scalar_one_or_none()
+        self.db.commit()
+        return claimed is not None
+
+    def claim_next(self, *, worker_id: str) -> DomainRun | None:
+        # UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED): concurrent
+        # workers each lock a different queued row instead of waiting on the same one.
+        next_id = (
+            select(Run.id)
+            .where(Run.status == RunStatus.queued)
+            .order_by(Run.created_at.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        r = self.db.execute(
+            update(Run)
+            .where(Run.id == next_id)
+            .values(
+                status=RunStatus.running,
+                started_at=datetime.now(timezone.utc),
+                worker_id=worker_id,
+                heartbeat_at=func.now(),
+                attempts=Run.attempts + 1,
+            )
+            .returning(Run.id, Run.thread_id, Run.status, Run.created_at, Run.started_at, Run.finished_at, Run.error)
+        ).one_or_none()
+        self.db.commit()
+        if r is None:
+            return None
+        return DomainRun(
+            id=r.id,
+            thread_id=r.thread_id,
+            status=r.status,
+            created_at=r.created_at,
+            started_at=r.started_at,
+            finished_at=r.finished_at,
+            error=r.error,
+        )
+
+    def heartbeat(self, *, run_id: uuid.UUID, worker_id: str) -> bool:
+        renewed = self.db.execute(
+            update(Run)
+            .where(Run.id == run_id, Run.worker_id == worker_id, Run.status == RunStatus.running)
+            .values(heartbeat_at=func.now())
+            .returning(Run.id)
+        ).scalar_one_or_none()
+        self.db.commit()
+        return renewed is not None
+
+    def requeue_stale(self, *, stale_after: float, max_attempts: int) -> tuple[int, int]:
+        # Compared against the DB clock, so workers with skewed clocks agree on staleness.
+        stale = (
+            (Run.status == RunStatus.running)
+            & Run.heartbeat_at.is_not(None)
+            & (Run.heartbeat_at < func.now() - timedelta(seconds=stale_after))
+        )
+        failed = self.db.execute(
+            update(Run)
+            .where(stale, Run.attempts >= max_attempts)
+            .values(
+                status=RunStatus.error,
+                finished_at=datetime.now(timezone.utc),
+                error=f"Run abandoned after {max_attempts} attempts (worker stopped heartbeating)",
+                worker_id=None,
+            )
+            .returning(Run.id)
+        ).scalars().all()
+        requeued = self.db.execute(
+            update(Run)
+            .where(stale)
+            .values(status=RunStatus.queued, worker_id=None, heartbeat_at=None)
+            .returning(Run.id)
+        ).scalars().all()
+        self.db.commit()
+        return len(requeued), len(failed)
+
+    def release_claimed(self, *, worker_id: str) -> int:
+        released = self.db.execute(
+            update(Run)
+            .where(Run.worker_id == worker_id, Run.status == RunStatus.running)
+            .values(status=RunStatus.queued, worker_id=None, heartbeat_at=None)
+            .returning(Run.id)
+        ).scalars().all()
+        self.db.commit()
+        return len(released)
+
+    def get_status(self, *, run_id: uuid.UUID) -> RunStatus | None:
+        return self.db.execute(select(Run.status).where(Run.id == run_id)).scalar_one_or_none()
+
     def set_status(self, *, run_id: uuid.UUID, status: RunStatus, error: str | None = None) -> None:
         r = self.db.get(Run, run_id)
         if not r:
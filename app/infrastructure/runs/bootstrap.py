@@ -0,0 +1,209 @@
+"""
+Service construction shared by the API lifespan (app.main) and the run worker
+(app.worker), so both processes build the RAG service, LLM client and run
+signals from the same environment variables.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.application.chat.cancellation import CancellationRegistry, RunCanceller
+from app.domain.chat.services.llm_chat_service import LLMChatService
+from app.domain.chat.services.run_metrics import RunMetrics
+from app.domain.chat.services.run_event_bus import RunEventBus
+from app.infrastructure.rag.rag_chat_service import RagChatService
+
+if TYPE_CHECKING:
+    import httpx
+
+    from app.infrastructure.events.pg_listener import PostgresNotifyListener
+    from app.infrastructure.runs.rag_run_launcher import RagRunLauncher
+
+# Workers LISTEN here to pick up a new run without waiting for their next poll.
+RUN_QUEUED_CHANNEL = "run_queued"
+
+
+def load_rag_service() -> RagChatService:
+    from rag.cache import QueryEmbeddingCache, SearchResultCache
+    from rag.embedding_backend import embedder_id, load_embedder
+    from rag.micro_batch import wrap_model
+    from rag.retrieval import load_index
+
+    index_dir = Path(os.getenv("RAG_STORE_DIR", "rag_store"))
+    embedding_model_name = os.getenv("EMBEDDING_MODEL", "intfloat/multilingual-e5-small")
+    # torch (SentenceTransformer) | onnx | onnx-int8 (ONNX Runtime, exported once under EMBEDDING_ONNX_DIR)
+    embedding_backend = os.getenv("EMBEDDING_BACKEND", "torch")
+    onnx_dir = os.getenv("EMBEDDING_ONNX_DIR") or None
+
+    print(f"[startup] Loading embedding model: {embedding_model_name} ({embedding_backend})")
+    model = load_embedder(
+        embedding_model_name,
+        embedding_backend,
+        onnx_dir=Path(onnx_dir) if onnx_dir else index_dir / "onnx",
+    )
+    # Concurrent runs share one forward pass: query encodes arriving within QUERY_BATCH_WAIT_MS
+    # (up to QUERY_BATCH_MAX texts) are batched together. QUERY_BATCH_WAIT_MS=0 disables it.
+    batch_wait_ms = float(os.getenv("QUERY_BATCH_WAIT_MS", "3"))
+    batch_max = int(os.getenv("QUERY_BATCH_MAX", "32"))
+    model = wrap_model(model, max_batch=batch_max, max_wait_s=batch_wait_ms / 1000.0)
+    if batch_wait_ms > 0:
+        print(f"[startup] Query micro-batching: {batch_wait_ms:g} ms window | max {batch_max} texts")
+
+    print(f"[startup] Loading RAG index from: {index_dir}")
+    # Override the nprobe / efSearch stored in the manifest of an approximate FAISS index.
+    # RAG_MMAP=1 maps the index files instead of reading them, shared by all workers.
+    index_data = load_index(
+        index_dir,
+        nprobe=int(os.getenv("FAISS_NPROBE", "0")) or None,
+        ef_search=int(os.getenv("FAISS_EF_SEARCH", "0")) or None,
+        mmap=os.getenv("RAG_MMAP", "1") == "1",
+    )
+    print(f"[startup] FAISS index: {index_data['faiss_params']}")
+
+    # Query embedding cache (QUERY_CACHE_SIZE=0 disables it).
+    query_cache = None
+    cache_size = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    if cache_size > 0:
+        ttl = float(os.getenv("QUERY_CACHE_TTL_S", "86400"))
+        query_cache = QueryEmbeddingCache(
+            model_name=embedder_id(embedding_model_name, embedding_backend),
+            max_entries=cache_size,
+            ttl_seconds=ttl if ttl > 0 else None,
+        )
+    cache_path = os.getenv("QUERY_CACHE_PATH") or None
+
+    # Full search result cache (SEARCH_CACHE_SIZE=0 disables it).
+    result_cache = None
+    result_cache_size = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+    if result_cache_size > 0:
+        ttl = float(os.getenv("SEARCH_CACHE_TTL_S", "600"))
+        result_cache = SearchResultCache(max_entries=result_cache_size, ttl_seconds=ttl if ttl > 0 else None)
+
+    service = RagChatService(
+        index_data=index_data,
+        model=model,
+        query_cache=query_cache,
+        cache_path=Path(cache_path) if cache_path else None,
+        result_cache=result_cache,
+    )
+    if query_cache is not None:
+        print(f"[startup] Query embedding cache: {query_cache.stats()['size']}/{cache_size} entries")
+    return service
+
+
+def load_llm_service(
+    *,
+    http_client: httpx.Client | None = None,
+    async_http_client: httpx.AsyncClient | None = None,
+) -> LLMChatService:
+    from app.infrastructure.llm.anthropic_chat import AnthropicChatService
+    from app.infrastructure.llm.gemini_chat import GeminiChatService
+
+    provider = os.getenv("LLM_PROVIDER", "anthropic").lower()
+    if provider == "anthropic":
+        return AnthropicChatService(
+            api_key=os.environ["ANTHROPIC_API_KEY"],
+            model=os.getenv("ANTHROPIC_TEXT_MODEL", "claude-3-haiku-20240307"),
+            http_client=http_client,
+            async_http_client=async_http_client,
+        )
+    if provider == "google":
+        return GeminiChatService(
+            api_key=os.environ["GEMINI_API_KEY"],
+            model=os.getenv("GEMINI_TEXT_MODEL", "models/gemini-2.0-flash"),
+            http_client=http_client,
+            async_http_client=async_http_client,
+        )
+    raise ValueError(f"Unsupported LLM_PROVIDER: {provider!r}. Use 'anthropic' or 'google'.")
+
+
+@dataclass
+class RunSignals:
+    """
+    Run event fan-out and cancellation for this process.
+
+    cancellations holds the tokens of the runs executing here; canceller is what
+    CancelRunUseCase calls (the registry itself, or a NOTIFY-backed canceller
+    that also reaches other processes).
+    """
+
+    backend: str
+    event_bus: RunEventBus
+    cancellations: CancellationRegistry
+    canceller: RunCanceller
+    listener: PostgresNotifyListener | None = None
+
+    def notify_queued(self, *, run_id: uuid.UUID) -> None:
+        if self.listener is not None:
+            self.listener.notify(RUN_QUEUED_CHANNEL, str(run_id))
+
+    def close(self) -> None:
+        self.event_bus.close()
+
+
+def build_run_signals(backend: str, *, on_run_queued: Callable[[str], None] | None = None) -> RunSignals:
+    """
+    backend: memory (single process) | postgres (LISTEN/NOTIFY across processes).
+    on_run_queued is only honoured by the postgres backend.
+    """
+    cancellations = CancellationRegistry()
+
+    if backend == "memory":
+        from app.infrastructure.events.in_memory_bus import InMemoryRunEventBus
+
+        return RunSignals(
+            backend=backend,
+            event_bus=InMemoryRunEventBus(),
+            cancellations=cancellations,
+            canceller=cancellations,
+        )
+
+    if backend == "postgres":
+        from app.infrastructure.events.pg_listener import PostgresNotifyListener, dsn_from_database_url
+        from app.infrastructure.events.postgres_bus import PostgresRunEventBus
+        from app.infrastructure.events.postgres_canceller import PostgresRunCanceller
+
+        # One LISTEN connection carries run events, cancellations and queue wake-ups.
+        listener = PostgresNotifyListener(dsn=dsn_from_database_url(os.environ["DATABASE_URL"]))
+        signals = RunSignals(
+            backend=backend,
+            event_bus=PostgresRunEventBus(listener=listener),
+            cancellations=cancellations,
+            canceller=PostgresRunCanceller(registry=cancellations, listener=listener),
+            listener=listener,
+        )
+        if on_run_queued is not None:
+            listener.add_handler(RUN_QUEUED_CHANNEL, on_run_queued)
+        listener.start()
+        return signals
+
+    raise ValueError(f"Unsupported RUN_EVENT_BUS: {backend!r}. Use 'memory' or 'postgres'.")
+
+
+def build_run_launcher(
+    *,
+    rag_service: RagChatService,
+    llm_service: LLMChatService,
+    signals: RunSignals,
+    worker_id: str | None = None,
+    metrics: RunMetrics | None = None,
+) -> RagRunLauncher:
+    from app.infrastructure.runs.rag_run_launcher import RagRunLauncher
+
+    return RagRunLauncher(
+        rag_service=rag_service,
+        llm_service=llm_service,
+        event_bus=signals.event_bus,
+        cancellations=signals.cancellations,
+        history_turns=int(os.getenv("CHAT_HISTORY_TURNS", "6")),
+        event_batch_size=int(os.getenv("RUN_EVENT_BATCH_SIZE", "32")),
+        event_flush_interval=float(os.getenv("RUN_EVENT_FLUSH_MS", "25")) / 1000.0,
+        worker_id=worker_id,
+        heartbeat_interval=float(os.getenv("RUN_HEARTBEAT_S", "10")),
+        metrics=metrics,
+    )
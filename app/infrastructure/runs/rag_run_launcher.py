@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.application.chat.cancellation import LEASE_LOST, CancellationRegistry
+from app.application.chat.rag_run_executor import RagRunExecutor
+from app.application.chat.run_heartbeat import RunHeartbeat
+from app.domain.chat.services.llm_chat_service import LLMChatService
+from app.domain.chat.services.run_metrics import RunMetrics
+from app.domain.chat.services.run_event_bus import RunEventBus
+from app.infrastructure.db.session import SessionLocal
+from app.infrastructure.rag.rag_chat_service import RagChatService
+from app.infrastructure.repositories.run_event_repository_sqlalchemy import SqlAlchemyRunEventRepository
+from app.infrastructure.repositories.run_repository_sqlalchemy import SqlAlchemyRunRepository
+from app.infrastructure.repositories.thread_repository_sqlalchemy import SqlAlchemyThreadRepository
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id(prefix: str) -> str:
+    return f"{prefix}:{socket.gethostname()}:{os.getpid()}"
+
+
+class RagRunLauncher:
+    """
+    Executes one queued run end to end with its own DB session.
+
+    Holds the long-lived services (RAG index, LLM client, event bus, cancellation
+    registry) so the scheduler only has to pass (run_id, thread_id) to arun(), and
+    workers only have to call run_next().
+
+    Claimed runs are leased to worker_id and heartbeated every heartbeat_interval
+    seconds while they execute, so a run whose process dies is requeued. A run
+    whose lease is lost is canceled here (LEASE_LOST) and stops without writing.
+    """
+
+    def __init__(
+        self,
+        *,
+        rag_service: RagChatService,
+        llm_service: LLMChatService,
+        event_bus: RunEventBus | None,
+        cancellations: CancellationRegistry,
+        history_turns: int = 6,
+        event_batch_size: int = 32,
+        event_flush_interval: float = 0.025,
+        worker_id: str | None = None,
+        heartbeat_interval: float = 10.0,
+        metrics: RunMetrics | None = None,
+    ):
+        self.rag_service = rag_service
+        self.llm_service = llm_service
+        self.event_bus = event_bus
+        self.cancellations = cancellations
+        self.history_turns = history_turns
+        self.event_batch_size = event_batch_size
+        self.event_flush_interval = event_flush_interval
+        self.worker_id = worker_id or default_worker_id("api")
+        self.heartbeat_interval = heartbeat_interval
+        self.metrics = metrics
+
+    def __call__(self, run_id: uuid.UUID, thread_id: uuid.UUID) -> None:
+        db = SessionLocal()
+        try:
+            run_repo = SqlAlchemyRunRepository(db)
+            # Skips runs canceled while queued, or already taken by another process.
+            if not run_repo.claim_run(run_id=run_id, worker_id=self.worker_id):
+                logger.info("[run:%s] not queued anymore, skipping", run_id)
+                return
+            self._execute(db, run_id=run_id, thread_id=thread_id)
+        finally:
+            db.close()
+
+    async def arun(self, run_id: uuid.UUID, thread_id: uuid.UUID) -> None:
+        """asyncio version of __call__, for the scheduler: streams with RagRunExecutor.astart()."""
+        db = SessionLocal()
+        try:
+            run_repo = SqlAlchemyRunRepository(db)
+            if not await asyncio.to_thread(run_repo.claim_run, run_id=run_id, worker_id=self.worker_id):
+                logger.info("[run:%s] not queued anymore, skipping", run_id)
+                return
+            async with self._heartbeat_for(run_id):
+                await self.executor(db).astart(thread_id=thread_id, run_id=run_id)
+        finally:
+            await asyncio.to_thread(db.close)
+
+    def run_next(self) -> bool:
+        """Claim and execute the oldest queued run. False if nothing was queued."""
+        db = SessionLocal()
+        try:
+            run = SqlAlchemyRunRepository(db).claim_next(worker_id=self.worker_id)
+            if run is None:
+                return False
+            logger.info("[run:%s] claimed by %s", run.id, self.worker_id)
+            self._execute(db, run_id=run.id, thread_id=run.thread_id)
+            return True
+        finally:
+            db.close()
+
+    def release_claimed(self) -> int:
+        """Requeue the runs this process still holds (on shutdown). Returns how many."""
+        db = SessionLocal()
+        try:
+            return SqlAlchemyRunRepository(db).release_claimed(worker_id=self.worker_id)
+        finally:
+            db.close()
+
+    def _execute(self, db: Session, *, run_id: uuid.UUID, thread_id: uuid.UUID) -> None:
+        with self._heartbeat_for(run_id):
+            self.executor(db).start(thread_id=thread_id, run_id=run_id)
+
+    def _heartbeat_for(self, run_id: uuid.UUID) -> RunHeartbeat:
+        # Losing the lease stops the executor: another worker may be running the requeued run.
+        return RunHeartbeat(
+            run_id=run_id,
+            beat=lambda: self._heartbeat(run_id),
+            interval=self.heartbeat_interval,
+            on_lost=lambda: self.cancellations.cancel(run_id=run_id, reason=LEASE_LOST),
+        )
+
+    def _heartbeat(self, run_id: uuid.UUID) -> bool:
+        # Own short session: the executor's session belongs to the executing thread.
+        db = SessionLocal()
+        try:
+            return SqlAlchemyRunRepository(db).heartbeat(run_id=run_id, worker_id=self.worker_id)
+        finally:
+            db.close()
+
+    def executor(self, db: Session) -> RagRunExecutor:
+        return RagRunExecutor(
+            run_repo=SqlAlchemyRunRepository(db),
+            event_repo=SqlAlchemyRunEventRepository(db, event_bus=self.event_bus),
+            thread_repo=SqlAlchemyThreadRepository(db),
+            rag_service=self.rag_service,
+            llm_service=self.llm_service,
+            history_turns=self.history_turns,
+            event_batch_size=self.event_batch_size,
+            event_flush_interval=self.event_flush_interval,
+            cancellations=self.cancellations,
+            metrics=self.metrics,
+        )
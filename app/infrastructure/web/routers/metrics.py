@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+from app.infrastructure.metrics.prometheus_run_metrics import PrometheusRunMetrics
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+def get_metrics(request: Request):
+    """Prometheus scrape endpoint: retrieval stage and run timings of the runs executed by this process."""
+    metrics: PrometheusRunMetrics = request.app.state.run_metrics
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,51 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+
+from app.infrastructure.rag.rag_chat_service import RagChatService
+
+
+router = APIRouter(tags=["rag"])
+
+
+def get_rag_service(request: Request) -> RagChatService:
+    rag_service: RagChatService | None = request.app.state.rag_service
+    if rag_service is None:
+        raise HTTPException(status_code=404, detail="RAG runs in the workers (RUN_EXECUTION=worker)")
+    return rag_service
+
+
+@router.get("/rag/cache")
+def get_rag_cache_stats(request: Request):
+    return get_rag_service(request).cache_stats()
+
+
+class SearchBatchBody(BaseModel):
+    queries: list[str] = Field(min_length=1, max_length=500)
+    topk: int = Field(default=5, ge=1, le=50)
+    mode: Literal["faiss", "bm25", "hybrid", "reranked"] = "hybrid"
+
+
+@router.post("/rag/search/batch")
+def search_batch(body: SearchBatchBody, request: Request):
+    """Bulk search, e.g. screening a list of job requirements against the CVs."""
+    outs = get_rag_service(request).search_batch(body.queries, topk=body.topk, mode=body.mode)
+    return {
+        "results": [
+            {
+                "query": out["query"],
+                "hits": [
+                    {
+                        "cv_id": r["cv_id"],
+                        "chunk_id": r["chunk_id"],
+                        "chunk_index": r["chunk_index"],
+                        "score": r["score"],
+                        "text": r["text"],
+                    }
+                    for r in out["results"]
+                ],
+            }
+            for out in outs
+        ]
+    }
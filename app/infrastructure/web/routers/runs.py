@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.domain.chat.entities import RunEvent
+from app.domain.chat.services.run_event_bus import RunEventBus
 from app.infrastructure.db.session import SessionLocal
 from app.infrastructure.repositories.run_repository_sqlalchemy import SqlAlchemyRunRepository
 from app.infrastructure.repositories.run_event_repository_sqlalchemy import SqlAlchemyRunEventRepository
@@ -34,6 +36,21 @@ def sse_frame(*, data: dict, event: str | None = None, event_id: int | None = No
     return msg
 
 
+# Declared before /runs/{run_id} so "scheduler" is not parsed as a run id.
+@router.get("/runs/scheduler")
+def get_scheduler_stats(request: Request):
+    scheduler = request.app.state.run_scheduler
+    if scheduler is None:
+        raise HTTPException(status_code=404, detail="Runs are executed by workers (RUN_EXECUTION=worker)")
+    stats = scheduler.stats()
+    return {
+        "running": stats.running,
+        "queued": stats.queued,
+        "max_concurrency": stats.max_concurrency,
+        "max_queue": stats.max_queue,
+    }
+
+
 @router.get("/runs/{run_id}")
 def get_run(run_id: uuid.UUID, db: Session = Depends(get_db)):
     run_repo = SqlAlchemyRunRepository(db)
@@ -56,9 +73,9 @@ def get_run(run_id: uuid.UUID, db: Session = Depends(get_db)):
 
 
 @router.post("/runs/{run_id}/cancel")
-def cancel_run(run_id: uuid.UUID, db: Session = Depends(get_db)):
+def cancel_run(run_id: uuid.UUID, request: Request, db: Session = Depends(get_db)):
     run_repo = SqlAlchemyRunRepository(db)
-    uc = CancelRunUseCase(run_repo)
+    uc = CancelRunUseCase(run_repo, canceller=request.app.state.run_canceller)
 
     try:
         result = uc.execute(run_id=run_id)
@@ -68,52 +85,100 @@ def cancel_run(run_id: uuid.UUID, db: Session = Depends(get_db)):
     return {"ok": True, "status": result.status}
 
 
+_TERMINAL_STATUSES = ("done", "error", "canceled")
+
+
+def _terminal_status(ev: RunEvent) -> str | None:
+    """Status that ends the stream, if this event is the last one a run emits."""
+    if ev.type.value == "state" and ev.data.get("status") in _TERMINAL_STATUSES:
+        return ev.data["status"]
+    if ev.type.value in ("error", "canceled"):
+        return ev.type.value
+    return None
+
+
+def _replay(run_id: uuid.UUID, after_seq: int) -> tuple[str | None, list[RunEvent]]:
+    """Read run status + persisted events after after_seq (short-lived session)."""
+    db = SessionLocal()
+    try:
+        run = SqlAlchemyRunRepository(db).get_run(run_id=run_id)
+        if not run:
+            return None, []
+        events = SqlAlchemyRunEventRepository(db).list_after(run_id=run_id, after_seq=after_seq)
+        return run.status.value, events
+    finally:
+        db.close()
+
+
 @router.get("/runs/{run_id}/events")
 def stream_run_events(run_id: uuid.UUID, request: Request):
     last_event_id = request.headers.get("Last-Event-ID")
     after_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    event_bus: RunEventBus = request.app.state.event_bus
 
     async def gen():
         nonlocal after_seq
         yield ": connected\n\n"
 
-        poll_every = 0.35
+        wait_every = 1.0
         heartbeat_every = 15.0
-        last_heartbeat = asyncio.get_event_loop().time()
-
-        while True:
-            if await request.is_disconnected():
+        # Bounded staleness: if the bus is silent for this long, re-check the DB
+        # (covers runs canceled before starting and notifications lost between workers).
+        resync_every = 10.0
+        loop = asyncio.get_running_loop()
+        last_heartbeat = last_activity = loop.time()
+
+        # Subscribe before the catch-up replay so no event falls between the two.
+        subscription = event_bus.subscribe(run_id=run_id)
+        try:
+            status, events = await asyncio.to_thread(_replay, run_id, after_seq)
+            if status is None:
+                yield sse_frame(event="error", event_id=after_seq + 1, data={"error": "Run not found"})
                 return
 
-            # short-lived db session per poll
-            db = SessionLocal()
-            try:
-                run_repo = SqlAlchemyRunRepository(db)
-                event_repo = SqlAlchemyRunEventRepository(db)
-
-                run = run_repo.get_run(run_id=run_id)
-                if not run:
-                    yield sse_frame(event="error", event_id=after_seq + 1, data={"error": "Run not found"})
-                    return
-
-                events = event_repo.list_after(run_id=run_id, after_seq=after_seq)
-                for ev in events:
+            pending = events
+            while True:
+                for ev in pending:
+                    if ev.seq <= after_seq:
+                        continue  # already sent (replay and live feed overlap)
+                    if ev.seq > after_seq + 1:
+                        # Gap in the live feed: fill it from the DB, then drop the overlap.
+                        _, missing = await asyncio.to_thread(_replay, run_id, after_seq)
+                        for m in missing:
+                            if m.seq > after_seq and m.seq < ev.seq:
+                                after_seq = m.seq
+                                yield sse_frame(event=m.type.value, event_id=m.seq, data=m.data)
+                                if _terminal_status(m):
+                                    status = _terminal_status(m)
                     after_seq = ev.seq
                     yield sse_frame(event=ev.type.value, event_id=ev.seq, data=ev.data)
+                    if _terminal_status(ev):
+                        status = _terminal_status(ev)
 
-                if run.status.value in ("done", "error", "canceled"):
-                    yield sse_frame(event="done", event_id=after_seq + 1, data={"status": run.status.value})
+                if status in _TERMINAL_STATUSES:
+                    yield sse_frame(event="done", event_id=after_seq + 1, data={"status": status})
                     return
 
-            finally:
-                db.close()
-
-            now = asyncio.get_event_loop().time()
-            if now - last_heartbeat >= heartbeat_every:
-                last_heartbeat = now
-                yield ": ping\n\n"
+                if await request.is_disconnected():
+                    return
 
-            await asyncio.sleep(poll_every)
+                pending = await subscription.get(timeout=wait_every)
+                now = loop.time()
+                if pending:
+                    last_activity = now
+                    continue
+
+                if now - last_activity >= resync_every:
+                    last_activity = now
+                    status, pending = await asyncio.to_thread(_replay, run_id, after_seq)
+                    if status is None:
+                        return
+
+                if now - last_heartbeat >= heartbeat_every:
+                    last_heartbeat = now
+                    yield ": ping\n\n"
+        finally:
+            subscription.close()
 
     return StreamingResponse(
         gen(),
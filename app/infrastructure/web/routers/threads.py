@@ -1,17 +1,21 @@
+import logging
 import uuid
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.infrastructure.db.session import SessionLocal
 from app.infrastructure.repositories.thread_repository_sqlalchemy import SqlAlchemyThreadRepository
 from app.infrastructure.repositories.run_repository_sqlalchemy import SqlAlchemyRunRepository
-from app.infrastructure.repositories.run_event_repository_sqlalchemy import SqlAlchemyRunEventRepository
 
 from app.application.chat.create_thread import CreateThreadUseCase
 from app.application.chat.get_thread import GetThreadUseCase
 from app.application.chat.post_message_create_run import PostMessageCreateRunUseCase
-from app.application.chat.rag_run_executor import RagRunExecutor
+from app.application.chat.run_scheduler import RunScheduler
+from app.application.errors import RunQueueFullError
+from app.domain.chat.entities import RunStatus
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["threads"])
 
@@ -65,10 +69,15 @@ class PostMessageBody(BaseModel):
 def post_message_create_run(
     thread_id: uuid.UUID,
     body: PostMessageBody,
-    background: BackgroundTasks,
     request: Request,
     db: Session = Depends(get_db),
 ):
+    scheduler: RunScheduler | None = request.app.state.run_scheduler
+
+    # Backpressure: refuse before storing the message if no run can be queued.
+    if scheduler is not None and not scheduler.has_capacity():
+        raise HTTPException(status_code=429, detail="Too many runs in progress, retry later", headers={"Retry-After": "5"})
+
     thread_repo = SqlAlchemyThreadRepository(db)
     run_repo = SqlAlchemyRunRepository(db)
 
@@ -81,30 +90,19 @@ def post_message_create_run(
 
     run_id_uuid = uuid.UUID(result.run_id)
 
-    # Capture app.state references before the request context closes.
-    rag_service = request.app.state.rag_service
-    llm_service = request.app.state.llm_service
-    history_turns = request.app.state.history_turns
-
-    # IMPORTANT: background execution must use a NEW db session.
-    def run_in_background(run_id: uuid.UUID, thread_id: uuid.UUID):
-        bg_db = SessionLocal()
+    if scheduler is None:
+        # RUN_EXECUTION=worker: the row is the job; wake a worker instead of waiting for its poll.
         try:
-            bg_run_repo = SqlAlchemyRunRepository(bg_db)
-            bg_event_repo = SqlAlchemyRunEventRepository(bg_db)
-            bg_thread_repo = SqlAlchemyThreadRepository(bg_db)
-            executor = RagRunExecutor(
-                run_repo=bg_run_repo,
-                event_repo=bg_event_repo,
-                thread_repo=bg_thread_repo,
-                rag_service=rag_service,
-                llm_service=llm_service,
-                history_turns=history_turns,
-            )
-            executor.start(thread_id=thread_id, run_id=run_id)
-        finally:
-            bg_db.close()
-
-    background.add_task(run_in_background, run_id_uuid, thread_id)
-
-    return {"run_id": result.run_id}
+            request.app.state.run_signals.notify_queued(run_id=run_id_uuid)
+        except Exception as e:
+            logger.warning("[run:%s] queued notification failed: %s", run_id_uuid, e)
+        return {"run_id": result.run_id, "queue_position": None}
+
+    try:
+        position = scheduler.submit(run_id=run_id_uuid, thread_id=thread_id)
+    except RunQueueFullError as e:
+        # Lost the race for the last slot: don't leave a queued run nobody will execute.
+        run_repo.set_status(run_id=run_id_uuid, status=RunStatus.error, error=str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    return {"run_id": result.run_id, "queue_position": position}
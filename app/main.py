@@ -3,7 +3,6 @@ from __future__ import annotations
 import logging
 import os
 from contextlib import asynccontextmanager
-from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -17,54 +16,119 @@ logging.basicConfig(
 from app.infrastructure.web.routers.threads import router as threads_router
 from app.infrastructure.web.routers.runs import router as runs_router
 from app.infrastructure.web.routers.users import router as users_router
+from app.infrastructure.web.routers.rag import router as rag_router
+from app.infrastructure.web.routers.metrics import router as metrics_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Load the RAG index and embedding model once at startup.
-    Both are stored in app.state so background tasks can reuse them
+    Both are stored in app.state so the run scheduler can reuse them
     without reloading on every request.
-    """
-    from sentence_transformers import SentenceTransformer
-    from rag.retrieval import load_index
-    from app.infrastructure.rag.rag_chat_service import RagChatService
-    from app.infrastructure.llm.anthropic_chat import AnthropicChatService
-    from app.infrastructure.llm.gemini_chat import GeminiChatService
-
-    index_dir = Path(os.getenv("RAG_STORE_DIR", "rag_store"))
-    embedding_model_name = os.getenv("EMBEDDING_MODEL", "intfloat/multilingual-e5-small")
-
-    print(f"[startup] Loading embedding model: {embedding_model_name}")
-    model = SentenceTransformer(embedding_model_name)
-
-    print(f"[startup] Loading RAG index from: {index_dir}")
-    index_data = load_index(index_dir)
-
-    app.state.rag_service = RagChatService(index_data=index_data, model=model)
 
-    provider = os.getenv("LLM_PROVIDER", "anthropic").lower()
-    if provider == "anthropic":
-        app.state.llm_service = AnthropicChatService(
-            api_key=os.environ["ANTHROPIC_API_KEY"],
-            model=os.getenv("ANTHROPIC_TEXT_MODEL", "claude-3-haiku-20240307"),
+    With RUN_EXECUTION=worker runs are executed by `python -m app.worker`
+    processes instead, and the API neither loads them nor runs a scheduler.
+    """
+    from app.application.chat.run_scheduler import RunScheduler
+    from app.infrastructure.db.session import SessionLocal
+    from app.infrastructure.llm.http_clients import create_llm_async_http_client
+    from app.infrastructure.metrics.prometheus_run_metrics import PrometheusRunMetrics
+    from app.infrastructure.repositories.run_repository_sqlalchemy import SqlAlchemyRunRepository
+    from app.infrastructure.runs.bootstrap import (
+        build_run_launcher,
+        build_run_signals,
+        load_llm_service,
+        load_rag_service,
+    )
+
+    execution = os.getenv("RUN_EXECUTION", "api").lower()
+    event_bus_backend = os.getenv("RUN_EVENT_BUS", "memory").lower()
+    if execution not in ("api", "worker"):
+        raise ValueError(f"Unsupported RUN_EXECUTION: {execution!r}. Use 'api' or 'worker'.")
+    if execution == "worker" and event_bus_backend != "postgres":
+        raise ValueError(f"Unsupported RUN_EVENT_BUS with RUN_EXECUTION=worker: {event_bus_backend!r}. Use 'postgres'.")
+
+    # Push-based SSE: executors publish persisted run events, SSE generators subscribe.
+    # Cancellation: executors register a token per run, CancelRunUseCase signals it.
+    signals = build_run_signals(event_bus_backend)
+    app.state.run_signals = signals
+    app.state.event_bus = signals.event_bus
+    app.state.cancellations = signals.cancellations
+    app.state.run_canceller = signals.canceller
+    # Timings of the runs executed by this process, scraped at GET /api/metrics.
+    app.state.run_metrics = PrometheusRunMetrics()
+    app.state.run_scheduler = None
+    app.state.rag_service = None
+    app.state.llm_http_client = None
+
+    if execution == "api":
+        app.state.rag_service = load_rag_service()
+        # One pooled HTTP/2 client for every LLM stream of this process.
+        app.state.llm_http_client = create_llm_async_http_client()
+        app.state.llm_service = load_llm_service(async_http_client=app.state.llm_http_client)
+
+        # Runs execute as tasks on the event loop (LLM streams via astream()), bounded by
+        # RUN_MAX_CONCURRENCY; blocking DB/RAG calls go to worker threads, never to the
+        # API request threadpool.
+        app.state.run_launcher = build_run_launcher(
+            rag_service=app.state.rag_service,
+            llm_service=app.state.llm_service,
+            signals=signals,
+            metrics=app.state.run_metrics,
+        )
+        app.state.run_scheduler = RunScheduler(
+            run_fn=app.state.run_launcher.arun,
+            max_concurrency=int(os.getenv("RUN_MAX_CONCURRENCY", "4")),
+            max_queue=int(os.getenv("RUN_MAX_QUEUE", "100")),
         )
-    elif provider == "google":
-        app.state.llm_service = GeminiChatService(
-            api_key=os.environ["GEMINI_API_KEY"],
-            model=os.getenv("GEMINI_TEXT_MODEL", "models/gemini-2.0-flash"),
+        await app.state.run_scheduler.start()
+
+        # Pick up runs left queued (or left running without heartbeat) by a previous process.
+        db = SessionLocal()
+        try:
+            run_repo = SqlAlchemyRunRepository(db)
+            run_repo.requeue_stale(
+                stale_after=float(os.getenv("RUN_STALE_AFTER_S", "60")),
+                max_attempts=int(os.getenv("RUN_MAX_ATTEMPTS", "3")),
+            )
+            leftover = run_repo.list_queued(limit=app.state.run_scheduler.max_queue)
+        finally:
+            db.close()
+        for run in leftover:
+            app.state.run_scheduler.submit(run_id=run.id, thread_id=run.thread_id)
+
+        print(
+            f"[startup] Run scheduler: max concurrency={app.state.run_scheduler.max_concurrency} "
+            f"| max queue={app.state.run_scheduler.max_queue} | resumed {len(leftover)} queued runs"
         )
+        print(f"[startup] LLM provider: {os.getenv('LLM_PROVIDER', 'anthropic').lower()}")
     else:
-        raise ValueError(f"Unsupported LLM_PROVIDER: {provider!r}. Use 'anthropic' or 'google'.")
+        print("[startup] Runs are executed by app.worker processes.")
 
-    app.state.history_turns = int(os.getenv("CHAT_HISTORY_TURNS", "6"))
-
-    print(f"[startup] LLM provider: {provider} | history turns: {app.state.history_turns}")
+    print(f"[startup] Run execution: {execution} | event bus: {event_bus_backend}")
     print("[startup] Ready.")
 
     yield
 
+    if app.state.run_scheduler is not None:
+        print("[shutdown] Stopping run scheduler.")
+        await app.state.run_scheduler.stop()
+        # Runs in flight still have a fresh heartbeat: requeue them now, or a restart
+        # within RUN_STALE_AFTER_S would leave them running with nobody executing them.
+        released = app.state.run_launcher.release_claimed()
+        if released:
+            print(f"[shutdown] Requeued {released} runs in flight.")
+
     print("[shutdown] Releasing RAG resources.")
+    if execution == "api":
+        saved = app.state.rag_service.save_cache()
+        if saved:
+            print(f"[shutdown] Saved {saved} cached query embeddings.")
+        app.state.rag_service.close()
+    if app.state.llm_http_client is not None:
+        await app.state.llm_http_client.aclose()
+    signals.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -72,6 +136,8 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(threads_router, prefix="/api")
 app.include_router(runs_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
+app.include_router(rag_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
 
 # Serve generated CV files (HTML + PDF) so the frontend can link to them.
 # Accessible at /cvs/{cv_id}/cv.pdf and /cvs/{cv_id}/cv.html
@@ -0,0 +1,111 @@
+"""
+Run worker: executes queued runs outside the API process.
+
+    python -m app.worker [--concurrency N]
+
+Claims queued runs from the runs table with SELECT ... FOR UPDATE SKIP LOCKED,
+so any number of worker processes (on any node) can share the queue, and
+heartbeats each run it executes so runs of a dead worker are requeued.
+Requires RUN_EVENT_BUS=postgres: run events reach the API's SSE streams and
+cancellations reach the worker through LISTEN/NOTIFY.
+Run the API with RUN_EXECUTION=worker so it only enqueues.
+With --metrics_port the worker serves its run timings to Prometheus at :PORT/metrics.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s | %(message)s",
+    datefmt="%H:%M:%S",
+)
+
+from app.application.chat.run_worker import RunWorker
+from app.infrastructure.db.session import SessionLocal
+from app.infrastructure.llm.http_clients import create_llm_http_client
+from app.infrastructure.metrics.prometheus_run_metrics import PrometheusRunMetrics
+from app.infrastructure.repositories.run_repository_sqlalchemy import SqlAlchemyRunRepository
+from app.infrastructure.runs.bootstrap import build_run_launcher, build_run_signals, load_llm_service, load_rag_service
+from app.infrastructure.runs.rag_run_launcher import default_worker_id
+
+
+def requeue_stale(*, stale_after: float, max_attempts: int) -> tuple[int, int]:
+    db = SessionLocal()
+    try:
+        return SqlAlchemyRunRepository(db).requeue_stale(stale_after=stale_after, max_attempts=max_attempts)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Execute queued chat runs")
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("RUN_WORKER_CONCURRENCY", "2")),
+                    help="Runs executed at the same time by this process")
+    ap.add_argument("--poll_interval", type=float, default=2.0,
+                    help="Seconds between queue polls when no NOTIFY arrives")
+    ap.add_argument("--stale_after", type=float, default=float(os.getenv("RUN_STALE_AFTER_S", "60")),
+                    help="Seconds without heartbeat before a running run is requeued")
+    ap.add_argument("--max_attempts", type=int, default=int(os.getenv("RUN_MAX_ATTEMPTS", "3")),
+                    help="Executions of a run before it is marked as error instead of requeued")
+    ap.add_argument("--metrics_port", type=int, default=int(os.getenv("RUN_WORKER_METRICS_PORT", "0")),
+                    help="Port of the Prometheus /metrics endpoint of this worker (0 = off)")
+    args = ap.parse_args()
+
+    backend = os.getenv("RUN_EVENT_BUS", "memory").lower()
+    if backend != "postgres":
+        raise ValueError(f"Unsupported RUN_EVENT_BUS for the run worker: {backend!r}. Use 'postgres'.")
+
+    worker_id = default_worker_id("worker")
+    metrics = PrometheusRunMetrics()
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+
+        start_http_server(args.metrics_port, registry=metrics.registry)
+        print(f"[startup] Metrics at :{args.metrics_port}/metrics")
+    rag_service = load_rag_service()
+    # Worker slots are threads using the blocking stream(); they share one pooled client.
+    http_client = create_llm_http_client()
+    llm_service = load_llm_service(http_client=http_client)
+
+    # The launcher needs the signals, the signals wake the worker: claim_next is resolved lazily.
+    launcher = None
+    worker = RunWorker(
+        claim_next=lambda: launcher.run_next(),
+        requeue_stale=lambda: requeue_stale(stale_after=args.stale_after, max_attempts=args.max_attempts),
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        reap_interval=args.stale_after / 4,
+    )
+    signals = build_run_signals(backend, on_run_queued=lambda _payload: worker.wake())
+    launcher = build_run_launcher(
+        rag_service=rag_service,
+        llm_service=llm_service,
+        signals=signals,
+        worker_id=worker_id,
+        metrics=metrics,
+    )
+
+    def shutdown(signum, _frame) -> None:
+        print(f"[shutdown] {signal.Signals(signum).name}: finishing in-flight runs.")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"[startup] Run worker {worker_id} | concurrency={worker.concurrency} | stale after={args.stale_after}s")
+    print("[startup] Ready.")
+    try:
+        worker.run()
+    finally:
+        rag_service.save_cache()
+        rag_service.close()
+        signals.close()
+        http_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Micro-benchmarks. Run inside the api container, e.g. python -m benchmarks.run_event_append
@@ -0,0 +1,104 @@
+# benchmarks/run_event_append.py — events/second when appending to a single run.
+#
+# Compares the legacy append (SELECT max(seq) + INSERT + COMMIT + REFRESH per event)
+# with the in-memory seq allocator (one INSERT ... RETURNING per event), with the
+# repository-assigned seq fallback, and with allocator + micro-batches.
+# Needs DATABASE_URL; creates a throwaway user/thread/run per scenario and deletes them.
+import argparse
+import time
+import uuid
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.application.chat.run_event_sequence import RunEventSequence
+from app.domain.chat.entities import RunEventType
+from app.infrastructure.db.session import SessionLocal
+from app.infrastructure.models import Run, RunEvent, Thread, User
+from app.infrastructure.repositories.run_event_repository_sqlalchemy import SqlAlchemyRunEventRepository
+
+
+def _create_run(db: Session) -> tuple[int, uuid.UUID]:
+    user = User(name=f"bench-{uuid.uuid4().hex[:12]}")
+    db.add(user)
+    db.flush()
+    thread = Thread(user_id=user.id)
+    db.add(thread)
+    db.flush()
+    run = Run(thread_id=thread.id)
+    db.add(run)
+    db.commit()
+    return user.id, run.id
+
+
+def _drop_user(db: Session, user_id: int) -> None:
+    # ON DELETE CASCADE removes the thread, run and events server-side.
+    db.execute(delete(User).where(User.id == user_id))
+    db.commit()
+
+
+def legacy_append(db: Session, run_id: uuid.UUID, data: dict) -> None:
+    """The pre-allocator implementation, kept here as the baseline."""
+    last = db.execute(select(func.max(RunEvent.seq)).where(RunEvent.run_id == run_id)).scalar_one()
+    ev = RunEvent(run_id=run_id, seq=int(last or 0) + 1, type=RunEventType.token, data=data)
+    db.add(ev)
+    db.commit()
+    db.refresh(ev)
+
+
+def run_scenario(name: str, n: int, batch: int) -> float:
+    db = SessionLocal()
+    user_id, run_id = _create_run(db)
+    repo = SqlAlchemyRunEventRepository(db)
+    sequence = RunEventSequence.for_run(event_repo=repo, run_id=run_id)
+    data = {"text": "token "}
+    try:
+        t0 = time.perf_counter()
+        if name == "legacy":
+            for _ in range(n):
+                legacy_append(db, run_id, data)
+        elif name == "returning":
+            for _ in range(n):
+                repo.append(run_id=run_id, type=RunEventType.token, data=data)
+        elif name == "allocator":
+            for _ in range(n):
+                repo.append(run_id=run_id, type=RunEventType.token, data=data, seq=sequence.next())
+        elif name == "allocator+batch":
+            for i in range(0, n, batch):
+                size = min(batch, n - i)
+                repo.append_many(
+                    run_id=run_id,
+                    events=[(RunEventType.token, data)] * size,
+                    first_seq=sequence.reserve(size),
+                )
+        else:
+            raise ValueError(name)
+        elapsed = time.perf_counter() - t0
+        assert repo.last_seq(run_id=run_id) == n, "seq must stay contiguous"
+        return n / elapsed
+    finally:
+        _drop_user(db, user_id)
+        db.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark run event appends to one run")
+    ap.add_argument("--events", type=int, default=10_000)
+    ap.add_argument("--batch", type=int, default=32, help="Batch size for allocator+batch")
+    ap.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=["legacy", "returning", "allocator", "allocator+batch"],
+    )
+    args = ap.parse_args()
+
+    print(f"Appending {args.events} events to one run\n")
+    baseline = None
+    for name in args.scenarios:
+        rate = run_scenario(name, args.events, args.batch)
+        baseline = baseline or rate
+        print(f"  {name:<16} {rate:10.0f} events/s   x{rate / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+# rag/bm25.py — BM25 (Okapi) inverted index with MaxScore top-k evaluation.
+# Same formula and IDF as rank_bm25.BM25Okapi (including the epsilon floor for
+# negative IDFs), so get_scores() returns the same scores as BM25Okapi.get_scores.
+import json
+import math
+import struct
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# On-disk format: one versioned binary file, see SparseBM25.save.
+BM25_FILENAME = "bm25.bin"
+FORMAT_VERSION = 1
+_MAGIC = b"CVBM25\0\0"
+_PREFIX = struct.Struct("<8sIII")
+_ALIGN = 64
+_BOUND_SLACK = 1e-9
+# Merge postings into a dense accumulator once they cover more than 1/16 of the docs.
+_DENSE_FRACTION = 16
+# top_k_batch: (queries x docs) float64 accumulator cells per block (32 MB).
+_BATCH_BLOCK_CELLS = 1 << 22
+
+
+class SparseBM25:
+    """
+    Inverted index: postings of every term stored as a term-major CSR matrix
+    (one row per vocabulary term):
+
+      indptr[t]:indptr[t+1]  slice of the postings of term t
+      indices                doc ids of each posting (ascending within a term)
+      tfs                    term frequency of each posting
+      data                   idf(t) * tf*(k1+1) / (tf + k1*(1 - b + b*dl/avgdl))
+      max_scores[t]          max(data) over the postings of t (MaxScore upper bound)
+
+    get_scores() scores every document like BM25Okapi.get_scores; top_k() only
+    scores documents that can still enter the top-k (see top_k). Repeated query
+    terms count once per occurrence, unknown terms score 0, as in rank_bm25.
+    """
+
+    def __init__(
+        self,
+        *,
+        vocab: Dict[str, int],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        num_docs: int,
+        tfs: Optional[np.ndarray] = None,
+        max_scores: Optional[np.ndarray] = None,
+        idf: Optional[np.ndarray] = None,
+        doc_len: Optional[np.ndarray] = None,
+        params: Optional[Dict[str, float]] = None,
+    ):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.num_docs = num_docs
+        self.tfs = tfs
+        self.max_scores = max_scores if max_scores is not None else _segment_max(data, indptr)
+        self.idf = idf
+        self.doc_len = doc_len
+        self.params = params or {}
+
+    @classmethod
+    def from_okapi(cls, bm25: Any) -> "SparseBM25":
+        """Convert a fitted rank_bm25.BM25Okapi (as pickled by build_index)."""
+        return cls._build(
+            doc_freqs=bm25.doc_freqs,
+            doc_len=bm25.doc_len,
+            avgdl=bm25.avgdl,
+            idf=bm25.idf,
+            k1=bm25.k1,
+            b=bm25.b,
+            epsilon=bm25.epsilon,
+        )
+
+    @classmethod
+    def from_corpus(
+        cls,
+        corpus: Sequence[Optional[Sequence[str]]],
+        *,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ) -> "SparseBM25":
+        """
+        Fit on tokenized documents, with BM25Okapi's defaults and IDF rules.
+        None entries are removed documents: their doc id stays allocated (ids are
+        chunk ids) but they have no postings and don't count in N or avgdl.
+        """
+        doc_freqs = [Counter(doc or ()) for doc in corpus]
+        doc_len = [len(doc) if doc is not None else 0 for doc in corpus]
+        num_live = sum(doc is not None for doc in corpus)
+        avgdl = sum(doc_len) / num_live if num_live else 0.0
+
+        nd: Dict[str, int] = {}
+        for freqs in doc_freqs:
+            for term in freqs:
+                nd[term] = nd.get(term, 0) + 1
+
+        # BM25Okapi._calc_idf: negative IDFs (terms in more than half the docs)
+        # are floored to epsilon * average idf.
+        idf: Dict[str, float] = {}
+        negative: List[str] = []
+        for term, freq in nd.items():
+            value = math.log(num_live - freq + 0.5) - math.log(freq + 0.5)
+            idf[term] = value
+            if value < 0:
+                negative.append(term)
+        eps = epsilon * (sum(idf.values()) / len(idf)) if idf else 0.0
+        for term in negative:
+            idf[term] = eps
+
+        return cls._build(doc_freqs=doc_freqs, doc_len=doc_len, avgdl=avgdl, idf=idf, k1=k1, b=b, epsilon=epsilon)
+
+    @classmethod
+    def _build(
+        cls,
+        *,
+        doc_freqs: Sequence[Dict[str, int]],
+        doc_len: Sequence[int],
+        avgdl: float,
+        idf: Dict[str, float],
+        k1: float,
+        b: float,
+        epsilon: float,
+    ) -> "SparseBM25":
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        for doc_id, freqs in enumerate(doc_freqs):
+            for term, tf in freqs.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        term_arr = np.asarray(term_ids, dtype=np.int64)
+        # Stable: postings of a term keep ascending doc order.
+        order = np.argsort(term_arr, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_arr, minlength=len(vocab)), out=indptr[1:])
+
+        indices = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf_counts = np.asarray(tfs, dtype=np.int32)[order]
+        tf = tf_counts.astype(np.float64)
+        dl = np.asarray(doc_len, dtype=np.float64)[indices]
+        idf_by_id = np.empty(len(vocab), dtype=np.float64)
+        for term, tid in vocab.items():
+            idf_by_id[tid] = idf.get(term) or 0
+        # Same operation order as BM25Okapi.get_scores, so scores match bit for bit.
+        data = idf_by_id[term_arr[order]] * (tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)))
+
+        return cls(
+            vocab=vocab,
+            indptr=indptr,
+            indices=indices,
+            data=data,
+            num_docs=len(doc_freqs),
+            tfs=tf_counts,
+            idf=idf_by_id,
+            doc_len=np.asarray(doc_len, dtype=np.int32),
+            params={"k1": k1, "b": b, "epsilon": epsilon, "avgdl": avgdl},
+        )
+
+    def save(self, index_dir: Path) -> Path:
+        """
+        Write the index to index_dir/bm25.bin, through a temp file and a rename so
+        readers never see a partial file. Layout (little endian):
+
+          magic "CVBM25\\0\\0" | u32 format version | u32 header length | u32 header crc32
+          header   JSON: params, num_docs, vocab_size, payload crc32, and the dtype,
+                   offset and length of the terms blob and of every array
+          payload  "\\n"-joined UTF-8 terms, then the arrays, each 64-byte aligned
+        """
+        terms = [""] * len(self.vocab)
+        for term, tid in self.vocab.items():
+            terms[tid] = term
+        blobs: List[Tuple[str, np.ndarray]] = [("terms", np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8))]
+        for name, arr in self._arrays().items():
+            if arr is not None:
+                blobs.append((name, np.ascontiguousarray(arr)))
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        crc = 0
+        for name, arr in blobs:
+            pad = _align(offset) - offset
+            crc = zlib.crc32(arr, zlib.crc32(bytes(pad), crc))
+            entries[name] = {"dtype": arr.dtype.str, "offset": offset + pad, "nbytes": arr.nbytes}
+            offset += pad + arr.nbytes
+        header = json.dumps(
+            {
+                "params": self.params,
+                "num_docs": self.num_docs,
+                "vocab_size": len(terms),
+                "payload_crc32": crc,
+                "arrays": entries,
+            }
+        ).encode("utf-8")
+
+        path = Path(index_dir) / BM25_FILENAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(_PREFIX.pack(_MAGIC, FORMAT_VERSION, len(header), zlib.crc32(header)))
+            f.write(header)
+            f.write(bytes(_align(_PREFIX.size + len(header)) - _PREFIX.size - len(header)))
+            offset = 0
+            for name, arr in blobs:
+                f.write(bytes(entries[name]["offset"] - offset))
+                f.write(arr.data)
+                offset = entries[name]["offset"] + arr.nbytes
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, index_dir: Path, *, mmap: bool = False, verify: bool = True) -> "SparseBM25":
+        """
+        Load index_dir/bm25.bin. Arrays are zero-copy views of the file buffer; with
+        mmap the file is memory-mapped read-only, so processes share its pages.
+        verify checks the payload crc32, which reads every page: skip it to keep an
+        mmap load O(1). The header is always checked. Raises ValueError for files
+        that are not a bm25.bin of this format version, or are corrupt.
+        """
+        path = Path(index_dir) / BM25_FILENAME
+        buf = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, dtype=np.uint8)
+        if buf.size < _PREFIX.size:
+            raise ValueError(f"{path} is truncated")
+        magic, version, header_len, header_crc = _PREFIX.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a BM25 index file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}. Rebuild the index.")
+        header_bytes = bytes(buf[_PREFIX.size : _PREFIX.size + header_len])
+        if zlib.crc32(header_bytes) != header_crc:
+            raise ValueError(f"{path} is corrupt (header checksum mismatch)")
+        header = json.loads(header_bytes)
+        payload = buf[_align(_PREFIX.size + header_len) :]
+        if verify and zlib.crc32(payload) != header["payload_crc32"]:
+            raise ValueError(f"{path} is corrupt (payload checksum mismatch)")
+
+        views = {}
+        for name, entry in header["arrays"].items():
+            start = entry["offset"]
+            views[name] = payload[start : start + entry["nbytes"]].view(np.dtype(entry["dtype"]))
+        terms = bytes(views.pop("terms")).decode("utf-8").split("\n") if header["vocab_size"] else []
+        return cls(
+            vocab={term: tid for tid, term in enumerate(terms)},
+            indptr=views["indptr"],
+            indices=views["doc_ids"],
+            data=views["weights"],
+            num_docs=int(header["num_docs"]),
+            tfs=views.get("tfs"),
+            max_scores=views.get("max_scores"),
+            idf=views.get("idf"),
+            doc_len=views.get("doc_len"),
+            params=header["params"],
+        )
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / BM25_FILENAME).exists()
+
+    def _arrays(self) -> Dict[str, Optional[np.ndarray]]:
+        return {
+            "indptr": self.indptr,
+            "doc_ids": self.indices,
+            "tfs": self.tfs,
+            "weights": self.data,
+            "max_scores": self.max_scores,
+            "idf": self.idf,
+            "doc_len": self.doc_len,
+        }
+
+    def get_scores(self, tokens: Iterable[str]) -> np.ndarray:
+        """BM25 score of every document for the tokenized query (float64, length num_docs)."""
+        scores = np.zeros(self.num_docs, dtype=np.float64)
+        for token in tokens:
+            tid = self.vocab.get(token)
+            if tid is None:
+                continue
+            start, end = self.indptr[tid], self.indptr[tid + 1]
+            # Doc ids are unique within a term's postings, so fancy-index += is safe.
+            scores[self.indices[start:end]] += self.data[start:end]
+        return scores
+
+    def top_k(self, tokens: Iterable[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (doc_ids, scores) of the k best documents with a positive score, best first;
+        ties go to the lower doc id.
+
+        Term-at-a-time MaxScore: query terms are visited by decreasing upper bound
+        (count * max_scores). Postings are merged in full only while a document
+        outside the candidate set could still reach the current k-th best score;
+        after that the remaining (non-essential) terms are only looked up for the
+        surviving candidates (binary search in their sorted postings), and
+        candidates whose score plus the remaining bounds can't reach the k-th
+        best are dropped. Scores of returned documents are exact.
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        counts = Counter(self.vocab[t] for t in tokens if t in self.vocab)
+        if k <= 0 or not counts:
+            return empty
+
+        terms = sorted(
+            ((tid, c, c * float(self.max_scores[tid])) for tid, c in counts.items()),
+            key=lambda x: -x[2],
+        )
+
+        lengths = [self.indptr[tid + 1] - self.indptr[tid] for tid, _, _ in terms]
+        if min(lengths) > self.num_docs // _DENSE_FRACTION:
+            # Only common terms: nothing can be skipped, a dense pass is cheaper.
+            scores = np.zeros(self.num_docs, dtype=np.float64)
+            for tid, c, _ in terms:
+                start, end = self.indptr[tid], self.indptr[tid + 1]
+                scores[self.indices[start:end]] += self.data[start:end] * c
+            ids = np.flatnonzero(scores > 0)
+            return _select_top(ids, scores[ids], k)
+
+        cand_ids = np.empty(0, dtype=np.int64)
+        cand_scores = np.empty(0, dtype=np.float64)
+        essential = True
+        dense: Optional[np.ndarray] = None
+        touched: Optional[np.ndarray] = None
+        for i, (tid, c, _) in enumerate(terms):
+            # Upper bound of what the terms not visited yet can still add to any doc.
+            remaining = sum(ub for _, _, ub in terms[i + 1 :])
+            start, end = self.indptr[tid], self.indptr[tid + 1]
+            post_ids = self.indices[start:end]
+            post_scores = self.data[start:end] * c
+
+            if essential:
+                if dense is None and cand_ids.size + post_ids.size > self.num_docs // _DENSE_FRACTION:
+                    # Long postings (common terms): scatter-add beats sorting the union.
+                    dense = np.zeros(self.num_docs, dtype=np.float64)
+                    touched = np.zeros(self.num_docs, dtype=bool)
+                    dense[cand_ids] = cand_scores
+                    touched[cand_ids] = True
+                if dense is not None:
+                    dense[post_ids] += post_scores
+                    touched[post_ids] = True
+                    cand_ids = np.flatnonzero(touched)
+                    cand_scores = dense[cand_ids]
+                else:
+                    ids = np.concatenate([cand_ids, post_ids])
+                    vals = np.concatenate([cand_scores, post_scores])
+                    cand_ids, inverse = np.unique(ids, return_inverse=True)
+                    cand_scores = np.bincount(inverse, weights=vals, minlength=cand_ids.size)
+            elif cand_ids.size <= post_ids.size:
+                # Few candidates: binary-search each one in the postings.
+                pos = np.searchsorted(post_ids, cand_ids)
+                pos[pos == post_ids.size] = 0
+                hit = post_ids[pos] == cand_ids
+                cand_scores[hit] += post_scores[pos[hit]]
+            else:
+                # Short postings: binary-search each posting in the candidates.
+                pos = np.searchsorted(cand_ids, post_ids)
+                pos[pos == cand_ids.size] = 0
+                hit = cand_ids[pos] == post_ids
+                cand_scores[pos[hit]] += post_scores[hit]
+
+            if cand_ids.size >= k:
+                # Slightly lowered so float rounding never prunes a doc that ties the k-th.
+                theta = _kth_largest(cand_scores, k)
+                theta -= abs(theta) * _BOUND_SLACK
+                if essential and theta > remaining:
+                    # Unseen docs score at most `remaining` < theta: stop merging postings.
+                    essential = False
+                if not essential:
+                    keep = cand_scores + remaining >= theta
+                    cand_ids, cand_scores = cand_ids[keep], cand_scores[keep]
+
+        positive = cand_scores > 0
+        return _select_top(cand_ids[positive], cand_scores[positive], k)
+
+    def top_k_batch(
+        self,
+        queries: Sequence[Iterable[str]],
+        k: int,
+        *,
+        block_cells: int = _BATCH_BLOCK_CELLS,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        top_k for many tokenized queries: same (doc_ids, scores) per query.
+
+        Queries are scored in blocks with one bincount over the postings of all
+        their terms, keyed by (query, doc), into a (queries x docs) accumulator of
+        at most block_cells entries. Terms are added in the order top_k uses, so
+        every score is the same float sum.
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        results: List[Tuple[np.ndarray, np.ndarray]] = [empty] * len(queries)
+        if k <= 0 or self.num_docs == 0:
+            return results
+        terms_of = []
+        for q, tokens in enumerate(queries):
+            counts = Counter(self.vocab[t] for t in tokens if t in self.vocab)
+            if counts:
+                terms = sorted(((tid, c, c * float(self.max_scores[tid])) for tid, c in counts.items()), key=lambda x: -x[2])
+                terms_of.append((q, terms))
+
+        per_block = max(1, block_cells // self.num_docs)
+        for b in range(0, len(terms_of), per_block):
+            block = terms_of[b : b + per_block]
+            keys: List[np.ndarray] = []
+            vals: List[np.ndarray] = []
+            for row, (_, terms) in enumerate(block):
+                for tid, c, _ in terms:
+                    start, end = self.indptr[tid], self.indptr[tid + 1]
+                    keys.append(self.indices[start:end].astype(np.int64) + row * self.num_docs)
+                    vals.append(self.data[start:end] * c)
+            dense = np.bincount(np.concatenate(keys), weights=np.concatenate(vals), minlength=len(block) * self.num_docs)
+            dense = dense.reshape(len(block), self.num_docs)
+            for row, (q, _) in enumerate(block):
+                ids = np.flatnonzero(dense[row] > 0)
+                results[q] = _select_top(ids, dense[row][ids], k)
+        return results
+
+
+def _select_top(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best k by (score desc, id asc) without a full sort. ids must be ascending."""
+    if ids.size > k:
+        kth = _kth_largest(scores, k)
+        above = np.flatnonzero(scores > kth)
+        # Ties on the k-th score are resolved by id; ids are ascending already.
+        ties = np.flatnonzero(scores == kth)[: k - above.size]
+        keep = np.concatenate([above, ties])
+        ids, scores = ids[keep], scores[keep]
+    order = np.lexsort((ids, -scores))
+    return ids[order], scores[order]
+
+
+def _kth_largest(values: np.ndarray, k: int) -> float:
+    return float(np.partition(values, values.size - k)[values.size - k])
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _segment_max(data: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """Max of each CSR row (every vocabulary term has at least one posting)."""
+    if data.size == 0:
+        return np.zeros(len(indptr) - 1, dtype=np.float64)
+    return np.maximum.reduceat(data, indptr[:-1])
@@ -0,0 +1,217 @@
+# rag/cache.py — In-process caches for the retrieval pipeline.
+# QueryEmbeddingCache sits in front of the embedding model (the most expensive CPU step per query);
+# SearchResultCache short-circuits the whole pipeline for repeated queries.
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when normalize_query changes, so persisted entries from the old rules are not reused.
+NORMALIZATION_VERSION = "v1"
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query for cache keys and encoding: Unicode NFKC,
+    collapsed whitespace, stripped. Case is kept (the embedding model is cased).
+    """
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", query)).strip()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and (optionally) entry age,
+    with hit / miss / eviction counters. Searches run on worker threads.
+
+    Timestamps use wall-clock time so persisted entries keep their age across restarts.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _fresh(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is None or now - stored_at < self.ttl_seconds
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self._fresh(stored_at, self._clock()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def _put(self, key: Hashable, value: Any, stored_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() if stored_at is None else stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class QueryEmbeddingCache(LRUCache):
+    """
+    Normalized query -> embedding vector, in front of the embedding model.
+
+    Keys include the embedding model name and the normalization version, so
+    one cache file can never serve vectors from another model.
+    """
+
+    def __init__(
+        self,
+        *,
+        model_name: str,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds, clock=clock)
+        self.model_name = model_name
+
+    def _key(self, normalized: str) -> Tuple[str, str, str]:
+        return (self.model_name, NORMALIZATION_VERSION, normalized)
+
+    def get(self, normalized: str) -> Optional[Any]:
+        return self._get(self._key(normalized))
+
+    def put(self, normalized: str, vec: Any) -> None:
+        self._put(self._key(normalized), vec)
+
+    def get_or_compute(self, normalized: str, compute: Callable[[str], Any]) -> Any:
+        """Cached vector, or compute(normalized) stored and returned (computed outside the lock)."""
+        vec = self.get(normalized)
+        if vec is None:
+            vec = compute(normalized)
+            self.put(normalized, vec)
+        return vec
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model": self.model_name, **super().stats()}
+
+    def save(self, path: Path) -> int:
+        """Persist the live entries of this model to an .npz file. Returns how many were written."""
+        import numpy as np
+
+        now = self._clock()
+        with self._lock:
+            live = [
+                (key[2], stored_at, vec)
+                for key, (stored_at, vec) in self._entries.items()
+                if self._fresh(stored_at, now)
+            ]
+        if not live:
+            return 0
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                model_name=np.array(self.model_name),
+                normalization=np.array(NORMALIZATION_VERSION),
+                # Fixed-width unicode, not object: the file must load without pickle.
+                queries=np.array([q for q, _, _ in live], dtype=str),
+                stored_at=np.array([t for _, t, _ in live], dtype="float64"),
+                vectors=np.stack([np.asarray(v, dtype="float32").reshape(-1) for _, _, v in live]),
+            )
+        tmp.replace(path)
+        return len(live)
+
+    def load(self, path: Path) -> int:
+        """
+        Load entries saved by save(). Files for another model or normalization
+        version, and expired entries, are ignored. Never unpickles: a file holding
+        object arrays is rejected like any unreadable one. Returns how many were loaded.
+        """
+        import numpy as np
+
+        path = Path(path)
+        if not path.exists():
+            return 0
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["model_name"]) != self.model_name or str(data["normalization"]) != NORMALIZATION_VERSION:
+                    logger.info("Query cache %s was built for another model/normalization, ignoring it", path)
+                    return 0
+                queries = data["queries"].tolist()
+                stored_at = data["stored_at"].tolist()
+                vectors = data["vectors"]
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Could not load query cache %s: %s", path, e)
+            return 0
+
+        now = self._clock()
+        loaded = 0
+        # Oldest first, so the most recent entries end up most recently used.
+        for i in sorted(range(len(queries)), key=lambda i: stored_at[i]):
+            if not self._fresh(stored_at[i], now):
+                continue
+            self._put(self._key(queries[i]), vectors[i : i + 1].copy(), stored_at=stored_at[i])
+            loaded += 1
+        return loaded
+
+
+class SearchResultCache(LRUCache):
+    """
+    Full search results keyed by (index version, normalized query, mode, topk, rrf_k).
+
+    The index version comes from the manifest (see rag.retrieval.load_index), so
+    results of a rebuilt index never match entries computed on the old one; those
+    simply age out of the LRU. Cached results are shared: callers must not mutate them.
+    """
+
+    @staticmethod
+    def key(*, index_version: str, query: str, mode: str, topk: int, rrf_k: int) -> Tuple[Any, ...]:
+        return (index_version, NORMALIZATION_VERSION, normalize_query(query), mode, topk, rrf_k)
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        return self._get(key)
+
+    def put(self, key: Tuple[Any, ...], result: Dict[str, Any]) -> None:
+        self._put(key, result)
@@ -0,0 +1,198 @@
+# rag/chunk_store.py — Compact, memory-mappable chunk metadata store.
+# Columnar layout instead of one dict per chunk: cv_id and pdf_path are interned in
+# small tables and referenced by int32 codes, chunk_index is an int32 array, and all
+# texts live in one UTF-8 blob sliced by an int64 offsets table. The arrays are opened
+# with mmap, so opening is O(1) in the number of chunks and every process mapping the
+# same files shares one page-cache copy. Dicts are only built for the hits a search
+# actually returns (ChunkHits).
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+CHUNK_STORE_DIRNAME = "chunks"
+_META = "meta.json"
+_TEXT = "text.bin"
+_ARRAYS = ("cv_idx", "pdf_idx", "chunk_index", "text_offsets")
+
+
+class ChunkStore:
+    """
+    Read-only sequence of chunk dicts (chunk_id, cv_id, pdf_path, chunk_index, text),
+    indexed by chunk id like the list returned by rag.retrieval.load_chunks.
+
+    Chunk ids are stable across incremental builds, so the id space can have holes
+    (chunks of removed or re-indexed CVs): those rows have cv_idx == -1, reading
+    them raises KeyError and iteration skips them. len() is the size of the id space.
+    """
+
+    def __init__(
+        self,
+        *,
+        cv_ids: List[str],
+        pdf_paths: List[str],
+        cv_idx: np.ndarray,
+        pdf_idx: np.ndarray,
+        chunk_index: np.ndarray,
+        text: Any,
+        text_offsets: np.ndarray,
+    ):
+        self.cv_ids = cv_ids
+        self.pdf_paths = pdf_paths
+        self.cv_idx = cv_idx
+        self.pdf_idx = pdf_idx
+        self.chunk_index = chunk_index
+        self._text = text
+        self.text_offsets = text_offsets
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "ChunkStore":
+        """
+        In-memory store from chunk dicts in ascending chunk id order (e.g. parsed
+        chunks.jsonl). Missing ids become removed rows.
+        """
+        cv_codes: Dict[str, int] = {}
+        pdf_codes: Dict[str, int] = {}
+        cv_idx: List[int] = []
+        pdf_idx: List[int] = []
+        chunk_index: List[int] = []
+        texts: List[bytes] = []
+        offsets: List[int] = [0]
+        for rec in records:
+            if rec["chunk_id"] < len(cv_idx):
+                raise ValueError(f"chunk_id {rec['chunk_id']} after {len(cv_idx) - 1}: records must be in chunk id order")
+            while len(cv_idx) < rec["chunk_id"]:
+                cv_idx.append(-1)
+                pdf_idx.append(-1)
+                chunk_index.append(-1)
+                offsets.append(offsets[-1])
+            cv_idx.append(cv_codes.setdefault(rec["cv_id"], len(cv_codes)))
+            pdf_idx.append(pdf_codes.setdefault(rec.get("pdf_path", ""), len(pdf_codes)))
+            chunk_index.append(rec["chunk_index"])
+            encoded = rec["text"].encode("utf-8")
+            texts.append(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+        return cls(
+            cv_ids=list(cv_codes),
+            pdf_paths=list(pdf_codes),
+            cv_idx=np.asarray(cv_idx, dtype=np.int32),
+            pdf_idx=np.asarray(pdf_idx, dtype=np.int32),
+            chunk_index=np.asarray(chunk_index, dtype=np.int32),
+            text=b"".join(texts),
+            text_offsets=np.asarray(offsets, dtype=np.int64),
+        )
+
+    def save(self, index_dir: Path) -> Path:
+        """Write the store under index_dir/chunks/."""
+        out = Path(index_dir) / CHUNK_STORE_DIRNAME
+        out.mkdir(parents=True, exist_ok=True)
+        (out / _TEXT).write_bytes(bytes(self._text))
+        for name in _ARRAYS:
+            np.save(out / f"{name}.npy", getattr(self, name))
+        # Written last: its presence marks a complete store (see exists()).
+        meta = {"count": len(self), "cv_ids": self.cv_ids, "pdf_paths": self.pdf_paths}
+        (out / _META).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        return out
+
+    @classmethod
+    def open(cls, index_dir: Path, *, mmap: bool = True) -> "ChunkStore":
+        src = Path(index_dir) / CHUNK_STORE_DIRNAME
+        meta = json.loads((src / _META).read_text(encoding="utf-8"))
+        arrays = {name: np.load(src / f"{name}.npy", mmap_mode="r" if mmap else None) for name in _ARRAYS}
+        text_path = src / _TEXT
+        if arrays["text_offsets"][-1] == 0:
+            # np.memmap refuses empty files.
+            text: Any = b""
+        elif mmap:
+            text = np.memmap(text_path, dtype=np.uint8, mode="r")
+        else:
+            text = text_path.read_bytes()
+        return cls(cv_ids=meta["cv_ids"], pdf_paths=meta["pdf_paths"], text=text, **arrays)
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / CHUNK_STORE_DIRNAME / _META).exists()
+
+    def __len__(self) -> int:
+        return len(self.text_offsets) - 1
+
+    def _check(self, idx: int) -> int:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"chunk {idx} out of range")
+        return idx
+
+    def _check_live(self, idx: int) -> int:
+        idx = self._check(idx)
+        if self.cv_idx[idx] < 0:
+            raise KeyError(f"chunk {idx} was removed")
+        return idx
+
+    def is_live(self, idx: int) -> bool:
+        return bool(self.cv_idx[self._check(idx)] >= 0)
+
+    def cv_id(self, idx: int) -> str:
+        return self.cv_ids[self.cv_idx[self._check_live(idx)]]
+
+    def text(self, idx: int) -> str:
+        idx = self._check(idx)
+        start, end = int(self.text_offsets[idx]), int(self.text_offsets[idx + 1])
+        return bytes(self._text[start:end]).decode("utf-8")
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        idx = self._check_live(idx)
+        return {
+            "chunk_id": idx,
+            "cv_id": self.cv_ids[self.cv_idx[idx]],
+            "pdf_path": self.pdf_paths[self.pdf_idx[idx]],
+            "chunk_index": int(self.chunk_index[idx]),
+            "text": self.text(idx),
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Live chunks in chunk id order."""
+        for idx in np.flatnonzero(np.asarray(self.cv_idx) >= 0).tolist():
+            yield self[idx]
+
+
+class ChunkHits(Sequence[Dict[str, Any]]):
+    """
+    Ranked search hits as (chunk id, score) arrays. Reading hits[i] builds the
+    same dict as before ({"score": ..., **chunk}) once and keeps it, so only the
+    hits that are actually read are materialized.
+    """
+
+    def __init__(self, chunks: Sequence[Dict[str, Any]], ids: np.ndarray, scores: np.ndarray):
+        self.chunks = chunks
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self._docs: List[Optional[Dict[str, Any]]] = [None] * len(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        doc = self._docs[i]
+        if doc is None:
+            doc = self._docs[i] = {"score": float(self.scores[i]), **self.chunks[int(self.ids[i])]}
+        return doc
+
+
+class ScoredHits(Sequence[Tuple[float, Dict[str, Any]]]):
+    """(rank score, hit dict) pairs over ChunkHits, e.g. RRF scores over the fused hits."""
+
+    def __init__(self, scores: np.ndarray, hits: ChunkHits):
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.hits = hits
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return float(self.scores[i]), self.hits[i]
@@ -0,0 +1,200 @@
+# rag/embedding_backend.py — Pluggable runtime for the sentence embedding model.
+# torch runs SentenceTransformer as before. onnx runs the same transformer exported once to
+# ONNX under ONNX Runtime, and onnx-int8 runs a dynamically quantized (int8 weights) copy of
+# that export. The ONNX backends skip PyTorch on CPU and have lower per-query latency.
+# Every backend exposes the subset of the SentenceTransformer API the pipeline uses:
+# encode(), tokenizer and max_seq_length.
+import json
+import re
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_PARITY_THRESHOLD = 0.98
+_EXPORT_META = "export.json"
+_FP32_MODEL = "model.onnx"
+_INT8_MODEL = "model.int8.onnx"
+# Queries and passages in the corpus languages, for the export-time parity check.
+PARITY_TEXTS = (
+    "query: Who has experience with Jenkins and Kubernetes?",
+    "query: ¿Quién tiene experiencia con Python y Django?",
+    "query: data engineer with Spark",
+    "passage: Senior DevOps engineer. Built CI/CD pipelines using Jenkins, Ansible and Terraform on AWS.",
+    "passage: Desarrolladora backend con 6 años de experiencia en Python, Django y PostgreSQL.",
+    "passage: Skills: Java, Spring Boot, Kafka, microservices, Docker.",
+)
+
+
+def embedder_id(model_name: str, backend: str) -> str:
+    """Model name plus the backend when it can change the vectors (keys of embedding caches)."""
+    return model_name if backend == "torch" else f"{model_name}#{backend}"
+
+
+def load_embedder(model_name: str, backend: str = "torch", *, onnx_dir: Optional[Path] = None) -> Any:
+    """
+    Embedding model for backend. The ONNX backends read the export under
+    onnx_dir/<model>/ and create it (with PyTorch, once) if it doesn't exist yet.
+    """
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        export_dir = export_path(model_name, onnx_dir or Path("rag_store") / "onnx")
+        if not (export_dir / _EXPORT_META).exists():
+            export_onnx(model_name, export_dir)
+        return OnnxEmbedder.load(export_dir, quantized=backend == "onnx-int8")
+    raise ValueError(f"Unsupported EMBEDDING_BACKEND: {backend!r}. Use one of {', '.join(EMBEDDING_BACKENDS)}.")
+
+
+def export_path(model_name: str, onnx_dir: Path) -> Path:
+    return Path(onnx_dir) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+
+def export_onnx(
+    model_name: str,
+    export_dir: Path,
+    *,
+    threshold: float = DEFAULT_PARITY_THRESHOLD,
+    opset: int = 14,
+) -> Path:
+    """
+    Export the transformer of a SentenceTransformer to ONNX, write an int8 dynamically
+    quantized copy, and check both against PyTorch on PARITY_TEXTS (see parity). The
+    tokenizer and pooling settings are saved next to the models. Needs torch and
+    onnxruntime; raises ValueError if a backend falls below threshold.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu")
+    transformer = reference[0].auto_model.eval()
+    tokenizer = reference.tokenizer
+    pooling = next((m for m in reference if type(m).__name__ == "Pooling"), None)
+    meta = {
+        "model_name": model_name,
+        "pooling": pooling.get_pooling_mode_str() if pooling is not None else "mean",
+        "normalize": any(type(m).__name__ == "Normalize" for m in reference),
+        "max_seq_length": reference.max_seq_length,
+    }
+
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    sample = tokenizer(list(PARITY_TEXTS[:2]), padding=True, return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[n] for n in input_names),
+            str(export_dir / _FP32_MODEL),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{n: axes for n in input_names}, "last_hidden_state": axes},
+            opset_version=opset,
+        )
+    quantize_dynamic(str(export_dir / _FP32_MODEL), str(export_dir / _INT8_MODEL), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(str(export_dir))
+
+    expected = reference.encode(list(PARITY_TEXTS), convert_to_numpy=True, normalize_embeddings=True)
+    for quantized in (False, True):
+        candidate = OnnxEmbedder.load(export_dir, quantized=quantized, meta=meta)
+        key = "int8_min_cosine" if quantized else "fp32_min_cosine"
+        meta[key] = parity(expected, candidate.encode(list(PARITY_TEXTS), normalize_embeddings=True), threshold=threshold)
+    # Written last: its presence marks a complete export.
+    (export_dir / _EXPORT_META).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return export_dir
+
+
+def parity(expected: np.ndarray, actual: np.ndarray, *, threshold: float = DEFAULT_PARITY_THRESHOLD) -> float:
+    """
+    Lowest row-wise cosine similarity between two embedding matrices; raises
+    ValueError if it is below threshold.
+    """
+    a = np.asarray(expected, dtype=np.float64)
+    b = np.asarray(actual, dtype=np.float64)
+    if a.shape != b.shape:
+        raise ValueError(f"Embedding shapes differ: {a.shape} vs {b.shape}")
+    cos = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    worst = float(cos.min()) if len(cos) else 1.0
+    if worst < threshold:
+        raise ValueError(f"Embedding parity check failed: min cosine {worst:.4f} < {threshold}")
+    return worst
+
+
+class OnnxEmbedder:
+    """
+    SentenceTransformer-compatible encoder over an ONNX Runtime session: tokenizes,
+    runs the transformer, pools the token states (mean or cls) and optionally normalizes.
+    """
+
+    def __init__(
+        self,
+        *,
+        session: Any,
+        tokenizer: Any,
+        pooling: str = "mean",
+        normalize: bool = True,
+        max_seq_length: int = 512,
+    ):
+        if pooling not in ("mean", "cls"):
+            raise ValueError(f"Unsupported pooling: {pooling!r}. Use 'mean' or 'cls'.")
+        self.session = session
+        self.tokenizer = tokenizer
+        self.pooling = pooling
+        self.normalize = normalize
+        self.max_seq_length = max_seq_length
+        self._input_names = [i.name for i in session.get_inputs()]
+
+    @classmethod
+    def load(cls, export_dir: Path, *, quantized: bool = False, meta: Optional[dict] = None) -> "OnnxEmbedder":
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        export_dir = Path(export_dir)
+        meta = meta or json.loads((export_dir / _EXPORT_META).read_text(encoding="utf-8"))
+        session = ort.InferenceSession(
+            str(export_dir / (_INT8_MODEL if quantized else _FP32_MODEL)), providers=["CPUExecutionProvider"]
+        )
+        return cls(
+            session=session,
+            tokenizer=AutoTokenizer.from_pretrained(str(export_dir)),
+            pooling=meta["pooling"],
+            normalize=meta["normalize"],
+            max_seq_length=meta["max_seq_length"],
+        )
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+    ) -> np.ndarray:
+        """Same contract as SentenceTransformer.encode for a list of strings: (n, dim) float32."""
+        rows: List[np.ndarray] = []
+        for start in range(0, len(sentences), max(1, batch_size)):
+            batch = list(sentences[start : start + batch_size])
+            encoded = self.tokenizer(
+                batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+            )
+            feeds = {name: np.asarray(encoded[name], dtype=np.int64) for name in self._input_names if name in encoded}
+            if "token_type_ids" in self._input_names and "token_type_ids" not in feeds:
+                feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+            hidden = self.session.run(None, feeds)[0]
+            rows.append(self._pool(hidden, feeds["attention_mask"]))
+        out = np.vstack(rows) if rows else np.empty((0, 0), dtype=np.float32)
+        if self.normalize or normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out = out / np.maximum(norms, 1e-12)
+        return out.astype(np.float32)
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[:, :, None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
@@ -0,0 +1,104 @@
+# rag/embedding_cache.py — On-disk cache of passage embeddings for build_index.
+# Most chunks are byte-identical between builds (even with --force or new chunking
+# parameters for unchanged text), so their vectors are looked up by
+# sha256(model name + passage) in a SQLite table before anything is encoded.
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+EMBEDDING_CACHE_FILENAME = "embedding_cache.sqlite"
+# Stay under SQLITE_MAX_VARIABLE_NUMBER of older SQLite builds (999).
+_BATCH = 900
+
+
+def passage_key(model_name: str, passage: str) -> bytes:
+    """Cache key of one encoder input (e.g. "passage: ..."): the model is part of the key."""
+    return hashlib.sha256(f"{model_name}\0{passage}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    SQLite table key -> float32 vector. Vectors are stored as given (build_index
+    stores them L2-normalized) and come back as float32 arrays.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # build_index creates the cache and uses it from its embedding stage thread (one at a time).
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """Vectors of the cached keys; missing keys are left out."""
+        unique = list(dict.fromkeys(keys))
+        found: Dict[bytes, np.ndarray] = {}
+        for i in range(0, len(unique), _BATCH):
+            batch = unique[i : i + _BATCH]
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            ((key, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items),
+        )
+        self._conn.commit()
+
+    def prune(self, keep: Iterable[bytes]) -> int:
+        """Delete every entry whose key is not in keep (e.g. text no longer indexed). Returns the count."""
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep (key BLOB PRIMARY KEY) WITHOUT ROWID")
+        self._conn.execute("DELETE FROM keep")
+        self._conn.executemany("INSERT OR IGNORE INTO keep (key) VALUES (?)", ((key,) for key in keep))
+        removed = self._conn.execute("DELETE FROM embeddings WHERE key NOT IN (SELECT key FROM keep)").rowcount
+        self._conn.execute("DELETE FROM keep")
+        self._conn.commit()
+        return removed
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def cached_passage_embeddings(
+    texts: List[str],
+    *,
+    model_name: str,
+    cache: EmbeddingCache,
+    encode: Callable[[List[str]], np.ndarray],
+) -> np.ndarray:
+    """
+    One row per text: cached vectors where available, encode(passages) -> float32
+    rows for the distinct passages that are not. New vectors are added to the cache.
+    """
+    passages = [f"passage: {t}" for t in texts]
+    keys = [passage_key(model_name, p) for p in passages]
+    found = cache.get_many(keys)
+    missing = {key: p for key, p in zip(keys, passages) if key not in found}
+    if missing:
+        vectors = encode(list(missing.values()))
+        new = dict(zip(missing, vectors))
+        cache.put_many(new.items())
+        found.update(new)
+    if not keys:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.vstack([found[key] for key in keys]).astype(np.float32, copy=False)
@@ -0,0 +1,154 @@
+# rag/faiss_index.py — FAISS index types for the dense (semantic) leg.
+# flat is an exact brute-force inner-product scan; ivf, hnsw and ivfpq are approximate
+# and trade recall for latency. Build parameters are stored in manifest.json["faiss"]
+# so load_index can set the matching search-time knobs (nprobe / efSearch).
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+# k-means in FAISS wants ~39 training points per centroid; fewer clusters poorly.
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def default_nlist(num_vectors: int) -> int:
+    """~4*sqrt(n) inverted lists, capped so every centroid has enough training points."""
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // _MIN_POINTS_PER_CENTROID))
+
+
+def build_faiss_index(
+    X: np.ndarray,
+    *,
+    ids: Optional[np.ndarray] = None,
+    index_type: str = "flat",
+    nlist: Optional[int] = None,
+    nprobe: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    ef_search: int = 64,
+    pq_m: int = 16,
+    pq_nbits: int = 8,
+) -> Tuple[faiss.Index, Dict[str, Any]]:
+    """
+    Train (if needed) and fill an inner-product index with the L2-normalized rows of X.
+    Returns (index, params); params is what goes into manifest.json["faiss"].
+
+    With ids, row i is stored under ids[i] (the chunk id) instead of its position, so
+    vectors can later be added and removed by id (see supports_remove). IVF indexes
+    store ids natively; flat and hnsw are wrapped in an IndexIDMap.
+    """
+    num_vectors, dim = X.shape
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+        params: Dict[str, Any] = {"index_type": "flat"}
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        params = {"index_type": "hnsw", "M": hnsw_m, "efConstruction": ef_construction, "efSearch": ef_search}
+    elif index_type in ("ivf", "ivfpq"):
+        nlist = min(nlist or default_nlist(num_vectors), num_vectors)
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            params = {"index_type": "ivf", "nlist": nlist}
+        else:
+            if dim % pq_m:
+                raise ValueError(f"pq_m={pq_m} must divide the embedding dimension ({dim})")
+            if num_vectors < 2**pq_nbits:
+                raise ValueError(
+                    f"ivfpq with pq_nbits={pq_nbits} needs at least {2**pq_nbits} vectors to train, got {num_vectors}"
+                )
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits, faiss.METRIC_INNER_PRODUCT)
+            params = {"index_type": "ivfpq", "nlist": nlist, "pq_m": pq_m, "pq_nbits": pq_nbits}
+        params["nprobe"] = min(nprobe, nlist)
+        index.train(X)
+    else:
+        raise ValueError(f"Unsupported index_type: {index_type!r}. Use one of {', '.join(INDEX_TYPES)}.")
+
+    if ids is None:
+        index.add(X)
+    else:
+        if not isinstance(index, faiss.IndexIVF):
+            index = faiss.IndexIDMap(index)
+        index.add_with_ids(X, np.asarray(ids, dtype=np.int64))
+    apply_search_params(index, params)
+    return index, params
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """Whether remove_ids works on index: HNSW graphs can't delete nodes."""
+    return not isinstance(_unwrap(index), faiss.IndexHNSW)
+
+
+def _unwrap(index: faiss.Index) -> faiss.Index:
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+
+def apply_search_params(
+    index: faiss.Index,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Set the search-time knobs of index: explicit nprobe / ef_search win over the
+    values stored at build time in params. Returns the values in effect.
+    """
+    params = params or {}
+    effective: Dict[str, Any] = {"index_type": params.get("index_type", "flat")}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe or params.get("nprobe") or ivf.nprobe, ivf.nlist)
+        effective["nprobe"] = ivf.nprobe
+    hnsw = _unwrap(index)
+    if isinstance(hnsw, faiss.IndexHNSW):
+        hnsw.hnsw.efSearch = ef_search or params.get("efSearch") or hnsw.hnsw.efSearch
+        effective["efSearch"] = hnsw.hnsw.efSearch
+    return effective
+
+
+def index_vectors(index: faiss.Index) -> np.ndarray:
+    """
+    All stored vectors of an exact index (flat, ivf or hnsw), in storage order, e.g.
+    to rebuild it as another type.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if isinstance(ivf, faiss.IndexIVFPQ):
+        raise ValueError("ivfpq stores compressed vectors; rebuild with --index_type flat first")
+    if ivf is not None:
+        # IVFFlat codes are the raw float32 vectors; read them list by list
+        # (a direct map would need sequential ids).
+        invlists = ivf.invlists
+        parts = [
+            faiss.rev_swig_ptr(invlists.get_codes(i), invlists.list_size(i) * invlists.code_size).copy()
+            for i in range(ivf.nlist)
+            if invlists.list_size(i)
+        ]
+        if not parts:
+            return np.empty((0, ivf.d), dtype="float32")
+        return np.concatenate(parts).view("float32").reshape(-1, ivf.d)
+    base = _unwrap(index)
+    return base.reconstruct_n(0, base.ntotal)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Mean fraction of each row of truth (exact top-k ids) present in the same row of found."""
+    hits = sum(len(np.intersect1d(t[t >= 0], f[f >= 0])) for t, f in zip(truth, found))
+    total = int((truth >= 0).sum())
+    return hits / total if total else 1.0
+
+
+def measure(index: faiss.Index, queries: np.ndarray, k: int) -> Tuple[np.ndarray, List[float]]:
+    """Search one query at a time (as the API does). Returns (ids, per-query latency in ms)."""
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    latencies: List[float] = []
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        _, row = index.search(queries[i : i + 1], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ids[i] = row[0]
+    return ids, latencies
@@ -0,0 +1,93 @@
+# rag/index_manifest.py — Per-file manifest entries for incremental index builds.
+# Every indexed PDF is recorded with its size, mtime, content hash and the range of
+# chunk ids it produced, so a rebuild only re-extracts and re-embeds the PDFs that
+# were added or changed, and drops the chunk ids of changed or deleted ones.
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Settings that change every chunk or vector: a different value forces a full rebuild.
+REBUILD_KEYS = ("embedding_model", "embedding_backend", "chunk_chars", "overlap_chars", "index_type")
+# Values of rebuild keys in manifests written before the key was recorded.
+_LEGACY_DEFAULTS = {"embedding_backend": "torch"}
+
+
+def file_key(pdf_path: Path, pdf_dir: Path) -> str:
+    """Manifest key of a PDF: its path relative to pdf_dir, with forward slashes."""
+    return pdf_path.relative_to(pdf_dir).as_posix()
+
+
+def content_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_entry(path: Path, *, cv_id: str, first_chunk_id: int, chunk_count: int, sha256: Optional[str] = None) -> Dict[str, Any]:
+    st = path.stat()
+    return {
+        "cv_id": cv_id,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": sha256 or content_hash(path),
+        "chunk_ids": [first_chunk_id, first_chunk_id + chunk_count],
+    }
+
+
+def chunk_ids(entry: Dict[str, Any]) -> range:
+    start, end = entry["chunk_ids"]
+    return range(start, end)
+
+
+@dataclass(frozen=True)
+class FileDiff:
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    # Files whose size/mtime changed but whose content didn't: entry with fresh stats.
+    touched: Dict[str, Dict[str, Any]]
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def diff_files(old_files: Dict[str, Dict[str, Any]], pdf_files: Dict[str, Path]) -> FileDiff:
+    """
+    Compare the manifest entries of the last build with the PDFs on disk (key -> path).
+    Content is only hashed for files whose size or mtime differ from their entry.
+    """
+    added = sorted(key for key in pdf_files if key not in old_files)
+    removed = sorted(key for key in old_files if key not in pdf_files)
+    changed: List[str] = []
+    touched: Dict[str, Dict[str, Any]] = {}
+    for key in sorted(pdf_files.keys() & old_files.keys()):
+        entry = old_files[key]
+        st = pdf_files[key].stat()
+        if st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+            continue
+        digest = content_hash(pdf_files[key])
+        if digest == entry["sha256"]:
+            touched[key] = {**entry, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        else:
+            changed.append(key)
+    return FileDiff(added=added, changed=changed, removed=removed, touched=touched)
+
+
+def full_rebuild_reason(old: Optional[Dict[str, Any]], config: Dict[str, Any]) -> Optional[str]:
+    """Why the last build can't be updated in place (None if it can)."""
+    if old is None:
+        return "no manifest"
+    if "files" not in old or "next_chunk_id" not in old:
+        return "manifest has no per-file entries"
+    for key in REBUILD_KEYS:
+        if key == "index_type":
+            previous = old.get("faiss", {}).get("index_type", "flat")
+        else:
+            previous = old.get(key, _LEGACY_DEFAULTS.get(key))
+        if previous != config[key]:
+            return f"{key} changed ({previous!r} -> {config[key]!r})"
+    return None
@@ -0,0 +1,59 @@
+# rag/length_batching.py — Length-bucketed batches for passage embedding.
+# A transformer batch is padded to its longest sequence, so batching chunks in document
+# order pays for the padding of every short chunk next to a long one. Sorting by token
+# length and filling each batch up to a token budget (batch size x longest sequence)
+# keeps padding low and lets batches of short chunks hold more items.
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+def token_budget_batches(
+    lengths: Sequence[int],
+    *,
+    max_tokens: int,
+    max_items: Optional[int] = None,
+) -> List[np.ndarray]:
+    """
+    Indices into lengths grouped into batches, longest first. A batch is closed when
+    one more item would make its padded size (items x longest) exceed max_tokens, or
+    when it has max_items items. An item longer than max_tokens gets a batch of its own.
+    """
+    order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind="stable")
+    batches: List[np.ndarray] = []
+    start = 0
+    while start < len(order):
+        # Sorted descending: the first item of the batch is its longest.
+        longest = max(1, int(lengths[order[start]]))
+        size = max(1, max_tokens // longest)
+        if max_items:
+            size = min(size, max_items)
+        batches.append(order[start : start + size])
+        start += size
+    return batches
+
+
+def padded_tokens(lengths: Sequence[int], batches: Sequence[Sequence[int]]) -> int:
+    """Tokens the encoder actually processes: every batch padded to its longest item."""
+    return sum(len(batch) * max(int(lengths[i]) for i in batch) for batch in batches if len(batch))
+
+
+def encode_by_length(
+    items: Sequence[str],
+    *,
+    lengths: Sequence[int],
+    encode_batch: Callable[[List[str]], np.ndarray],
+    max_tokens: int,
+    max_items: Optional[int] = None,
+) -> np.ndarray:
+    """Encode items in token_budget_batches and return the rows in the original order of items."""
+    batches = token_budget_batches(lengths, max_tokens=max_tokens, max_items=max_items)
+    out: Optional[np.ndarray] = None
+    for batch in batches:
+        vectors = encode_batch([items[i] for i in batch])
+        if out is None:
+            out = np.empty((len(items), vectors.shape[1]), dtype=vectors.dtype)
+        out[batch] = vectors
+    if out is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return out
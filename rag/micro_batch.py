@@ -0,0 +1,146 @@
+# rag/micro_batch.py — Request-coalescing front end for the query embedding model.
+# Concurrent runs each encode one query; calling the shared model from every thread
+# makes them contend for it with batches of one. MicroBatchEncoder queues the calls
+# instead, and a single thread encodes whatever arrived within a short window (or
+# until max_batch texts) in one forward pass, then hands each caller its rows.
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+_STOP = object()
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    normalize: bool
+    future: "Future[np.ndarray]" = field(default_factory=Future)
+
+
+class MicroBatchEncoder:
+    """
+    Drop-in for the embedding model in the search path: encode() has the
+    SentenceTransformer contract and blocks until the caller's rows are ready.
+    Other attributes (tokenizer, max_seq_length, ...) are read from the model.
+
+    The first queued call opens a window of max_wait_s; calls arriving before it
+    closes, up to max_batch texts, share one model.encode. A lone call therefore
+    waits at most max_wait_s longer than it would without batching.
+    """
+
+    def __init__(self, model: Any, *, max_batch: int = 32, max_wait_s: float = 0.003):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.calls = 0
+        self.batches = 0
+        self.texts = 0
+        self.max_batch_seen = 0
+        self._thread = threading.Thread(target=self._run, name="query-encoder", daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+    ) -> np.ndarray:
+        """(n, dim) float32 rows for sentences; batch_size is chosen by the encoder."""
+        if not len(sentences):
+            return np.empty((0, 0), dtype=np.float32)
+        request = _Request(list(sentences), normalize_embeddings)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatchEncoder is closed")
+            self._queue.put(request)
+        return request.future.result()
+
+    def close(self) -> None:
+        """Encode what is already queued, then stop the encoder thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch": self.texts / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch_seen,
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            pending = [first]
+            size = len(first.texts)
+            deadline = time.monotonic() + self.max_wait_s
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                pending.append(request)
+                size += len(request.texts)
+            for normalize in (False, True):
+                group = [r for r in pending if r.normalize == normalize]
+                if group:
+                    self._encode(group, normalize)
+
+    def _encode(self, group: List[_Request], normalize: bool) -> None:
+        texts = [t for r in group for t in r.texts]
+        try:
+            X = np.asarray(
+                self.model.encode(
+                    texts,
+                    batch_size=max(1, len(texts)),
+                    convert_to_numpy=True,
+                    normalize_embeddings=normalize,
+                ),
+                dtype=np.float32,
+            )
+        except Exception as e:
+            for r in group:
+                r.future.set_exception(e)
+            return
+        self.calls += len(group)
+        self.batches += 1
+        self.texts += len(texts)
+        self.max_batch_seen = max(self.max_batch_seen, len(texts))
+        start = 0
+        for r in group:
+            r.future.set_result(X[start : start + len(r.texts)])
+            start += len(r.texts)
+
+
+def wrap_model(model: Any, *, max_batch: int, max_wait_s: float) -> Any:
+    """model behind a MicroBatchEncoder, or model itself when max_wait_s <= 0 (batching disabled)."""
+    if max_wait_s <= 0:
+        return model
+    return MicroBatchEncoder(model, max_batch=max_batch, max_wait_s=max_wait_s)
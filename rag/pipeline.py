@@ -0,0 +1,156 @@
+# rag/pipeline.py — Threaded stages connected by bounded queues (used by build_index).
+# Each stage runs in its own thread and hands items to the next through a queue of at
+# most maxsize items, so a slow stage applies back-pressure instead of letting the
+# stages before it buffer the whole corpus. The embedding model and FAISS release the
+# GIL, so the encoder keeps working while PDFs are still being parsed.
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+_DONE = object()
+_POLL_S = 0.1
+
+
+class _Stopped(Exception):
+    """Another stage failed: unwind this one."""
+
+
+@dataclass
+class StageStats:
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    # Time spent working, i.e. not blocked on an empty input or a full output queue.
+    busy_s: float = 0.0
+    wait_s: float = 0.0
+    # Occupancy of the stage's input queue, sampled at every get.
+    queue_max: int = 0
+    queue_sum: int = 0
+    queue_samples: int = 0
+
+    @property
+    def queue_avg(self) -> float:
+        return self.queue_sum / self.queue_samples if self.queue_samples else 0.0
+
+    @property
+    def items_per_s(self) -> float:
+        return self.items_out / self.busy_s if self.busy_s > 0 else 0.0
+
+
+Stage = Tuple[str, Callable[[Iterator[Any]], Iterable[Any]]]
+
+
+def run_pipeline(
+    source: Tuple[str, Iterable[Any]],
+    stages: Sequence[Stage],
+    sink: Tuple[str, Callable[[Any], None]],
+    *,
+    maxsize: int = 8,
+) -> List[StageStats]:
+    """
+    Run source -> stages -> sink. source is (name, iterable); each stage is (name,
+    fn) where fn maps an iterator of inputs to an iterable of outputs (so it can
+    batch); sink is (name, fn) called once per item in the calling thread. The
+    first exception of any stage stops the others and is re-raised here.
+    """
+    stats = [StageStats(source[0])] + [StageStats(name) for name, _ in stages] + [StageStats(sink[0])]
+    queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=max(1, maxsize)) for _ in range(len(stages) + 1)]
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def put(q: "queue.Queue[Any]", item: Any, st: StageStats) -> None:
+        t0 = time.perf_counter()
+        while True:
+            if stop.is_set():
+                raise _Stopped
+            try:
+                q.put(item, timeout=_POLL_S)
+                break
+            except queue.Full:
+                continue
+        st.wait_s += time.perf_counter() - t0
+
+    def take(q: "queue.Queue[Any]", st: StageStats) -> Iterator[Any]:
+        while True:
+            size = q.qsize()
+            st.queue_max = max(st.queue_max, size)
+            st.queue_sum += size
+            st.queue_samples += 1
+            t0 = time.perf_counter()
+            while True:
+                if stop.is_set():
+                    raise _Stopped
+                try:
+                    item = q.get(timeout=_POLL_S)
+                    break
+                except queue.Empty:
+                    continue
+            st.wait_s += time.perf_counter() - t0
+            if item is _DONE:
+                return
+            st.items_in += 1
+            yield item
+
+    def worker(st: StageStats, items: Iterable[Any], out: "queue.Queue[Any]") -> None:
+        t0 = time.perf_counter()
+        try:
+            for item in items:
+                st.items_out += 1
+                put(out, item, st)
+            put(out, _DONE, st)
+        except _Stopped:
+            pass
+        except BaseException as exc:
+            errors.append(exc)
+            stop.set()
+        finally:
+            st.busy_s = time.perf_counter() - t0 - st.wait_s
+
+    def source_items() -> Iterator[Any]:
+        for item in source[1]:
+            stats[0].items_in += 1
+            yield item
+
+    threads = [threading.Thread(target=worker, args=(stats[0], source_items(), queues[0]), name=source[0], daemon=True)]
+    for i, (name, fn) in enumerate(stages):
+        items = fn(take(queues[i], stats[i + 1]))
+        threads.append(threading.Thread(target=worker, args=(stats[i + 1], items, queues[i + 1]), name=name, daemon=True))
+    for t in threads:
+        t.start()
+
+    sink_stats = stats[-1]
+    t0 = time.perf_counter()
+    try:
+        for item in take(queues[-1], sink_stats):
+            sink[1](item)
+            sink_stats.items_out += 1
+    except _Stopped:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        sink_stats.busy_s = time.perf_counter() - t0 - sink_stats.wait_s
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return stats
+
+
+def format_stats(stats: Sequence[StageStats], *, wall_s: float, maxsize: int) -> str:
+    """Per-stage table: items in/out, busy time, throughput while busy, input queue occupancy."""
+    lines = [
+        f"Pipeline: {wall_s:.2f} s wall, queues of {maxsize}",
+        f"  {'stage':<10} {'in':>8} {'out':>8} {'busy s':>8} {'items/s':>9} {'queue avg':>10} {'queue max':>10}",
+    ]
+    for i, st in enumerate(stats):
+        queue_avg = f"{st.queue_avg:.1f}" if i else "-"
+        queue_max = str(st.queue_max) if i else "-"
+        lines.append(
+            f"  {st.name:<10} {st.items_in:>8} {st.items_out:>8} {st.busy_s:>8.2f} {st.items_per_s:>9.1f} "
+            f"{queue_avg:>10} {queue_max:>10}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+# rag/rag_cli/ann_report.py — recall@k vs latency of the approximate FAISS index types
+# against the exact flat index, on the vectors of an existing rag_store.
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+
+from rag.faiss_index import apply_search_params, build_faiss_index, index_vectors, measure, recall_at_k
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Recall@k vs latency of ivf / hnsw / ivfpq against flat")
+    ap.add_argument("--index_dir", required=True, help="Directory with rag_store indices")
+    ap.add_argument("--k", type=int, default=10, help="Recall@k cutoff")
+    ap.add_argument("--queries", type=int, default=200, help="Chunk vectors sampled as queries")
+    ap.add_argument("--types", default="ivf,hnsw,ivfpq", help="Comma-separated index types to compare")
+    ap.add_argument("--nlist", type=int, default=None, help="IVF lists (default ~4*sqrt(n))")
+    ap.add_argument("--nprobe", type=_ints, default=[1, 4, 8, 16, 32], help="nprobe values to sweep (ivf, ivfpq)")
+    ap.add_argument("--hnsw_m", type=int, default=32)
+    ap.add_argument("--ef_search", type=_ints, default=[16, 32, 64, 128], help="efSearch values to sweep (hnsw)")
+    ap.add_argument("--pq_m", type=int, default=16)
+    ap.add_argument("--pq_nbits", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", dest="json_path", default=None, help="Also write the rows to this JSON file")
+    args = ap.parse_args()
+
+    faiss_path = Path(args.index_dir) / "faiss.index"
+    if not faiss_path.exists():
+        print(f"Missing index file: {faiss_path}. Run 'make -f rag/Makefile index' first.", file=sys.stderr)
+        sys.exit(1)
+    try:
+        X = np.ascontiguousarray(index_vectors(faiss.read_index(str(faiss_path))), dtype="float32")
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    rng = np.random.default_rng(args.seed)
+    queries = X[rng.choice(len(X), size=min(args.queries, len(X)), replace=False)]
+    k = min(args.k, len(X))
+    print(f"{len(X)} vectors, dim={X.shape[1]}, {len(queries)} queries, k={k}\n")
+
+    flat, _ = build_faiss_index(X, index_type="flat")
+    truth, flat_ms = measure(flat, queries, k)
+    rows: List[Dict[str, Any]] = [_row("flat", {}, 0.0, flat, 1.0, flat_ms)]
+
+    for index_type in [t.strip() for t in args.types.split(",") if t.strip()]:
+        t0 = time.perf_counter()
+        try:
+            index, params = build_faiss_index(
+                X,
+                index_type=index_type,
+                nlist=args.nlist,
+                hnsw_m=args.hnsw_m,
+                pq_m=args.pq_m,
+                pq_nbits=args.pq_nbits,
+            )
+        except ValueError as e:
+            print(f"Skipping {index_type}: {e}")
+            continue
+        build_s = time.perf_counter() - t0
+        sweep = [{"ef_search": ef} for ef in args.ef_search] if index_type == "hnsw" else [{"nprobe": p} for p in args.nprobe]
+        for knobs in sweep:
+            effective = apply_search_params(index, params, **knobs)
+            found, ms = measure(index, queries, k)
+            rows.append(_row(index_type, {**params, **effective}, build_s, index, recall_at_k(truth, found), ms))
+
+    print(f"{'index':<8} {'params':<42} {'recall@' + str(k):>9} {'mean ms':>9} {'p95 ms':>9} {'build s':>8} {'size MB':>8}")
+    for r in rows:
+        print(
+            f"{r['index_type']:<8} {r['params']:<42} {r['recall']:>9.3f} {r['mean_ms']:>9.3f} "
+            f"{r['p95_ms']:>9.3f} {r['build_s']:>8.2f} {r['size_mb']:>8.2f}"
+        )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\nSaved report: {args.json_path}")
+
+
+def _row(
+    index_type: str,
+    params: Dict[str, Any],
+    build_s: float,
+    index: faiss.Index,
+    recall: float,
+    latencies: List[float],
+) -> Dict[str, Any]:
+    shown = " ".join(f"{key}={value}" for key, value in params.items() if key != "index_type")
+    return {
+        "index_type": index_type,
+        "params": shown or "-",
+        "recall": recall,
+        "mean_ms": float(np.mean(latencies)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "build_s": build_s,
+        "size_mb": faiss.serialize_index(index).nbytes / 1e6,
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# rag/rag_cli/bench_bm25_load.py — load time of the pickled BM25Okapi (bm25.pkl)
+# vs the binary bm25.bin on synthetic corpora of increasing size.
+import argparse
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from rag.bm25 import BM25_FILENAME, SparseBM25
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def synthetic_corpus(num_docs: int, *, doc_len: int, vocab: int, seed: int = 0) -> List[List[str]]:
+    """Zipf-distributed tokens, roughly like chunked CV text."""
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    ids = (rng.zipf(1.2, size=num_docs * doc_len) - 1) % vocab
+    return [[words[i] for i in ids[d * doc_len : (d + 1) * doc_len]] for d in range(num_docs)]
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark bm25.pkl vs bm25.bin load time")
+    ap.add_argument("--sizes", type=_ints, default=[10_000, 100_000, 1_000_000], help="Chunk counts")
+    ap.add_argument("--doc_len", type=int, default=60, help="Tokens per chunk")
+    ap.add_argument("--vocab", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'chunks':>9} {'pkl MB':>8} {'bin MB':>8} {'pickle s':>9} {'pickle+conv s':>14} {'bin s':>8} {'bin mmap s':>11}")
+    for num_docs in args.sizes:
+        corpus = synthetic_corpus(num_docs, doc_len=args.doc_len, vocab=args.vocab)
+        okapi = BM25Okapi(corpus)
+        del corpus
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            pkl_path = out / "bm25.pkl"
+            with pkl_path.open("wb") as f:
+                pickle.dump({"bm25": okapi, "chunk_count": num_docs}, f)
+            SparseBM25.from_okapi(okapi).save(out)
+            del okapi
+
+            def load_pickle() -> object:
+                with pkl_path.open("rb") as f:
+                    return pickle.load(f)
+
+            def load_pickle_and_convert() -> object:
+                return SparseBM25.from_okapi(load_pickle()["bm25"])
+
+            pkl_s = best_of(args.repeat, load_pickle)
+            conv_s = best_of(args.repeat, load_pickle_and_convert)
+            bin_s = best_of(args.repeat, lambda: SparseBM25.load(out))
+            mmap_s = best_of(args.repeat, lambda: SparseBM25.load(out, mmap=True, verify=False))
+            print(
+                f"{num_docs:>9} {pkl_path.stat().st_size / 1e6:>8.1f} {(out / BM25_FILENAME).stat().st_size / 1e6:>8.1f} "
+                f"{pkl_s:>9.3f} {conv_s:>14.3f} {bin_s:>8.3f} {mmap_s:>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,29 @@
 # rag/rag_cli/build_index.py
 import argparse
-import hashlib
 import json
 import os
-import pickle
 import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import fitz  # PyMuPDF
 import faiss
 import numpy as np
-from rank_bm25 import BM25Okapi
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from rag.bm25 import BM25_FILENAME, SparseBM25
+from rag.chunk_store import CHUNK_STORE_DIRNAME, ChunkStore
+from rag.embedding_backend import EMBEDDING_BACKENDS, embedder_id, load_embedder
+from rag.embedding_cache import EMBEDDING_CACHE_FILENAME, EmbeddingCache, cached_passage_embeddings, passage_key
+from rag.faiss_index import INDEX_TYPES, build_faiss_index, supports_remove
+from rag.index_manifest import chunk_ids, content_hash, diff_files, file_entry, file_key, full_rebuild_reason
+from rag.length_batching import encode_by_length
+from rag.pipeline import format_stats, run_pipeline
+
 
 WORD_RE = re.compile(r"[A-Za-zÀ-ÿ0-9_+#.-]+")
 DEFAULT_MODEL = "intfloat/multilingual-e5-small"
@@ -51,28 +60,125 @@ def chunk_text(text: str, chunk_chars: int = 1800, overlap_chars: int = 250) ->
     return chunks
 
 
-def file_fingerprint(paths: List[Path]) -> str:
-    h = hashlib.sha256()
-    for p in sorted(paths):
-        st = p.stat()
-        h.update(str(p).encode("utf-8"))
-        h.update(str(int(st.st_mtime)).encode("utf-8"))
-        h.update(str(st.st_size).encode("utf-8"))
-    return h.hexdigest()
-
-
 def ensure_out_dir(out_dir: Path) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
 
 
+def extract_chunks(pdf_path: Path, *, chunk_chars: int, overlap_chars: int) -> Tuple[List[str], str]:
+    """Chunks of one PDF and its content hash (runs in a worker process with --workers > 1)."""
+    text = extract_text_from_pdf(pdf_path)
+    return chunk_text(text, chunk_chars=chunk_chars, overlap_chars=overlap_chars), content_hash(pdf_path)
+
+
+def iter_extracted(
+    pdf_paths: Sequence[Path],
+    *,
+    chunk_chars: int,
+    overlap_chars: int,
+    workers: int = 1,
+) -> Iterator[Tuple[List[str], str]]:
+    """
+    extract_chunks for every PDF, yielded in the order of pdf_paths as results
+    arrive, so chunk ids don't depend on which worker finishes first. At most
+    2 * workers PDFs are in flight, so a slow consumer holds back extraction
+    instead of piling up results.
+    """
+    extract = partial(extract_chunks, chunk_chars=chunk_chars, overlap_chars=overlap_chars)
+    if workers <= 1:
+        yield from map(extract, pdf_paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight: "deque[Future[Tuple[List[str], str]]]" = deque()
+        for path in pdf_paths:
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+            in_flight.append(pool.submit(extract, path))
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def make_records(chunks: List[str], *, pdf_path: Path, cv_id: str, first_chunk_id: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "chunk_id": first_chunk_id + i,
+            "cv_id": cv_id,
+            "pdf_path": str(pdf_path),
+            "chunk_index": i,
+            "text": ch,
+        }
+        for i, ch in enumerate(chunks)
+    ]
+
+
+def token_lengths(embedder: Any, passages: List[str]) -> List[int]:
+    """Token count of each passage as the encoder sees it (special tokens included, truncated)."""
+    encoded = embedder.tokenizer(
+        passages, add_special_tokens=True, truncation=True, max_length=embedder.max_seq_length
+    )
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def encode_passages(embedder: Any, passages: List[str], *, batch_tokens: int, batch_size: int) -> np.ndarray:
+    """
+    L2-normalized float32 embeddings of encoder inputs ("passage: ..."), one row per
+    passage. With batch_tokens, batches are formed by length under that padded-token
+    budget; otherwise they are batch_size passages in input order.
+    """
+
+    def encode_batch(batch: List[str]) -> np.ndarray:
+        return embedder.encode(batch, batch_size=len(batch), show_progress_bar=False, convert_to_numpy=True)
+
+    if batch_tokens:
+        X = encode_by_length(
+            passages,
+            lengths=token_lengths(embedder, passages),
+            encode_batch=encode_batch,
+            max_tokens=batch_tokens,
+        )
+    else:
+        X = np.vstack([encode_batch(passages[i : i + batch_size]) for i in range(0, len(passages), batch_size)])
+    X = X.astype("float32")
+    faiss.normalize_L2(X)
+    return X
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--pdf_dir", required=True, help="Directory with CV PDFs")
     ap.add_argument("--out_dir", required=True, help="Directory to persist indices")
     ap.add_argument("--chunk_chars", type=int, default=500)
     ap.add_argument("--overlap_chars", type=int, default=50)
-    ap.add_argument("--batch_size", type=int, default=64)
-    ap.add_argument("--force", action="store_true", help="Rebuild even if unchanged")
+    ap.add_argument("--batch_size", type=int, default=64, help="Passages per embedding batch with --batch_tokens 0")
+    ap.add_argument(
+        "--batch_tokens",
+        type=int,
+        default=8192,
+        help="Padded-token budget per embedding batch, passages grouped by length (0 = fixed --batch_size)",
+    )
+    ap.add_argument("--sort_window", type=int, default=1024, help="Chunks sorted by length together before embedding")
+    ap.add_argument("--queue_size", type=int, default=8, help="Items buffered between pipeline stages")
+    ap.add_argument("--workers", type=int, default=1, help="Processes for PDF extraction + chunking (0 = all CPUs)")
+    ap.add_argument("--force", action="store_true", help="Rebuild everything instead of only the changed PDFs")
+    ap.add_argument("--index_type", choices=INDEX_TYPES, default="flat", help="FAISS index (flat = exact)")
+    ap.add_argument("--nlist", type=int, default=None, help="IVF lists for ivf/ivfpq (default ~4*sqrt(chunks))")
+    ap.add_argument("--nprobe", type=int, default=8, help="IVF lists visited per query (ivf/ivfpq)")
+    ap.add_argument("--hnsw_m", type=int, default=32, help="HNSW neighbours per node")
+    ap.add_argument("--ef_construction", type=int, default=200, help="HNSW build-time candidate list size")
+    ap.add_argument("--ef_search", type=int, default=64, help="HNSW search-time candidate list size")
+    ap.add_argument("--pq_m", type=int, default=16, help="PQ sub-quantizers for ivfpq (must divide the dim)")
+    ap.add_argument("--pq_nbits", type=int, default=8, help="Bits per PQ code for ivfpq")
+    ap.add_argument(
+        "--embedding_cache",
+        default=None,
+        help=f"SQLite cache of passage embeddings (default: <out_dir>/{EMBEDDING_CACHE_FILENAME})",
+    )
+    ap.add_argument(
+        "--embedding_backend",
+        choices=EMBEDDING_BACKENDS,
+        default=os.getenv("EMBEDDING_BACKEND", "torch"),
+        help="Embedding runtime (default: EMBEDDING_BACKEND or torch)",
+    )
+    ap.add_argument("--no_embedding_cache", action="store_true", help="Encode every new chunk, ignoring the cache")
     args = ap.parse_args()
 
     pdf_dir = Path(args.pdf_dir)
@@ -88,93 +194,216 @@ def main():
         pdf_paths = sorted(pdf_dir.glob("*.pdf"))
     if not pdf_paths:
         raise SystemExit(f"No PDFs found in {pdf_dir.resolve()}")
+    pdf_files = {file_key(p, pdf_dir): p for p in pdf_paths}
 
     manifest_path = out_dir / "manifest.json"
-    current_fp = file_fingerprint(pdf_paths)
+    faiss_path = out_dir / "faiss.index"
+    old = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else None
+    config = {
+        "embedding_model": model_name,
+        "embedding_backend": args.embedding_backend,
+        "chunk_chars": args.chunk_chars,
+        "overlap_chars": args.overlap_chars,
+        "index_type": args.index_type,
+    }
 
-    if manifest_path.exists() and not args.force:
-        old = json.loads(manifest_path.read_text(encoding="utf-8"))
-        if old.get("fingerprint") == current_fp:
+    reason = "--force" if args.force else full_rebuild_reason(old, config)
+    if reason is None and not (faiss_path.exists() and ChunkStore.exists(out_dir)):
+        reason = "index files missing"
+
+    # Incremental update: start from the last build.
+    index: Optional[faiss.Index] = None
+    records: Dict[int, Dict[str, Any]] = {}
+    files: Dict[str, Dict[str, Any]] = {}
+    next_chunk_id = 0
+    to_index = sorted(pdf_files)
+    if reason is None:
+        diff = diff_files(old["files"], pdf_files)
+        files = {**old["files"], **diff.touched}
+        if not diff.has_changes:
+            if diff.touched:
+                manifest_path.write_text(json.dumps({**old, "files": files}, indent=2), encoding="utf-8")
             print("No changes detected. Skipping rebuild (use --force to rebuild).")
             return
-
-    print(f"Found {len(pdf_paths)} PDFs. Extracting text + chunking...")
-
-    records: List[Dict[str, Any]] = []
-    all_texts: List[str] = []
-    all_tokens: List[List[str]] = []
-
-    chunk_id = 0
-    for pdf_path in tqdm(pdf_paths, desc="PDFs"):
-        cv_id = pdf_path.parent.name if pdf_path.parent != pdf_dir else pdf_path.stem
-        text = extract_text_from_pdf(pdf_path)
-        chunks = chunk_text(text, chunk_chars=args.chunk_chars, overlap_chars=args.overlap_chars)
-
-        for i, ch in enumerate(chunks):
-            rec = {
-                "chunk_id": chunk_id,
-                "cv_id": cv_id,
-                "pdf_path": str(pdf_path),
-                "chunk_index": i,
-                "text": ch,
-            }
-            records.append(rec)
-            all_texts.append(ch)
-            all_tokens.append(tokenize(ch))
-            chunk_id += 1
+        index = faiss.read_index(str(faiss_path))
+        if (diff.changed or diff.removed) and not supports_remove(index):
+            reason = f"{args.index_type} indexes can't remove vectors"
+        else:
+            print(f"Incremental update: {len(diff.added)} added, {len(diff.changed)} changed, {len(diff.removed)} removed PDFs")
+            records = {rec["chunk_id"]: rec for rec in ChunkStore.open(out_dir, mmap=False)}
+            stale = [i for key in diff.changed + diff.removed for i in chunk_ids(files.pop(key))]
+            if stale:
+                index.remove_ids(np.asarray(stale, dtype=np.int64))
+                for i in stale:
+                    records.pop(i, None)
+            next_chunk_id = old["next_chunk_id"]
+            to_index = diff.added + diff.changed
+
+    if reason is not None:
+        print(f"Full rebuild ({reason}).")
+        index = None
+        records = {}
+        files = {}
+        next_chunk_id = 0
+        to_index = sorted(pdf_files)
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Indexing {len(to_index)} of {len(pdf_files)} PDFs ({workers} extraction workers)...")
+    dim = old["dim"] if index is not None else None
+    faiss_params = old["faiss"] if index is not None else None
+    cache = None
+    if not args.no_embedding_cache:
+        cache = EmbeddingCache(Path(args.embedding_cache) if args.embedding_cache else out_dir / EMBEDDING_CACHE_FILENAME)
+    embedder = None
+    # int8 vectors differ slightly from fp32 ones: the backend is part of the cache key.
+    cache_model = embedder_id(model_name, args.embedding_backend)
+    tokens: Dict[int, List[str]] = {}
+    # Full ivf / ivfpq builds train k-means on every vector, so those wait for the last batch.
+    pending: List[Tuple[np.ndarray, np.ndarray]] = []
+    progress = tqdm(desc="Indexed", unit="chunk")
+
+    def encode(passages: List[str]) -> np.ndarray:
+        nonlocal embedder
+        if embedder is None:
+            tqdm.write(f"Loading embedding model: {model_name} ({args.embedding_backend}) ...")
+            embedder = load_embedder(model_name, args.embedding_backend, onnx_dir=out_dir / "onnx")
+        return encode_passages(embedder, passages, batch_tokens=args.batch_tokens, batch_size=args.batch_size)
+
+    def chunk_stage(extracted: Iterator[Tuple[str, Tuple[List[str], str]]]) -> Iterator[List[Dict[str, Any]]]:
+        # Chunk ids are assigned here, in PDF order, whatever the number of workers.
+        nonlocal next_chunk_id
+        for key, (chunks, sha256) in extracted:
+            pdf_path = pdf_files[key]
+            cv_id = pdf_path.parent.name if pdf_path.parent != pdf_dir else pdf_path.stem
+            recs = make_records(chunks, pdf_path=pdf_path, cv_id=cv_id, first_chunk_id=next_chunk_id)
+            files[key] = file_entry(pdf_path, cv_id=cv_id, first_chunk_id=next_chunk_id, chunk_count=len(recs), sha256=sha256)
+            next_chunk_id += len(recs)
+            for rec in recs:
+                tokens[rec["chunk_id"]] = tokenize(rec["text"])
+            if recs:
+                yield recs
+
+    # Length bucketing needs a window of chunks to sort; fixed batches are formed as they come.
+    window = max(1, args.sort_window if args.batch_tokens else args.batch_size)
+
+    def embed_stage(pdf_records: Iterator[List[Dict[str, Any]]]) -> Iterator[Tuple[List[Dict[str, Any]], np.ndarray]]:
+        batch: List[Dict[str, Any]] = []
+        for recs in pdf_records:
+            batch.extend(recs)
+            while len(batch) >= window:
+                yield embed_batch(batch[:window])
+                batch = batch[window:]
+        if batch:
+            yield embed_batch(batch)
+
+    def embed_batch(batch: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        texts = [rec["text"] for rec in batch]
+        if cache is None:
+            return batch, encode([f"passage: {t}" for t in texts])
+        return batch, cached_passage_embeddings(texts, model_name=cache_model, cache=cache, encode=encode)
+
+    def write(item: Tuple[List[Dict[str, Any]], np.ndarray]) -> None:
+        # FAISS with the local embedding model (no API needed). Vectors are stored under their chunk id.
+        nonlocal index, faiss_params, dim
+        batch, X = item
+        ids = np.asarray([rec["chunk_id"] for rec in batch], dtype=np.int64)
+        records.update((rec["chunk_id"], rec) for rec in batch)
+        dim = X.shape[1]
+        if index is not None:
+            # On updates IVF centroids stay those of the last full build; --force retrains them.
+            index.add_with_ids(X, ids)
+        elif args.index_type in ("ivf", "ivfpq"):
+            pending.append((X, ids))
+        else:
+            index, faiss_params = new_index(X, ids)
+        progress.update(len(batch))
+
+    def new_index(X: np.ndarray, ids: np.ndarray) -> Tuple[faiss.Index, Dict[str, Any]]:
+        return build_faiss_index(
+            X,
+            ids=ids,
+            index_type=args.index_type,
+            nlist=args.nlist,
+            nprobe=args.nprobe,
+            hnsw_m=args.hnsw_m,
+            ef_construction=args.ef_construction,
+            ef_search=args.ef_search,
+            pq_m=args.pq_m,
+            pq_nbits=args.pq_nbits,
+        )
+
+    extracted = iter_extracted(
+        [pdf_files[key] for key in to_index],
+        chunk_chars=args.chunk_chars,
+        overlap_chars=args.overlap_chars,
+        workers=workers,
+    )
+    first_new_id = next_chunk_id
+    t0 = time.perf_counter()
+    stats = run_pipeline(
+        ("extract", zip(to_index, extracted)),
+        [("chunk", chunk_stage), ("embed", embed_stage)],
+        ("write", write),
+        maxsize=args.queue_size,
+    )
+    if pending:
+        print(f"Building FAISS index ({args.index_type})...")
+        index, faiss_params = new_index(np.vstack([X for X, _ in pending]), np.concatenate([ids for _, ids in pending]))
+        pending.clear()
+    progress.close()
+    print(format_stats(stats, wall_s=time.perf_counter() - t0, maxsize=args.queue_size))
+    if cache is not None:
+        print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses")
 
     if not records:
         raise SystemExit("No chunks produced. Check PDF text extraction.")
 
-    print(f"Total chunks: {len(records)}")
-
-    # BM25
-    print("Building BM25 index...")
-    bm25 = BM25Okapi(all_tokens)
-
-    # FAISS with local SentenceTransformer (no API needed)
-    print(f"Loading embedding model: {model_name} ...")
-    embedder = SentenceTransformer(model_name)
-
-    print("Embedding chunks + building FAISS index...")
-    vectors: List[np.ndarray] = []
-    for i in tqdm(range(0, len(all_texts), args.batch_size), desc="Embedding"):
-        batch = all_texts[i : i + args.batch_size]
-        passages = [f"passage: {t}" for t in batch]
-        vec = embedder.encode(passages, show_progress_bar=False, convert_to_numpy=True)
-        vectors.append(vec.astype("float32"))
-
-    X = np.vstack(vectors).astype("float32")
-    faiss.normalize_L2(X)
+    print(f"New chunks: {next_chunk_id - first_new_id}  |  total chunks: {len(records)}")
 
-    dim = X.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(X)
+    # BM25 statistics (N, avgdl, idf) depend on every chunk: refit from the chunk texts,
+    # which is cheap next to extraction and embedding. Removed ids stay as holes.
+    print("Building BM25 inverted index...")
+    live = sorted(records)
+    bm25 = SparseBM25.from_corpus(
+        [tokens.get(i) or tokenize(records[i]["text"]) if i in records else None for i in range(next_chunk_id)]
+    )
 
-    faiss_path = out_dir / "faiss.index"
     chunks_path = out_dir / "chunks.jsonl"
-    bm25_path = out_dir / "bm25.pkl"
 
     print(f"Saving FAISS index: {faiss_path}")
     faiss.write_index(index, str(faiss_path))
 
     print(f"Saving chunks metadata: {chunks_path}")
     with chunks_path.open("w", encoding="utf-8") as f:
-        for rec in records:
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        for i in live:
+            f.write(json.dumps(records[i], ensure_ascii=False) + "\n")
+
+    print(f"Saving columnar chunk store: {out_dir / CHUNK_STORE_DIRNAME}")
+    ChunkStore.from_records(records[i] for i in live).save(out_dir)
+
+    print(f"Saving BM25 inverted index: {out_dir / BM25_FILENAME}")
+    bm25.save(out_dir)
+
+    if cache is not None:
+        # Keep only the vectors of indexed text: older chunkings and removed CVs are evicted.
+        evicted = cache.prune(passage_key(cache_model, f"passage: {records[i]['text']}") for i in live)
+        print(f"Embedding cache: {len(cache)} entries ({evicted} evicted) in {cache.path}")
+        cache.close()
 
-    print(f"Saving BM25 object: {bm25_path}")
-    with bm25_path.open("wb") as f:
-        pickle.dump({"bm25": bm25, "chunk_count": len(records)}, f)
+    if next_chunk_id > 2 * len(records):
+        print(f"Note: {next_chunk_id - len(records)} chunk ids are unused after updates; --force compacts them.")
 
     manifest = {
-        "fingerprint": current_fp,
-        "pdf_count": len(pdf_paths),
+        "pdf_count": len(pdf_files),
         "chunk_count": len(records),
+        "next_chunk_id": next_chunk_id,
         "embedding_model": model_name,
+        "embedding_backend": args.embedding_backend,
         "dim": int(dim),
         "chunk_chars": args.chunk_chars,
         "overlap_chars": args.overlap_chars,
+        "faiss": faiss_params,
+        "files": files,
     }
     manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
     print(f"Saved manifest: {manifest_path}")
@@ -0,0 +1,74 @@
+# rag/rag_cli/embedding_parity.py — Compare embedding backends against PyTorch on the
+# indexed chunks: cosine similarity of the vectors and single-query encoding latency.
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from rag.chunk_store import ChunkStore
+from rag.embedding_backend import DEFAULT_PARITY_THRESHOLD, EMBEDDING_BACKENDS, load_embedder
+from rag.retrieval import DEFAULT_EMBEDDING_MODEL, load_chunks
+
+
+def _backends(value: str) -> List[str]:
+    names = [v.strip() for v in value.split(",") if v.strip()]
+    for name in names:
+        if name not in EMBEDDING_BACKENDS:
+            raise argparse.ArgumentTypeError(f"unknown backend {name!r} (use {', '.join(EMBEDDING_BACKENDS)})")
+    return names
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Embedding backend parity and latency vs torch")
+    ap.add_argument("--index_dir", required=True, help="Directory with rag_store indices")
+    ap.add_argument("--backends", type=_backends, default=["onnx", "onnx-int8"], help="Backends compared to torch")
+    ap.add_argument("--samples", type=int, default=256, help="Chunks encoded for the parity check")
+    ap.add_argument("--queries", type=int, default=50, help="Single queries timed per backend")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_PARITY_THRESHOLD, help="Minimum cosine to pass")
+    args = ap.parse_args()
+
+    index_dir = Path(args.index_dir)
+    if ChunkStore.exists(index_dir):
+        chunks = list(ChunkStore.open(index_dir))
+    else:
+        chunks = load_chunks(index_dir / "chunks.jsonl")
+    rng = np.random.default_rng(0)
+    picked = rng.choice(len(chunks), size=min(args.samples, len(chunks)), replace=False)
+    passages = [f"passage: {chunks[i]['text']}" for i in picked]
+    # Short queries made of the first words of sampled chunks.
+    queries = [f"query: {' '.join(chunks[i]['text'].split()[:8])}" for i in picked[: args.queries]]
+
+    model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    onnx_dir = Path(os.getenv("EMBEDDING_ONNX_DIR") or index_dir / "onnx")
+    print(f"Model: {model_name}  |  {len(passages)} passages, {len(queries)} queries")
+    print(f"{'backend':<10} {'min cos':>8} {'mean cos':>9} {'p50 ms':>8} {'p95 ms':>8}")
+
+    reference = None
+    failed = False
+    for backend in ["torch", *args.backends]:
+        model = load_embedder(model_name, backend, onnx_dir=onnx_dir)
+        X = model.encode(passages, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+        latencies = []
+        for q in queries:
+            t0 = time.perf_counter()
+            model.encode([q], convert_to_numpy=True, normalize_embeddings=True)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        if reference is None:
+            reference = X
+        cos = (reference * X).sum(axis=1) / (np.linalg.norm(reference, axis=1) * np.linalg.norm(X, axis=1))
+        failed |= bool(cos.min() < args.threshold)
+        print(
+            f"{backend:<10} {cos.min():>8.4f} {cos.mean():>9.4f} "
+            f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f}"
+        )
+    if failed:
+        print(f"Parity below {args.threshold} for at least one backend.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,40 @@
 # rag/retrieval.py — Shared retrieval logic for CLI and API.
 # Used by rag.rag_cli.search and (later) FastAPI endpoints.
+import hashlib
 import json
 import logging
 import os
 import pickle
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from rag.bm25 import BM25_FILENAME, SparseBM25
+from rag.cache import QueryEmbeddingCache, SearchResultCache, normalize_query
+from rag.chunk_store import CHUNK_STORE_DIRNAME, ChunkHits, ChunkStore, ScoredHits
+from rag.embedding_backend import load_embedder
+from rag.faiss_index import apply_search_params
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_EMBEDDING_MODEL = "intfloat/multilingual-e5-small"
 BM25_WORD_RE = re.compile(r"[A-Za-zÀ-ÿ0-9_+#.-]+")
+# IO_FLAG_MMAP_IFC (faiss >= 1.10) maps the vectors of flat/HNSW indexes as well,
+# IO_FLAG_MMAP alone only the inverted lists of IVF indexes.
+_FAISS_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+# Stages timed by run_search_with_model(timings=...).
+SEARCH_STAGES = ("tokenize", "encode", "faiss", "bm25", "rrf", "materialize")
+# Runs the BM25 leg of hybrid searches next to the query encoding + FAISS leg
+# (pointless on a single CPU, where the legs can only take turns).
+PARALLEL_LEGS = (os.cpu_count() or 1) > 1
+_bm25_pool: Optional[ThreadPoolExecutor] = None
+_bm25_pool_lock = threading.Lock()
 
 
 def load_chunks(chunks_path: Path) -> List[Dict[str, Any]]:
@@ -28,142 +47,277 @@ def load_chunks(chunks_path: Path) -> List[Dict[str, Any]]:
     return chunks
 
 
-def load_index(index_dir: Path) -> Dict[str, Any]:
-    """Load FAISS index, chunks metadata, and BM25 object from index_dir."""
+def index_version(index_dir: Path) -> str:
+    """
+    Identifier of one build of the index: hash of manifest.json (PDF fingerprint +
+    build parameters), or of the index files' size/mtime if there is no manifest.
+    """
+    h = hashlib.sha256()
+    manifest_path = index_dir / "manifest.json"
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        h.update(json.dumps(manifest, sort_keys=True).encode("utf-8"))
+    else:
+        names = (
+            "faiss.index",
+            "chunks.jsonl",
+            f"{CHUNK_STORE_DIRNAME}/meta.json",
+            "bm25.pkl",
+            BM25_FILENAME,
+        )
+        for name in names:
+            if not (index_dir / name).exists():
+                continue
+            st = (index_dir / name).stat()
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def load_index(
+    index_dir: Path,
+    *,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    mmap: bool = False,
+) -> Dict[str, Any]:
+    """
+    Load FAISS index, chunks metadata, and BM25 inverted index from index_dir.
+    Indexes built before bm25.bin existed only have a pickled BM25Okapi
+    (bm25.pkl); it is unpickled (only safe for trusted stores) and converted.
+
+    Approximate FAISS indexes get the nprobe / efSearch stored in manifest.json
+    at build time, unless overridden here.
+
+    With mmap, the FAISS vectors, the chunk store and the BM25 arrays are
+    memory-mapped read-only instead of read into each process: opening no longer
+    scales with the corpus and API workers share one page-cache copy. Indexes
+    without a chunk store (older builds) fall back to parsing chunks.jsonl.
+    """
     faiss_path = index_dir / "faiss.index"
     chunks_path = index_dir / "chunks.jsonl"
     bm25_path = index_dir / "bm25.pkl"
-    for p in (faiss_path, chunks_path, bm25_path):
+    required = [faiss_path]
+    if not ChunkStore.exists(index_dir):
+        required.append(chunks_path)
+    if not SparseBM25.exists(index_dir):
+        required.append(bm25_path)
+    for p in required:
         if not p.exists():
             raise FileNotFoundError(f"Missing index file: {p}. Run 'make -f rag/Makefile index' first.")
-    chunks = load_chunks(chunks_path)
-    with bm25_path.open("rb") as f:
-        bm25_data = pickle.load(f)
-    faiss_index = faiss.read_index(str(faiss_path))
+    if ChunkStore.exists(index_dir):
+        chunks = ChunkStore.open(index_dir, mmap=mmap)
+    else:
+        chunks = ChunkStore.from_records(load_chunks(chunks_path))
+    if SparseBM25.exists(index_dir):
+        # The payload checksum reads every page; a mapped index is left to fault in lazily.
+        bm25 = SparseBM25.load(index_dir, mmap=mmap, verify=not mmap)
+    else:
+        logger.warning("[RAG] %s has no %s, unpickling %s: rebuild the index", index_dir, BM25_FILENAME, bm25_path)
+        with bm25_path.open("rb") as f:
+            bm25 = SparseBM25.from_okapi(pickle.load(f)["bm25"])
+    faiss_index = faiss.read_index(str(faiss_path), _FAISS_MMAP_FLAGS if mmap else 0)
+    manifest_path = index_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    faiss_params = apply_search_params(faiss_index, manifest.get("faiss"), nprobe=nprobe, ef_search=ef_search)
+    logger.info("[RAG] FAISS index: %s", faiss_params)
     return {
         "faiss_index": faiss_index,
         "chunks": chunks,
-        "bm25": bm25_data["bm25"],
+        "bm25": bm25,
+        "version": index_version(index_dir),
+        "faiss_params": faiss_params,
     }
 
 
+def encode_query(
+    model: Any,
+    query: str,
+    cache: Optional[QueryEmbeddingCache] = None,
+    normalized: Optional[str] = None,
+) -> np.ndarray:
+    """
+    Embed a query as a (1, dim) float32 row with the e5 "query: " prefix.
+    With a cache, repeated queries (after normalize_query) skip the model.
+    normalized, if given, is normalize_query(query) already computed by the caller.
+    """
+
+    def _encode(text: str) -> np.ndarray:
+        return model.encode(
+            [f"query: {text}"],
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).astype("float32")
+
+    if normalized is None:
+        normalized = normalize_query(query)
+    if cache is None:
+        return _encode(normalized)
+    return cache.get_or_compute(normalized, _encode)
+
+
+def encode_queries(
+    model: Any,
+    queries: Sequence[str],
+    cache: Optional[QueryEmbeddingCache] = None,
+) -> np.ndarray:
+    """
+    encode_query for many queries: an (n, dim) float32 matrix. Distinct normalized
+    queries missing from the cache are encoded in one model.encode call.
+    """
+    normalized = [normalize_query(q) for q in queries]
+    vectors: Dict[str, np.ndarray] = {}
+    if cache is not None:
+        for text in dict.fromkeys(normalized):
+            vec = cache.get(text)
+            if vec is not None:
+                vectors[text] = vec
+    missing = [text for text in dict.fromkeys(normalized) if text not in vectors]
+    if missing:
+        X = model.encode(
+            [f"query: {text}" for text in missing],
+            batch_size=len(missing),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).astype("float32")
+        for i, text in enumerate(missing):
+            vectors[text] = X[i : i + 1]
+            if cache is not None:
+                cache.put(text, vectors[text])
+    if not normalized:
+        return np.empty((0, 0), dtype="float32")
+    return np.vstack([vectors[text] for text in normalized]).astype("float32", copy=False)
+
+
 def search_faiss(
     index: faiss.Index,
-    chunks: List[Dict[str, Any]],
+    chunks: Sequence[Dict[str, Any]],
     query_vec: np.ndarray,
     topk: int,
-) -> List[Dict[str, Any]]:
+) -> ChunkHits:
     scores, ids = index.search(query_vec, topk)
-    results = []
-    for score, idx in zip(scores[0], ids[0]):
-        if idx < 0:
-            continue
-        results.append({"score": float(score), **chunks[idx]})
-    return results
+    found = ids[0] >= 0
+    return ChunkHits(chunks, ids[0][found], scores[0][found])
+
+
+def bm25_tokenize(query: str) -> List[str]:
+    """BM25 tokens of a query, as the index was built with."""
+    return BM25_WORD_RE.findall(query.lower())
 
 
 def search_bm25(
-    bm25_obj: Any,
-    chunks: List[Dict[str, Any]],
+    bm25_obj: SparseBM25,
+    chunks: Sequence[Dict[str, Any]],
     query: str,
     topk: int,
-) -> List[Dict[str, Any]]:
-    tokens = BM25_WORD_RE.findall(query.lower())
-    scores = bm25_obj.get_scores(tokens)
-    top_ids = np.argsort(scores)[::-1][:topk]
-    results = []
-    for idx in top_ids:
-        if scores[idx] > 0:
-            results.append({"score": float(scores[idx]), **chunks[idx]})
-    return results
+    tokens: Optional[Sequence[str]] = None,
+) -> ChunkHits:
+    """tokens, if given, are bm25_tokenize(query) already computed by the caller."""
+    if tokens is None:
+        tokens = bm25_tokenize(query)
+    top_ids, scores = bm25_obj.top_k(tokens, topk)
+    return ChunkHits(chunks, top_ids, scores)
+
+
+def search_faiss_batch(
+    index: faiss.Index,
+    chunks: Sequence[Dict[str, Any]],
+    query_vecs: np.ndarray,
+    topk: int,
+) -> List[ChunkHits]:
+    """search_faiss for every row of query_vecs with one index.search call."""
+    if len(query_vecs) == 0:
+        return []
+    scores, ids = index.search(query_vecs, topk)
+    return [ChunkHits(chunks, row_ids[row_ids >= 0], row_scores[row_ids >= 0]) for row_ids, row_scores in zip(ids, scores)]
+
+
+def search_bm25_batch(
+    bm25_obj: SparseBM25,
+    chunks: Sequence[Dict[str, Any]],
+    queries: Sequence[str],
+    topk: int,
+) -> List[ChunkHits]:
+    """search_bm25 for every query, scored together by SparseBM25.top_k_batch."""
+    tokenized = [bm25_tokenize(q) for q in queries]
+    return [ChunkHits(chunks, ids, scores) for ids, scores in bm25_obj.top_k_batch(tokenized, topk)]
 
 
 def rerank_rrf(
-    faiss_results: List[Dict[str, Any]],
-    bm25_results: List[Dict[str, Any]],
+    faiss_results: ChunkHits,
+    bm25_results: ChunkHits,
     k: int = 60,
-) -> List[Tuple[float, Dict[str, Any]]]:
+) -> ScoredHits:
     """
     Reciprocal Rank Fusion: merge two ranked lists by rank position.
-    Returns list of (rrf_score, doc) sorted by score descending.
+    Returns (rrf_score, doc) pairs sorted by score descending; each doc keeps the
+    score of the list it came from (FAISS first). Works on chunk ids only: docs
+    are materialized when read.
     """
-    rrf_scores: Dict[Tuple[str, int], float] = {}
-    for rank, r in enumerate(faiss_results):
-        key = (r["cv_id"], r["chunk_index"])
-        rrf_scores[key] = rrf_scores.get(key, 0.0) + 1.0 / (k + rank + 1)
-    for rank, r in enumerate(bm25_results):
-        key = (r["cv_id"], r["chunk_index"])
-        rrf_scores[key] = rrf_scores.get(key, 0.0) + 1.0 / (k + rank + 1)
-
-    by_key: Dict[Tuple[str, int], Dict[str, Any]] = {}
-    for r in faiss_results:
-        key = (r["cv_id"], r["chunk_index"])
-        by_key[key] = r
-    for r in bm25_results:
-        key = (r["cv_id"], r["chunk_index"])
-        if key not in by_key:
-            by_key[key] = r
+    rrf_scores: Dict[int, float] = {}
+    doc_scores: Dict[int, float] = {}
+    for hits in (faiss_results, bm25_results):
+        for rank, (idx, score) in enumerate(zip(hits.ids.tolist(), hits.scores.tolist())):
+            rrf_scores[idx] = rrf_scores.get(idx, 0.0) + 1.0 / (k + rank + 1)
+            doc_scores.setdefault(idx, score)
 
-    sorted_keys = sorted(rrf_scores.keys(), key=lambda x: -rrf_scores[x])
-    return [(rrf_scores[key], by_key[key]) for key in sorted_keys]
+    sorted_ids = sorted(rrf_scores.keys(), key=lambda x: -rrf_scores[x])
+    hits = ChunkHits(faiss_results.chunks, sorted_ids, [doc_scores[i] for i in sorted_ids])
+    return ScoredHits([rrf_scores[i] for i in sorted_ids], hits)
 
 
-def run_search_with_model(
-    index_data: Dict[str, Any],
-    model: Any,
-    query: str,
-    topk: int = 5,
-    mode: str = "hybrid",
-    rrf_k: int = 60,
-) -> Dict[str, Any]:
-    """
-    Run search using pre-loaded index data and embedding model.
+def _bm25_executor() -> ThreadPoolExecutor:
+    global _bm25_pool
+    with _bm25_pool_lock:
+        if _bm25_pool is None:
+            _bm25_pool = ThreadPoolExecutor(thread_name_prefix="rag-bm25")
+        return _bm25_pool
 
-    Use this in API/long-lived processes to avoid reloading the model on every request.
-    index_data must come from load_index(). model must be a SentenceTransformer instance.
 
-    Returns a dict with:
-      - "results": main result list (reranked if mode hybrid/reranked, else faiss or bm25)
-      - "faiss_results": list or None
-      - "bm25_results": list or None
-      - "reranked": list of (score, doc) or None
-    """
-    faiss_index = index_data["faiss_index"]
-    chunks = index_data["chunks"]
-    bm25_obj = index_data["bm25"]
+def _timed(timings: Optional[Dict[str, float]], stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """fn(*args, **kwargs), adding its wall time to timings[stage] when timings is given."""
+    if timings is None:
+        return fn(*args, **kwargs)
+    t0 = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
 
-    faiss_query_str = f"query: {query}"
-    bm25_tokens = BM25_WORD_RE.findall(query.lower())
-    logger.info("[RAG] query=%r", query)
-    logger.info("[RAG] FAISS input=%r", faiss_query_str)
-    logger.info("[RAG] BM25 tokens=%s", bm25_tokens)
 
-    qvec = model.encode(
-        [faiss_query_str],
-        convert_to_numpy=True,
-        normalize_embeddings=True,
-    ).astype("float32")
+def _candidate_k(mode: str, topk: int) -> int:
+    """Hits fetched per leg: RRF fuses deeper lists than the final topk."""
+    return max(topk * 4, 20) if mode in ("hybrid", "reranked") else topk
 
-    candidate_k = max(topk * 4, 20) if mode in ("hybrid", "reranked") else topk
-    faiss_results: Optional[List[Dict[str, Any]]] = None
-    bm25_results: Optional[List[Dict[str, Any]]] = None
-    rrf_merged: Optional[List[Tuple[float, Dict[str, Any]]]] = None
 
-    if mode in ("faiss", "hybrid", "reranked"):
-        faiss_results = search_faiss(faiss_index, chunks, qvec, candidate_k)
+def _search_output(
+    query: str,
+    *,
+    mode: str,
+    topk: int,
+    rrf_k: int,
+    faiss_results: Optional[ChunkHits],
+    bm25_results: Optional[ChunkHits],
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Log the legs, fuse them with RRF when the mode asks for it and build the result dict.
+    Everything but RRF counts as "materialize": reading hits builds their doc dicts.
+    """
+    t0 = time.perf_counter()
+    rrf_merged: Optional[ScoredHits] = None
+    if faiss_results is not None:
         logger.info("[RAG] FAISS results (top %d):", len(faiss_results))
         for r in faiss_results[:topk]:
             logger.info("  [%.4f] %s chunk=%d | %s", r["score"], r["cv_id"], r["chunk_index"], r["text"][:80].replace("\n", " "))
 
-    if mode in ("bm25", "hybrid", "reranked"):
-        bm25_results = search_bm25(bm25_obj, chunks, query, candidate_k)
+    if bm25_results is not None:
         logger.info("[RAG] BM25 results (top %d):", len(bm25_results))
         for r in bm25_results[:topk]:
             logger.info("  [%.4f] %s chunk=%d | %s", r["score"], r["cv_id"], r["chunk_index"], r["text"][:80].replace("\n", " "))
 
     if mode in ("hybrid", "reranked") and faiss_results is not None and bm25_results is not None:
-        rrf_merged = rerank_rrf(faiss_results, bm25_results, k=rrf_k)
-        main_results = [doc for _, doc in rrf_merged[:topk]]
+        rrf_merged = _timed(timings, "rrf", rerank_rrf, faiss_results, bm25_results, k=rrf_k)
+        main_results = rrf_merged.hits[:topk]
         logger.info("[RAG] Reranked (RRF, k=%d):", rrf_k)
         for i, (score, r) in enumerate(rrf_merged[:topk], 1):
             logger.info("  #%d [%.5f] %s chunk=%d | %s", i, score, r["cv_id"], r["chunk_index"], r["text"][:80].replace("\n", " "))
@@ -174,6 +328,8 @@ def run_search_with_model(
     else:
         main_results = []
 
+    if timings is not None:
+        timings["materialize"] = time.perf_counter() - t0 - timings.get("rrf", 0.0)
     return {
         "query": query,
         "mode": mode,
@@ -185,6 +341,161 @@ def run_search_with_model(
     }
 
 
+def run_search_with_model(
+    index_data: Dict[str, Any],
+    model: Any,
+    query: str,
+    topk: int = 5,
+    mode: str = "hybrid",
+    rrf_k: int = 60,
+    query_cache: Optional[QueryEmbeddingCache] = None,
+    result_cache: Optional[SearchResultCache] = None,
+    parallel_legs: bool = PARALLEL_LEGS,
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Run search using pre-loaded index data and embedding model.
+
+    Use this in API/long-lived processes to avoid reloading the model on every request.
+    index_data must come from load_index(). model is a SentenceTransformer or any
+    embedder from rag.embedding_backend.load_embedder.
+    query_cache, if given, memoizes query embeddings (see rag.cache).
+    result_cache, if given, returns the stored result of an identical search
+    (same normalized query, parameters and index version) without running it.
+    With parallel_legs, hybrid modes run BM25 concurrently with encoding + FAISS,
+    so their latency approaches the slower leg instead of the sum of both.
+    timings, if given, receives the seconds spent in each of SEARCH_STAGES that ran
+    (none on a result cache hit).
+
+    Returns a dict with:
+      - "results": main result list (reranked if mode hybrid/reranked, else faiss or bm25)
+      - "faiss_results": ChunkHits or None
+      - "bm25_results": ChunkHits or None
+      - "reranked": ScoredHits of (score, doc) or None
+    The hit sequences only build a doc dict for the entries that are read.
+    """
+    cache_key = None
+    if result_cache is not None:
+        cache_key = SearchResultCache.key(
+            index_version=index_data.get("version", ""),
+            query=query,
+            mode=mode,
+            topk=topk,
+            rrf_k=rrf_k,
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info("[RAG] query=%r | result cache hit", query)
+            return {**cached, "query": query}
+
+    faiss_index = index_data["faiss_index"]
+    chunks = index_data["chunks"]
+    bm25_obj = index_data["bm25"]
+
+    # Both legs reuse these: the FAISS leg encodes `normalized`, BM25 scores `bm25_tokens`.
+    t0 = time.perf_counter()
+    normalized = normalize_query(query)
+    bm25_tokens = bm25_tokenize(query)
+    if timings is not None:
+        timings["tokenize"] = time.perf_counter() - t0
+    logger.info("[RAG] query=%r", query)
+    logger.info("[RAG] FAISS input=%r", f"query: {normalized}")
+    logger.info("[RAG] BM25 tokens=%s", bm25_tokens)
+
+    candidate_k = _candidate_k(mode, topk)
+    faiss_results: Optional[ChunkHits] = None
+    bm25_results: Optional[ChunkHits] = None
+    # BM25 doesn't need the query vector: in hybrid modes it starts on a pool thread
+    # and runs while the query is encoded and FAISS is searched here.
+    bm25_future = None
+    if mode in ("hybrid", "reranked") and parallel_legs:
+        bm25_future = _bm25_executor().submit(
+            _timed, timings, "bm25", search_bm25, bm25_obj, chunks, query, candidate_k, tokens=bm25_tokens
+        )
+
+    qvec = _timed(timings, "encode", encode_query, model, query, cache=query_cache, normalized=normalized)
+
+    if mode in ("faiss", "hybrid", "reranked"):
+        faiss_results = _timed(timings, "faiss", search_faiss, faiss_index, chunks, qvec, candidate_k)
+    if bm25_future is not None:
+        bm25_results = bm25_future.result()
+    elif mode in ("bm25", "hybrid", "reranked"):
+        bm25_results = _timed(timings, "bm25", search_bm25, bm25_obj, chunks, query, candidate_k, tokens=bm25_tokens)
+
+    out = _search_output(
+        query, mode=mode, topk=topk, rrf_k=rrf_k, faiss_results=faiss_results, bm25_results=bm25_results, timings=timings
+    )
+    if result_cache is not None:
+        result_cache.put(cache_key, out)
+    return out
+
+
+def run_search_batch(
+    index_data: Dict[str, Any],
+    model: Any,
+    queries: Sequence[str],
+    topk: int = 5,
+    mode: str = "hybrid",
+    rrf_k: int = 60,
+    query_cache: Optional[QueryEmbeddingCache] = None,
+    result_cache: Optional[SearchResultCache] = None,
+    parallel_legs: bool = PARALLEL_LEGS,
+) -> List[Dict[str, Any]]:
+    """
+    run_search_with_model for many queries, e.g. offline evaluation or bulk screening.
+    Returns one result dict per query, in order, with the same content as the
+    single-query path. The batch is processed in three steps: one model.encode call
+    for all queries, one FAISS search over the query matrix, and BM25 scoring of
+    all queries together (SparseBM25.top_k_batch), overlapping the first two
+    when parallel_legs is set, as in run_search_with_model.
+    """
+    outputs: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+    cache_keys: List[Any] = [None] * len(queries)
+    todo: List[int] = []
+    for i, query in enumerate(queries):
+        if result_cache is not None:
+            cache_keys[i] = SearchResultCache.key(
+                index_version=index_data.get("version", ""),
+                query=query,
+                mode=mode,
+                topk=topk,
+                rrf_k=rrf_k,
+            )
+            cached = result_cache.get(cache_keys[i])
+            if cached is not None:
+                outputs[i] = {**cached, "query": query}
+                continue
+        todo.append(i)
+    logger.info("[RAG] batch of %d queries (%d from the result cache)", len(queries), len(queries) - len(todo))
+
+    pending = [queries[i] for i in todo]
+    candidate_k = _candidate_k(mode, topk)
+    faiss_legs: List[Optional[ChunkHits]] = [None] * len(pending)
+    bm25_legs: List[Optional[ChunkHits]] = [None] * len(pending)
+    bm25_future = None
+    if pending and mode in ("hybrid", "reranked") and parallel_legs:
+        bm25_future = _bm25_executor().submit(
+            search_bm25_batch, index_data["bm25"], index_data["chunks"], pending, candidate_k
+        )
+    if pending and mode in ("faiss", "hybrid", "reranked"):
+        qvecs = encode_queries(model, pending, cache=query_cache)
+        faiss_legs = list(search_faiss_batch(index_data["faiss_index"], index_data["chunks"], qvecs, candidate_k))
+    if bm25_future is not None:
+        bm25_legs = list(bm25_future.result())
+    elif pending and mode in ("bm25", "hybrid", "reranked"):
+        bm25_legs = list(search_bm25_batch(index_data["bm25"], index_data["chunks"], pending, candidate_k))
+
+    for j, i in enumerate(todo):
+        logger.info("[RAG] query=%r", queries[i])
+        out = _search_output(
+            queries[i], mode=mode, topk=topk, rrf_k=rrf_k, faiss_results=faiss_legs[j], bm25_results=bm25_legs[j]
+        )
+        if result_cache is not None:
+            result_cache.put(cache_keys[i], out)
+        outputs[i] = out
+    return outputs
+
+
 def run_search(
     index_dir: Path,
     query: str,
@@ -199,6 +510,10 @@ def run_search(
     """
     index_dir = Path(index_dir)
     index_data = load_index(index_dir)
-    model_name = embedding_model or os.getenv("EMBEDDING_MODEL")
-    model = SentenceTransformer(model_name)
+    model_name = embedding_model or os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    model = load_embedder(
+        model_name,
+        os.getenv("EMBEDDING_BACKEND", "torch"),
+        onnx_dir=Path(os.getenv("EMBEDDING_ONNX_DIR") or index_dir / "onnx"),
+    )
     return run_search_with_model(index_data, model, query, topk, mode, rrf_k)
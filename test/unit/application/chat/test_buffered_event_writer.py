@@ -0,0 +1,166 @@
+import uuid
+from unittest.mock import Mock, call
+
+import pytest
+
+from app.application.chat.buffered_event_writer import BufferedRunEventWriter
+from app.application.chat.run_event_sequence import RunEventSequence
+from app.domain.chat.entities import RunEventType
+from app.domain.chat.repositories.run_event_repository import RunEventRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBufferedRunEventWriter:
+    def test_tokens_are_flushed_when_batch_is_full(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        event_repo = Mock(spec=RunEventRepository)
+        writer = BufferedRunEventWriter(
+            event_repo=event_repo, run_id=run_id, max_batch=3, max_delay=10.0, clock=FakeClock()
+        )
+
+        # Act: "a" opens the window and is written at once.
+        for text in ("a", "b", "c", "d", "e"):
+            writer.append(type=RunEventType.token, data={"text": text})
+
+        # Assert
+        assert event_repo.append_many.call_args_list == [
+            call(run_id=run_id, events=[(RunEventType.token, {"text": "a"})], first_seq=None),
+            call(
+                run_id=run_id,
+                events=[
+                    (RunEventType.token, {"text": "b"}),
+                    (RunEventType.token, {"text": "c"}),
+                    (RunEventType.token, {"text": "d"}),
+                ],
+                first_seq=None,
+            ),
+        ]
+        assert writer.pending == 1
+        event_repo.append.assert_not_called()
+
+    def test_tokens_are_flushed_when_time_window_elapses(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        clock = FakeClock()
+        event_repo = Mock(spec=RunEventRepository)
+        writer = BufferedRunEventWriter(
+            event_repo=event_repo, run_id=run_id, max_batch=100, max_delay=0.02, clock=clock
+        )
+
+        # Act
+        writer.append(type=RunEventType.token, data={"text": "a"})
+        clock.now = 0.01
+        writer.append(type=RunEventType.token, data={"text": "b"})
+        clock.now = 0.015
+        writer.append(type=RunEventType.token, data={"text": "c"})
+        assert event_repo.append_many.call_count == 1
+        clock.now = 0.03
+        writer.append(type=RunEventType.token, data={"text": "d"})
+
+        # Assert
+        assert event_repo.append_many.call_count == 2
+        assert len(event_repo.append_many.call_args.kwargs["events"]) == 3
+        assert writer.pending == 0
+
+    def test_first_token_is_written_without_waiting_for_a_second_one(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        event_repo = Mock(spec=RunEventRepository)
+        writer = BufferedRunEventWriter(
+            event_repo=event_repo, run_id=run_id, max_batch=100, max_delay=0.025, clock=FakeClock()
+        )
+
+        # Act
+        writer.append(type=RunEventType.token, data={"text": "Hello"})
+
+        # Assert
+        event_repo.append_many.assert_called_once_with(
+            run_id=run_id, events=[(RunEventType.token, {"text": "Hello"})], first_seq=None
+        )
+        assert writer.pending == 0
+
+    def test_buffered_token_is_overdue_after_max_delay_without_another_append(self):
+        # Arrange
+        clock = FakeClock()
+        event_repo = Mock(spec=RunEventRepository)
+        writer = BufferedRunEventWriter(
+            event_repo=event_repo, run_id=uuid.uuid4(), max_batch=100, max_delay=0.025, clock=clock
+        )
+        writer.append(type=RunEventType.token, data={"text": "a"})
+        clock.now = 0.005
+        writer.append(type=RunEventType.token, data={"text": "b"})
+
+        # Act: the LLM stalls; a streaming caller waits for the deadline, then flushes.
+        waiting = writer.seconds_to_deadline()
+        clock.now += waiting
+
+        # Assert
+        assert waiting == pytest.approx(0.02)
+        assert writer.overdue()
+        writer.flush()
+        assert event_repo.append_many.call_args.kwargs["events"] == [(RunEventType.token, {"text": "b"})]
+        assert not writer.overdue()
+        assert writer.seconds_to_deadline() == 0.025
+
+    def test_non_token_event_flushes_buffer_first(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        event_repo = Mock(spec=RunEventRepository)
+        writer = BufferedRunEventWriter(
+            event_repo=event_repo, run_id=run_id, max_batch=100, max_delay=10.0, clock=FakeClock()
+        )
+
+        # Act
+        writer.append(type=RunEventType.token, data={"text": "a"})
+        writer.append(type=RunEventType.final, data={"text": "a"})
+
+        # Assert
+        assert event_repo.mock_calls == [
+            call.append_many(run_id=run_id, events=[(RunEventType.token, {"text": "a"})], first_seq=None),
+            call.append(run_id=run_id, type=RunEventType.final, data={"text": "a"}, seq=None),
+        ]
+
+    def test_flush_with_empty_buffer_does_nothing(self):
+        # Arrange
+        event_repo = Mock(spec=RunEventRepository)
+        writer = BufferedRunEventWriter(event_repo=event_repo, run_id=uuid.uuid4())
+
+        # Act
+        writer.flush()
+
+        # Assert
+        event_repo.append_many.assert_not_called()
+
+    def test_sequence_assigns_contiguous_seqs_across_batches_and_single_events(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        event_repo = Mock(spec=RunEventRepository)
+        writer = BufferedRunEventWriter(
+            event_repo=event_repo,
+            run_id=run_id,
+            sequence=RunEventSequence(last_seq=4),
+            max_batch=2,
+            max_delay=10.0,
+            clock=FakeClock(),
+        )
+
+        # Act
+        writer.append(type=RunEventType.tool_end, data={})
+        writer.append(type=RunEventType.token, data={"text": "a"})
+        writer.append(type=RunEventType.token, data={"text": "b"})
+        writer.append(type=RunEventType.token, data={"text": "c"})
+        writer.append(type=RunEventType.final, data={"text": "abc"})
+
+        # Assert
+        assert event_repo.append.call_args_list[0].kwargs["seq"] == 5
+        assert event_repo.append_many.call_args_list[0].kwargs["first_seq"] == 6
+        assert event_repo.append_many.call_args_list[1].kwargs["first_seq"] == 7
+        assert event_repo.append.call_args_list[1].kwargs["seq"] == 9
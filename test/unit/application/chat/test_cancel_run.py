@@ -5,6 +5,7 @@ from unittest.mock import Mock
 import pytest
 
 from app.application.chat.cancel_run import CancelRunUseCase, CancelRunResult
+from app.application.chat.cancellation import RunCanceller
 from app.domain.chat.entities import Run, RunStatus
 from app.domain.chat.repositories.run_repository import RunRepository
 
@@ -161,3 +162,53 @@ class TestCancelRunUseCase:
         # Assert
         assert result.status == RunStatus.canceled.value
         run_repo.set_status.assert_called_once_with(run_id=run_id, status=RunStatus.canceled)
+
+    def test_execute_signals_canceller_for_active_run(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        run = Run(
+            id=run_id,
+            thread_id=uuid.uuid4(),
+            status=RunStatus.running,
+            created_at=datetime.now(),
+            started_at=datetime.now(),
+            finished_at=None,
+            error=None,
+        )
+
+        run_repo = Mock(spec=RunRepository)
+        run_repo.get_run.return_value = run
+        canceller = Mock(spec=RunCanceller)
+
+        use_case = CancelRunUseCase(run_repo=run_repo, canceller=canceller)
+
+        # Act
+        use_case.execute(run_id=run_id)
+
+        # Assert
+        canceller.cancel.assert_called_once_with(run_id=run_id)
+
+    def test_execute_does_not_signal_canceller_for_finished_run(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        run = Run(
+            id=run_id,
+            thread_id=uuid.uuid4(),
+            status=RunStatus.done,
+            created_at=datetime.now(),
+            started_at=datetime.now(),
+            finished_at=datetime.now(),
+            error=None,
+        )
+
+        run_repo = Mock(spec=RunRepository)
+        run_repo.get_run.return_value = run
+        canceller = Mock(spec=RunCanceller)
+
+        use_case = CancelRunUseCase(run_repo=run_repo, canceller=canceller)
+
+        # Act
+        use_case.execute(run_id=run_id)
+
+        # Assert
+        canceller.cancel.assert_not_called()
@@ -0,0 +1,122 @@
+import uuid
+from unittest.mock import Mock
+
+from app.application.chat.cancellation import LEASE_LOST, CancellationRegistry, CancellationToken
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCancellationToken:
+    def test_cancel_runs_callbacks_once(self):
+        # Arrange
+        token = CancellationToken()
+        callback = Mock()
+        token.add_callback(callback)
+
+        # Act
+        token.cancel()
+        token.cancel()
+
+        # Assert
+        assert token.canceled
+        assert token.is_canceled()
+        callback.assert_called_once_with()
+
+    def test_callback_added_after_cancel_runs_immediately(self):
+        # Arrange
+        token = CancellationToken()
+        token.cancel()
+        callback = Mock()
+
+        # Act
+        token.add_callback(callback)
+
+        # Assert
+        callback.assert_called_once_with()
+
+    def test_poll_is_rate_limited_to_poll_interval(self):
+        # Arrange
+        clock = FakeClock()
+        poll = Mock(return_value=False)
+        token = CancellationToken(poll=poll, poll_interval=1.0, clock=clock)
+
+        # Act
+        for _ in range(100):
+            token.is_canceled()
+        clock.now = 1.0
+        token.is_canceled()
+        token.is_canceled()
+
+        # Assert
+        assert poll.call_count == 1
+
+    def test_poll_reporting_canceled_cancels_token(self):
+        # Arrange
+        clock = FakeClock()
+        token = CancellationToken(poll=lambda: True, poll_interval=1.0, clock=clock)
+        callback = Mock()
+        token.add_callback(callback)
+
+        # Act
+        clock.now = 2.0
+        canceled = token.is_canceled()
+
+        # Assert
+        assert canceled
+        assert token.canceled
+        callback.assert_called_once_with()
+
+
+class TestCancellationRegistry:
+    def test_cancel_signals_registered_run(self):
+        # Arrange
+        registry = CancellationRegistry()
+        run_id = uuid.uuid4()
+        token = registry.register(run_id=run_id)
+
+        # Act
+        registry.cancel(run_id=run_id)
+
+        # Assert
+        assert token.canceled
+        assert token.reason == "canceled"
+
+    def test_cancel_keeps_the_first_reason(self):
+        # Arrange
+        registry = CancellationRegistry()
+        run_id = uuid.uuid4()
+        token = registry.register(run_id=run_id)
+
+        # Act
+        registry.cancel(run_id=run_id, reason=LEASE_LOST)
+        registry.cancel(run_id=run_id)
+
+        # Assert
+        assert token.reason == LEASE_LOST
+
+    def test_cancel_unknown_run_is_noop(self):
+        # Arrange
+        registry = CancellationRegistry()
+
+        # Act & Assert
+        registry.cancel(run_id=uuid.uuid4())
+
+    def test_discard_removes_run(self):
+        # Arrange
+        registry = CancellationRegistry()
+        run_id = uuid.uuid4()
+        token = registry.register(run_id=run_id)
+
+        # Act
+        registry.discard(run_id=run_id)
+        registry.cancel(run_id=run_id)
+
+        # Assert
+        assert run_id not in registry
+        assert not token.canceled
@@ -0,0 +1,63 @@
+import uuid
+from unittest.mock import Mock
+
+from app.application.chat.fake_run_executor import FakeRunExecutor
+from app.domain.chat.entities import RunEventType, RunStatus
+from app.domain.chat.repositories.run_event_repository import RunEventRepository
+from app.domain.chat.repositories.run_repository import RunRepository
+from app.domain.chat.repositories.thread_repository import ThreadRepository
+
+
+def _executor(event_repo=None):
+    statuses = {}
+    run_repo = Mock(spec=RunRepository)
+    run_repo.set_status.side_effect = lambda *, run_id, status, error=None: statuses.__setitem__(run_id, status)
+    run_repo.get_status.side_effect = lambda *, run_id: statuses.get(run_id)
+    executor = FakeRunExecutor(
+        run_repo=run_repo,
+        event_repo=event_repo or Mock(spec=RunEventRepository),
+        thread_repo=Mock(spec=ThreadRepository),
+    )
+    return executor, statuses
+
+
+class TestFakeRunExecutor:
+    def test_run_is_marked_error_when_its_seqs_cannot_be_read(self):
+        # Arrange
+        event_repo = Mock(spec=RunEventRepository)
+        event_repo.last_seq.side_effect = ConnectionError("db down")
+        executor, statuses = _executor(event_repo)
+        run_id = uuid.uuid4()
+
+        # Act
+        executor.start(thread_id=uuid.uuid4(), run_id=run_id)
+
+        # Assert
+        assert statuses[run_id] == RunStatus.error
+        assert run_id not in executor.cancellations
+        event_repo.append.assert_not_called()
+
+    def test_registry_cancel_stops_the_run(self, monkeypatch):
+        # Arrange: the run is canceled once its first token is written.
+        monkeypatch.setattr("app.application.chat.fake_run_executor.time.sleep", lambda s: None)
+        event_repo = Mock(spec=RunEventRepository)
+        event_repo.last_seq.return_value = 0
+        executor, statuses = _executor(event_repo)
+        run_id = uuid.uuid4()
+
+        def append(*, run_id, seq, type, data):
+            if type == RunEventType.token:
+                executor.cancellations.cancel(run_id=run_id)
+
+        event_repo.append.side_effect = append
+
+        # Act
+        executor.start(thread_id=uuid.uuid4(), run_id=run_id)
+
+        # Assert
+        types = [c.kwargs["type"] for c in event_repo.append.call_args_list]
+        assert types == [RunEventType.tool_start, RunEventType.tool_end, RunEventType.token, RunEventType.canceled]
+        assert [c.kwargs["seq"] for c in event_repo.append.call_args_list] == [1, 2, 3, 4]
+        assert statuses[run_id] == RunStatus.canceled
+        assert run_id not in executor.cancellations
+        executor.thread_repo.add_assistant_message.assert_not_called()
@@ -0,0 +1,418 @@
+import asyncio
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+pytest.importorskip("faiss")
+
+from app.application.chat.cancellation import LEASE_LOST  # noqa: E402
+from app.application.chat.rag_run_executor import RagRunExecutor  # noqa: E402
+from app.application.chat.run_heartbeat import RunHeartbeat  # noqa: E402
+from app.domain.chat.entities import RunEventType, RunStatus  # noqa: E402
+from app.domain.chat.repositories.run_event_repository import RunEventRepository  # noqa: E402
+from app.domain.chat.repositories.run_repository import RunRepository  # noqa: E402
+from app.domain.chat.repositories.thread_repository import ThreadRepository  # noqa: E402
+from app.domain.chat.services.llm_chat_service import LLMChatService  # noqa: E402
+from app.domain.chat.services.run_metrics import RunMetrics  # noqa: E402
+
+QUESTION = SimpleNamespace(role="user", content="who knows python?")
+
+
+class FakeEventRepo(RunEventRepository):
+    """Keeps (seq, type, data) rows like run_events, with the same unique (run_id, seq)."""
+
+    def __init__(self):
+        self.rows = []
+
+    def append(self, *, run_id, type, data, seq=None):
+        self._insert(seq, type, data)
+
+    def append_many(self, *, run_id, events, first_seq=None):
+        for i, (type, data) in enumerate(events):
+            self._insert(first_seq + i, type, data)
+
+    def last_seq(self, *, run_id):
+        return max((seq for seq, _, _ in self.rows), default=0)
+
+    def list_after(self, *, run_id, after_seq):
+        raise NotImplementedError
+
+    def _insert(self, seq, type, data):
+        assert seq not in {s for s, _, _ in self.rows}, f"duplicate seq {seq}"
+        self.rows.append((seq, type, data))
+
+    @property
+    def types(self):
+        return [type for _, type, _ in self.rows]
+
+
+class FakeLLM(LLMChatService):
+    """
+    Yields tokens; on_token(i) runs before token i is yielded (e.g. to cancel the run),
+    and astream sleeps `pause` seconds before the tokens listed in pause_before.
+    """
+
+    def __init__(self, tokens=("Hel", "lo", "!"), on_token=None, pause=0.0, pause_before=()):
+        self.tokens = tokens
+        self.on_token = on_token or (lambda i: None)
+        self.pause = pause
+        self.pause_before = pause_before
+        self.aborted = False
+
+    def stream(self, *, system, messages, max_tokens=1024, register_abort=None):
+        if register_abort is not None:
+            register_abort(self._abort)
+        for i, token in enumerate(self.tokens):
+            self.on_token(i)
+            if self.aborted:
+                raise ConnectionError("stream closed")
+            yield token
+
+    async def astream(self, *, system, messages, max_tokens=1024):
+        for i, token in enumerate(self.tokens):
+            if i in self.pause_before:
+                await asyncio.sleep(self.pause)
+            self.on_token(i)
+            await asyncio.sleep(0)
+            yield token
+
+    def _abort(self):
+        self.aborted = True
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def _executor(*, messages=(QUESTION,), llm=None, **kwargs):
+    statuses = {}
+    run_repo = Mock(spec=RunRepository)
+    run_repo.set_status.side_effect = lambda *, run_id, status, error=None: statuses.__setitem__(run_id, status)
+    run_repo.get_status.side_effect = lambda *, run_id: statuses.get(run_id)
+    thread_repo = Mock(spec=ThreadRepository)
+    thread_repo.list_messages.return_value = list(messages)
+
+    def search(query, *, timings=None):
+        timings.update({"encode": 0.004, "faiss": 0.001})
+        return {"results": [{"cv_id": "cv_001", "chunk_index": 0, "text": "Python developer"}]}
+
+    rag_service = Mock()
+    rag_service.search.side_effect = search
+    executor = RagRunExecutor(
+        run_repo=run_repo,
+        event_repo=FakeEventRepo(),
+        thread_repo=thread_repo,
+        rag_service=rag_service,
+        llm_service=llm or FakeLLM(),
+        **kwargs,
+    )
+    return executor, statuses
+
+
+class TestRunMetrics:
+    def test_finished_run_reports_its_timings(self):
+        # Arrange
+        metrics = Mock(spec=RunMetrics)
+        executor, _ = _executor(llm=FakeLLM(tokens=("Hel", "lo")), metrics=metrics)
+
+        # Act
+        executor.start(thread_id=uuid.uuid4(), run_id=uuid.uuid4())
+
+        # Assert
+        metrics.observe_run.assert_called_once()
+        timings = metrics.observe_run.call_args.args[0]
+        assert metrics.observe_run.call_args.kwargs == {"status": "done"}
+        assert timings.tokens == 2
+        assert timings.retrieval_stages == {"encode": 0.004, "faiss": 0.001}
+        assert timings.first_token_s is not None
+        assert timings.total_s >= timings.first_token_s >= timings.retrieval_s
+
+    def test_failed_run_is_reported_as_error(self):
+        # Arrange: a thread without messages fails before retrieval.
+        metrics = Mock(spec=RunMetrics)
+        executor, _ = _executor(messages=[], metrics=metrics)
+
+        # Act
+        executor.start(thread_id=uuid.uuid4(), run_id=uuid.uuid4())
+
+        # Assert
+        timings = metrics.observe_run.call_args.args[0]
+        assert metrics.observe_run.call_args.kwargs == {"status": "error"}
+        assert timings.first_token_s is None
+        assert timings.tokens_per_s is None
+
+
+class TestTokenLatency:
+    def test_async_tokens_are_published_while_the_llm_stalls(self):
+        # Arrange: "lo" arrives right after "Hel", then the LLM stalls before "!".
+        llm = FakeLLM(pause=0.3, pause_before={2})
+        executor, _ = _executor(llm=llm, event_batch_size=100, event_flush_interval=0.02)
+        run_id = uuid.uuid4()
+        published = []
+        llm.on_token = lambda i: published.append(executor.event_repo.types.count(RunEventType.token))
+
+        # Act
+        asyncio.run(executor.astart(thread_id=uuid.uuid4(), run_id=run_id))
+
+        # Assert: both tokens were written during the stall, before "!" was yielded.
+        assert published == [0, 1, 2]
+
+
+class TestSetupFailure:
+    def _failing_executor(self):
+        executor, statuses = _executor()
+        executor.event_repo.last_seq = Mock(side_effect=ConnectionError("db down"))
+        return executor, statuses
+
+    def test_sync_run_is_marked_error_when_its_seqs_cannot_be_read(self):
+        # Arrange
+        executor, statuses = self._failing_executor()
+        run_id = uuid.uuid4()
+
+        # Act
+        executor.start(thread_id=uuid.uuid4(), run_id=run_id)
+
+        # Assert
+        assert statuses[run_id] == RunStatus.error
+        assert run_id not in executor.cancellations
+        assert executor.event_repo.rows == []
+
+    def test_async_run_is_marked_error_when_its_seqs_cannot_be_read(self):
+        # Arrange
+        executor, statuses = self._failing_executor()
+        run_id = uuid.uuid4()
+
+        # Act
+        asyncio.run(executor.astart(thread_id=uuid.uuid4(), run_id=run_id))
+
+        # Assert
+        assert statuses[run_id] == RunStatus.error
+        assert run_id not in executor.cancellations
+
+
+class TestCancellation:
+    def test_registry_cancel_stops_the_sync_run_and_aborts_the_llm_stream(self):
+        # Arrange: the run is canceled while the LLM is producing its second token.
+        llm = FakeLLM()
+        executor, statuses = _executor(llm=llm)
+        run_id = uuid.uuid4()
+
+        def on_token(i):
+            if i == 1:
+                executor.cancellations.cancel(run_id=run_id)
+
+        llm.on_token = on_token
+
+        # Act
+        executor.start(thread_id=uuid.uuid4(), run_id=run_id)
+
+        # Assert
+        events = executor.event_repo
+        assert llm.aborted
+        assert events.types == [RunEventType.tool_start, RunEventType.tool_end, RunEventType.token, RunEventType.canceled]
+        assert statuses[run_id] == RunStatus.canceled
+        assert run_id not in executor.cancellations
+        executor.thread_repo.add_assistant_message.assert_not_called()
+
+
+class TestLeaseLoss:
+    def _heartbeat(self, executor, run_id, lose):
+        # Renews the lease until `lose` is set, then reports it lost like a requeued run.
+        return RunHeartbeat(
+            run_id=run_id,
+            beat=lambda: not lose.is_set(),
+            interval=0.01,
+            on_lost=lambda: executor.cancellations.cancel(run_id=run_id, reason=LEASE_LOST),
+        )
+
+    def test_sync_run_stops_without_writing_once_the_lease_is_lost(self):
+        # Arrange: the lease is lost while the LLM produces its second token.
+        llm = FakeLLM()
+        executor, statuses = _executor(llm=llm)
+        run_id = uuid.uuid4()
+        lose = threading.Event()
+
+        def on_token(i):
+            if i == 1:
+                lose.set()
+                assert _wait_for(lambda: llm.aborted)
+
+        llm.on_token = on_token
+
+        # Act
+        with self._heartbeat(executor, run_id, lose) as heartbeat:
+            executor.start(thread_id=uuid.uuid4(), run_id=run_id)
+
+        # Assert: nothing after the first token; status and events are left to the new owner.
+        assert heartbeat.lost
+        assert executor.event_repo.types == [RunEventType.tool_start, RunEventType.tool_end, RunEventType.token]
+        assert statuses[run_id] == RunStatus.running
+        assert run_id not in executor.cancellations
+        executor.thread_repo.add_assistant_message.assert_not_called()
+
+    def test_async_run_stops_without_writing_once_the_lease_is_lost(self):
+        # Arrange: the lease is lost after the first token, while the LLM stalls before the second.
+        metrics = Mock(spec=RunMetrics)
+        llm = FakeLLM(pause=0.5, pause_before={1})
+        executor, statuses = _executor(llm=llm, metrics=metrics)
+        run_id = uuid.uuid4()
+        lose = threading.Event()
+
+        def on_token(i):
+            if i == 0:
+                lose.set()
+
+        llm.on_token = on_token
+
+        async def scenario():
+            async with self._heartbeat(executor, run_id, lose) as heartbeat:
+                await executor.astart(thread_id=uuid.uuid4(), run_id=run_id)
+            return heartbeat
+
+        # Act
+        heartbeat = asyncio.run(scenario())
+
+        # Assert
+        assert heartbeat.lost
+        assert executor.event_repo.types == [RunEventType.tool_start, RunEventType.tool_end, RunEventType.token]
+        assert statuses[run_id] == RunStatus.running
+        assert metrics.observe_run.call_args.kwargs == {"status": LEASE_LOST}
+
+
+class TestAsyncRun:
+    def test_run_streams_tokens_then_final_and_done(self):
+        # Arrange
+        executor, statuses = _executor()
+        thread_id, run_id = uuid.uuid4(), uuid.uuid4()
+
+        # Act
+        asyncio.run(executor.astart(thread_id=thread_id, run_id=run_id))
+
+        # Assert
+        events = executor.event_repo
+        assert events.types == [
+            RunEventType.tool_start,
+            RunEventType.tool_end,
+            RunEventType.token,
+            RunEventType.token,
+            RunEventType.token,
+            RunEventType.final,
+            RunEventType.state,
+        ]
+        assert [seq for seq, _, _ in events.rows] == list(range(1, 8))
+        assert events.rows[-2][2] == {"text": "Hello!", "sources": ["cv_001"]}
+        assert events.rows[-1][2] == {"status": "done"}
+        assert statuses[run_id] == RunStatus.done
+        executor.thread_repo.add_assistant_message.assert_called_once_with(thread_id=thread_id, content="Hello!")
+        assert run_id not in executor.cancellations
+
+    def test_in_memory_cancel_stops_the_stream(self):
+        # Arrange: canceled through the registry while the LLM produces its second token.
+        llm = FakeLLM(tokens=("a", "b", "c", "d"))
+        executor, statuses = _executor(llm=llm)
+        run_id = uuid.uuid4()
+
+        def on_token(i):
+            if i == 1:
+                executor.cancellations.cancel(run_id=run_id)
+
+        llm.on_token = on_token
+
+        # Act
+        asyncio.run(executor.astart(thread_id=uuid.uuid4(), run_id=run_id))
+
+        # Assert: stopped without waiting for the DB poll.
+        assert executor.event_repo.types == [
+            RunEventType.tool_start,
+            RunEventType.tool_end,
+            RunEventType.token,
+            RunEventType.canceled,
+        ]
+        assert statuses[run_id] == RunStatus.canceled
+        executor.run_repo.get_status.assert_not_called()
+        executor.thread_repo.add_assistant_message.assert_not_called()
+
+    def test_cancel_seen_only_in_the_db_is_picked_up_by_polling(self):
+        # Arrange: another process marks the run canceled while the LLM stalls.
+        llm = FakeLLM(pause=2.0, pause_before={1})
+        executor, statuses = _executor(llm=llm, cancel_poll_interval=0.01)
+        run_id = uuid.uuid4()
+
+        def on_token(i):
+            if i == 0:
+                statuses[run_id] = RunStatus.canceled
+
+        llm.on_token = on_token
+
+        # Act
+        started = time.monotonic()
+        asyncio.run(executor.astart(thread_id=uuid.uuid4(), run_id=run_id))
+        elapsed = time.monotonic() - started
+
+        # Assert: the stalled stream was cut instead of waited out.
+        assert elapsed < 1.0
+        assert executor.event_repo.types[-1] == RunEventType.canceled
+        assert RunEventType.final not in executor.event_repo.types
+        assert statuses[run_id] == RunStatus.canceled
+        executor.thread_repo.add_assistant_message.assert_not_called()
+
+    def test_cancel_during_a_slow_flush_waits_for_it_before_writing_again(self):
+        # Arrange: the run is canceled while its first token batch is being written.
+        executor, statuses = _executor(llm=FakeLLM(tokens=("a", "b", "c")))
+        run_id = uuid.uuid4()
+        repo = executor.event_repo
+        overlaps = []
+        busy = threading.Lock()
+        insert = repo._insert
+
+        def slow_insert(seq, type, data):
+            if not busy.acquire(blocking=False):
+                overlaps.append((seq, type))
+                return insert(seq, type, data)
+            try:
+                if type == RunEventType.token:
+                    executor.cancellations.cancel(run_id=run_id)
+                    time.sleep(0.2)
+                insert(seq, type, data)
+            finally:
+                busy.release()
+
+        repo._insert = slow_insert
+
+        # Act
+        asyncio.run(executor.astart(thread_id=uuid.uuid4(), run_id=run_id))
+
+        # Assert: the canceled event was written after the flush, never alongside it.
+        assert overlaps == []
+        assert repo.types == [RunEventType.tool_start, RunEventType.tool_end, RunEventType.token, RunEventType.canceled]
+        assert statuses[run_id] == RunStatus.canceled
+
+    def test_deadline_flusher_sleeps_while_nothing_is_buffered(self):
+        # Arrange: the LLM takes 0.3s to start, i.e. a dozen flush intervals with an empty buffer.
+        executor, _ = _executor(llm=FakeLLM(tokens=("a", "b"), pause=0.3, pause_before={0}))
+        make_writer = executor._writer
+        deadline_checks = []
+
+        def writer(run_id):
+            events = make_writer(run_id)
+            seconds_to_deadline = events.seconds_to_deadline
+            events.seconds_to_deadline = lambda: deadline_checks.append(events.pending) or seconds_to_deadline()
+            return events
+
+        executor._writer = writer
+
+        # Act
+        asyncio.run(executor.astart(thread_id=uuid.uuid4(), run_id=uuid.uuid4()))
+
+        # Assert: the flusher only woke with tokens to publish, and every token was published.
+        assert 0 not in deadline_checks
+        assert executor.event_repo.types.count(RunEventType.token) == 2
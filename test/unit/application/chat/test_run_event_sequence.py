@@ -0,0 +1,42 @@
+import uuid
+from unittest.mock import Mock
+
+import pytest
+
+from app.application.chat.run_event_sequence import RunEventSequence
+from app.domain.chat.repositories.run_event_repository import RunEventRepository
+
+
+class TestRunEventSequence:
+    def test_for_run_resumes_after_last_persisted_seq(self):
+        # Arrange
+        run_id = uuid.uuid4()
+        event_repo = Mock(spec=RunEventRepository)
+        event_repo.last_seq.return_value = 7
+
+        # Act
+        sequence = RunEventSequence.for_run(event_repo=event_repo, run_id=run_id)
+
+        # Assert
+        assert sequence.next() == 8
+        event_repo.last_seq.assert_called_once_with(run_id=run_id)
+
+    def test_reserve_returns_first_of_contiguous_block(self):
+        # Arrange
+        sequence = RunEventSequence()
+
+        # Act
+        first = sequence.reserve(3)
+
+        # Assert
+        assert first == 1
+        assert sequence.last == 3
+        assert sequence.next() == 4
+
+    def test_reserve_rejects_empty_block(self):
+        # Arrange
+        sequence = RunEventSequence()
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            sequence.reserve(0)
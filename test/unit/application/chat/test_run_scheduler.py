@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+from app.application.chat.run_scheduler import RunScheduler
+from app.application.errors import RunQueueFullError
+
+
+class TestRunScheduler:
+    def test_submitted_runs_are_executed(self):
+        # Arrange
+        executed: list[uuid.UUID] = []
+        done = threading.Event()
+        run_ids = [uuid.uuid4() for _ in range(3)]
+
+        def run_fn(run_id, thread_id):
+            executed.append(run_id)
+            if len(executed) == len(run_ids):
+                done.set()
+
+        async def scenario():
+            scheduler = RunScheduler(run_fn=run_fn, max_concurrency=2, max_queue=10)
+            await scheduler.start()
+            for run_id in run_ids:
+                scheduler.submit(run_id=run_id, thread_id=uuid.uuid4())
+            await asyncio.to_thread(done.wait, 2.0)
+            await scheduler.stop()
+
+        # Act
+        asyncio.run(scenario())
+
+        # Assert
+        assert sorted(executed) == sorted(run_ids)
+
+    def test_concurrency_is_capped(self):
+        # Arrange
+        release = threading.Event()
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+
+        def run_fn(run_id, thread_id):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            release.wait(2.0)
+            with lock:
+                active -= 1
+
+        async def scenario():
+            scheduler = RunScheduler(run_fn=run_fn, max_concurrency=2, max_queue=10)
+            await scheduler.start()
+            for _ in range(5):
+                scheduler.submit(run_id=uuid.uuid4(), thread_id=uuid.uuid4())
+            await asyncio.sleep(0.1)
+            stats = scheduler.stats()
+            release.set()
+            await scheduler.stop()
+            return stats
+
+        # Act
+        stats = asyncio.run(scenario())
+
+        # Assert
+        assert peak == 2
+        assert stats.running == 2
+        assert stats.queued == 3
+
+    def test_submit_raises_when_queue_is_full(self):
+        # Arrange
+        release = threading.Event()
+
+        async def scenario():
+            scheduler = RunScheduler(
+                run_fn=lambda run_id, thread_id: release.wait(2.0),
+                max_concurrency=1,
+                max_queue=2,
+            )
+            await scheduler.start()
+            scheduler.submit(run_id=uuid.uuid4(), thread_id=uuid.uuid4())
+            await asyncio.sleep(0.05)  # first run picked up by the worker
+            positions = [
+                scheduler.submit(run_id=uuid.uuid4(), thread_id=uuid.uuid4()),
+                scheduler.submit(run_id=uuid.uuid4(), thread_id=uuid.uuid4()),
+            ]
+            has_capacity = scheduler.has_capacity()
+            with pytest.raises(RunQueueFullError):
+                scheduler.submit(run_id=uuid.uuid4(), thread_id=uuid.uuid4())
+            release.set()
+            await scheduler.stop()
+            return positions, has_capacity
+
+        # Act
+        positions, has_capacity = asyncio.run(scenario())
+
+        # Assert
+        assert positions == [0, 1]
+        assert has_capacity is False
+
+    def test_submit_before_start_raises(self):
+        # Arrange
+        scheduler = RunScheduler(run_fn=lambda run_id, thread_id: None)
+
+        # Act & Assert
+        with pytest.raises(RuntimeError):
+            scheduler.submit(run_id=uuid.uuid4(), thread_id=uuid.uuid4())
+
+    def test_async_run_fn_runs_on_the_event_loop(self):
+        # Arrange
+        max_seen = 0
+        running = 0
+        loop_threads: set[int] = set()
+
+        async def run_fn(run_id, thread_id):
+            nonlocal max_seen, running
+            loop_threads.add(threading.get_ident())
+            running += 1
+            max_seen = max(max_seen, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        async def scenario():
+            scheduler = RunScheduler(run_fn=run_fn, max_concurrency=50, max_queue=100)
+            await scheduler.start()
+            for _ in range(50):
+                scheduler.submit(run_id=uuid.uuid4(), thread_id=uuid.uuid4())
+            while scheduler.stats().queued or scheduler.stats().running:
+                await asyncio.sleep(0.01)
+            await scheduler.stop()
+            return threading.get_ident()
+
+        # Act
+        loop_thread = asyncio.run(scenario())
+
+        # Assert
+        assert loop_threads == {loop_thread}
+        assert max_seen == 50
@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import uuid
+
+from app.application.chat.run_heartbeat import RunHeartbeat
+from app.application.chat.run_worker import RunWorker
+
+
+def _run_in_thread(worker: RunWorker) -> threading.Thread:
+    t = threading.Thread(target=worker.run, daemon=True)
+    t.start()
+    return t
+
+
+class TestRunWorker:
+    def test_claims_until_queue_is_empty(self):
+        # Arrange
+        queue = [uuid.uuid4() for _ in range(5)]
+        executed: list[uuid.UUID] = []
+        lock = threading.Lock()
+        drained = threading.Event()
+
+        def claim_next() -> bool:
+            with lock:
+                if not queue:
+                    drained.set()
+                    return False
+                executed.append(queue.pop())
+                return True
+
+        worker = RunWorker(claim_next=claim_next, requeue_stale=lambda: (0, 0), concurrency=2, poll_interval=0.01)
+
+        # Act
+        t = _run_in_thread(worker)
+        assert drained.wait(2.0)
+        worker.stop()
+        t.join(2.0)
+
+        # Assert
+        assert len(executed) == 5
+        assert not t.is_alive()
+
+    def test_wake_interrupts_idle_poll(self):
+        # Arrange
+        calls = 0
+        second_call = threading.Event()
+
+        def claim_next() -> bool:
+            nonlocal calls
+            calls += 1
+            if calls >= 2:
+                second_call.set()
+            return False
+
+        worker = RunWorker(claim_next=claim_next, requeue_stale=lambda: (0, 0), concurrency=1, poll_interval=60.0)
+        t = _run_in_thread(worker)
+
+        # Act
+        worker.wake()
+
+        # Assert
+        assert second_call.wait(2.0)
+        worker.stop()
+        t.join(2.0)
+        assert not t.is_alive()
+
+    def test_failing_claim_does_not_kill_the_worker(self):
+        # Arrange
+        calls = 0
+        recovered = threading.Event()
+
+        def claim_next() -> bool:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("db down")
+            recovered.set()
+            return False
+
+        worker = RunWorker(claim_next=claim_next, requeue_stale=lambda: (0, 0), concurrency=1, poll_interval=0.01)
+
+        # Act
+        t = _run_in_thread(worker)
+
+        # Assert
+        assert recovered.wait(2.0)
+        worker.stop()
+        t.join(2.0)
+
+    def test_reaper_requeues_and_wakes_slots(self):
+        # Arrange
+        reaped = threading.Event()
+        claimed_after_reap = threading.Event()
+
+        def requeue_stale() -> tuple[int, int]:
+            reaped.set()
+            return (1, 0)
+
+        def claim_next() -> bool:
+            if reaped.is_set():
+                claimed_after_reap.set()
+            return False
+
+        worker = RunWorker(
+            claim_next=claim_next,
+            requeue_stale=requeue_stale,
+            concurrency=1,
+            poll_interval=60.0,
+            reap_interval=0.01,
+        )
+
+        # Act
+        t = _run_in_thread(worker)
+
+        # Assert
+        assert claimed_after_reap.wait(2.0)
+        worker.stop()
+        t.join(2.0)
+
+
+class TestRunHeartbeat:
+    def test_beats_while_running(self):
+        # Arrange
+        beats = threading.Semaphore(0)
+
+        def beat() -> bool:
+            beats.release()
+            return True
+
+        # Act
+        with RunHeartbeat(run_id=uuid.uuid4(), beat=beat, interval=0.01) as hb:
+            assert beats.acquire(timeout=2.0)
+            assert beats.acquire(timeout=2.0)
+
+        # Assert
+        assert hb.lost is False
+
+    def test_stops_when_lease_is_lost(self):
+        # Arrange
+        calls = 0
+        first = threading.Event()
+
+        def beat() -> bool:
+            nonlocal calls
+            calls += 1
+            first.set()
+            return False
+
+        # Act
+        with RunHeartbeat(run_id=uuid.uuid4(), beat=beat, interval=0.01) as hb:
+            assert first.wait(2.0)
+            threading.Event().wait(0.05)
+
+        # Assert
+        assert hb.lost is True
+        assert calls == 1
+
+    def test_lost_lease_calls_on_lost_once(self):
+        # Arrange
+        lost = threading.Semaphore(0)
+
+        # Act
+        with RunHeartbeat(run_id=uuid.uuid4(), beat=lambda: False, interval=0.01, on_lost=lost.release):
+            assert lost.acquire(timeout=2.0)
+            threading.Event().wait(0.05)
+
+        # Assert
+        assert not lost.acquire(blocking=False)
+
+    def test_async_heartbeat_beats_until_exit(self):
+        # Arrange
+        beats = 0
+
+        def beat() -> bool:
+            nonlocal beats
+            beats += 1
+            return True
+
+        async def scenario():
+            async with RunHeartbeat(run_id=uuid.uuid4(), beat=beat, interval=0.01) as hb:
+                await asyncio.sleep(0.1)
+            count = beats
+            await asyncio.sleep(0.05)
+            return hb, count
+
+        # Act
+        hb, count = asyncio.run(scenario())
+
+        # Assert
+        assert count >= 2
+        assert beats == count
+        assert hb.lost is False
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import uuid
+from datetime import datetime
+
+from app.domain.chat.entities import RunEvent, RunEventType
+from app.infrastructure.events.in_memory_bus import InMemoryRunEventBus
+
+
+def make_event(run_id: uuid.UUID, seq: int) -> RunEvent:
+    return RunEvent(
+        id=uuid.uuid4(),
+        run_id=run_id,
+        seq=seq,
+        type=RunEventType.token,
+        data={"text": f"t{seq}"},
+        created_at=datetime.now(),
+    )
+
+
+class TestInMemoryRunEventBus:
+    def test_subscriber_receives_events_published_from_another_thread(self):
+        # Arrange
+        bus = InMemoryRunEventBus()
+        run_id = uuid.uuid4()
+
+        async def scenario():
+            sub = bus.subscribe(run_id=run_id)
+            publisher = threading.Thread(
+                target=lambda: bus.publish(events=[make_event(run_id, 1), make_event(run_id, 2)])
+            )
+            publisher.start()
+            publisher.join()
+            events = await sub.get(timeout=1.0)
+            sub.close()
+            return events
+
+        # Act
+        events = asyncio.run(scenario())
+
+        # Assert
+        assert [e.seq for e in events] == [1, 2]
+
+    def test_subscriber_only_receives_its_own_run(self):
+        # Arrange
+        bus = InMemoryRunEventBus()
+        run_id = uuid.uuid4()
+        other_run_id = uuid.uuid4()
+
+        async def scenario():
+            sub = bus.subscribe(run_id=run_id)
+            bus.publish(events=[make_event(other_run_id, 1)])
+            events = await sub.get(timeout=0.05)
+            sub.close()
+            return events
+
+        # Act
+        events = asyncio.run(scenario())
+
+        # Assert
+        assert events == []
+
+    def test_get_drains_all_queued_batches(self):
+        # Arrange
+        bus = InMemoryRunEventBus()
+        run_id = uuid.uuid4()
+
+        async def scenario():
+            sub = bus.subscribe(run_id=run_id)
+            bus.publish(events=[make_event(run_id, 1)])
+            bus.publish(events=[make_event(run_id, 2)])
+            await asyncio.sleep(0)
+            events = await sub.get(timeout=1.0)
+            sub.close()
+            return events
+
+        # Act
+        events = asyncio.run(scenario())
+
+        # Assert
+        assert [e.seq for e in events] == [1, 2]
+
+    def test_close_unsubscribes(self):
+        # Arrange
+        bus = InMemoryRunEventBus()
+        run_id = uuid.uuid4()
+
+        async def scenario():
+            sub = bus.subscribe(run_id=run_id)
+            assert bus.subscriber_count(run_id=run_id) == 1
+            sub.close()
+            sub.close()  # idempotent
+
+        # Act
+        asyncio.run(scenario())
+
+        # Assert
+        assert bus.subscriber_count(run_id=run_id) == 0
+        bus.publish(events=[make_event(run_id, 1)])  # no subscribers: no-op
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("psycopg")
+pytest.importorskip("sqlalchemy")
+
+from app.domain.chat.entities import RunEvent, RunEventType  # noqa: E402
+from app.infrastructure.events.postgres_bus import (  # noqa: E402
+    _MAX_PAYLOAD_BYTES,
+    RUN_EVENTS_CHANNEL,
+    PostgresRunEventBus,
+    _encode_event,
+)
+
+
+class FakeListener:
+    """Stands in for PostgresNotifyListener: records handlers and NOTIFY payloads."""
+
+    def __init__(self):
+        self.handlers = {}
+        self.notified = []
+
+    def add_handler(self, channel, handler):
+        self.handlers[channel] = handler
+
+    def notify(self, channel, payload):
+        self.notified.append((channel, payload))
+
+    def close(self):
+        pass
+
+
+def make_event(run_id: uuid.UUID, seq: int, text: str = "", type: RunEventType = RunEventType.token) -> RunEvent:
+    return RunEvent(
+        id=uuid.uuid4(),
+        run_id=run_id,
+        seq=seq,
+        type=type,
+        data={"text": text or f"t{seq}"},
+        created_at=datetime.now(),
+    )
+
+
+def _receive(bus, run_id, deliver):
+    async def scenario():
+        sub = bus.subscribe(run_id=run_id)
+        deliver()
+        events = await sub.get(timeout=0.05)
+        sub.close()
+        return events
+
+    return asyncio.run(scenario())
+
+
+class TestPostgresRunEventBusPayloads:
+    def test_events_are_packed_into_few_payloads_under_the_limit(self):
+        # Arrange
+        bus = PostgresRunEventBus(listener=FakeListener())
+        run_id = uuid.uuid4()
+        events = [make_event(run_id, seq, text="token " * 20) for seq in range(1, 201)]
+
+        # Act
+        payloads = bus._payloads(events)
+
+        # Assert: every event is sent once, in order, in payloads that fit a NOTIFY.
+        assert 1 < len(payloads) < len(events)
+        assert all(len(p.encode("utf-8")) <= _MAX_PAYLOAD_BYTES for p in payloads)
+        sent = [raw["seq"] for p in payloads for raw in json.loads(p)["events"]]
+        assert sent == list(range(1, 201))
+
+    def test_payload_size_is_measured_in_utf8_bytes(self):
+        # Arrange: 3-byte characters, so the character count is a third of the byte count.
+        bus = PostgresRunEventBus(listener=FakeListener())
+        run_id = uuid.uuid4()
+        events = [make_event(run_id, seq, text="€ñ漢" * 100) for seq in range(1, 41)]
+
+        # Act
+        payloads = bus._payloads(events)
+
+        # Assert
+        assert all(len(p.encode("utf-8")) <= _MAX_PAYLOAD_BYTES for p in payloads)
+        assert [raw["data"]["text"] for p in payloads for raw in json.loads(p)["events"]] == ["€ñ漢" * 100] * 40
+
+    def test_oversize_event_is_skipped_for_gap_replay(self):
+        # Arrange: a long final answer between two tokens.
+        bus = PostgresRunEventBus(listener=FakeListener())
+        run_id = uuid.uuid4()
+        final = make_event(run_id, 2, text="á" * _MAX_PAYLOAD_BYTES, type=RunEventType.final)
+        events = [make_event(run_id, 1), final, make_event(run_id, 3)]
+
+        # Act
+        payloads = bus._payloads(events)
+
+        # Assert: the seq gap left by the final event is what subscribers replay from the DB.
+        assert [raw["seq"] for p in payloads for raw in json.loads(p)["events"]] == [1, 3]
+
+    def test_publish_notifies_the_run_events_channel(self):
+        # Arrange
+        listener = FakeListener()
+        bus = PostgresRunEventBus(listener=listener)
+        run_id = uuid.uuid4()
+
+        # Act
+        bus.publish(events=[make_event(run_id, 1), make_event(run_id, 2)])
+
+        # Assert
+        assert [channel for channel, _ in listener.notified] == [RUN_EVENTS_CHANNEL]
+
+
+class TestPostgresRunEventBusNotifications:
+    def test_events_from_another_process_reach_local_subscribers(self):
+        # Arrange
+        bus = PostgresRunEventBus(listener=FakeListener())
+        other = PostgresRunEventBus(listener=FakeListener())
+        run_id = uuid.uuid4()
+        (payload,) = other._payloads([make_event(run_id, 1, text="héllo"), make_event(run_id, 2)])
+
+        # Act
+        events = _receive(bus, run_id, lambda: bus._on_notify(payload))
+
+        # Assert
+        assert [(e.seq, e.type, e.data) for e in events] == [
+            (1, RunEventType.token, {"text": "héllo"}),
+            (2, RunEventType.token, {"text": "t2"}),
+        ]
+
+    def test_own_notifications_are_ignored(self):
+        # Arrange: publish() already delivered these locally.
+        listener = FakeListener()
+        bus = PostgresRunEventBus(listener=listener)
+        run_id = uuid.uuid4()
+        (payload,) = bus._payloads([make_event(run_id, 1)])
+
+        # Act
+        events = _receive(bus, run_id, lambda: listener.handlers[RUN_EVENTS_CHANNEL](payload))
+
+        # Assert
+        assert events == []
+
+    def test_decoded_event_round_trips(self):
+        # Arrange
+        other = PostgresRunEventBus(listener=FakeListener())
+        bus = PostgresRunEventBus(listener=FakeListener())
+        run_id = uuid.uuid4()
+        sent = make_event(run_id, 7, type=RunEventType.state)
+        (payload,) = other._payloads([sent])
+
+        # Act
+        (received,) = _receive(bus, run_id, lambda: bus._on_notify(payload))
+
+        # Assert
+        assert _encode_event(received) == _encode_event(sent)
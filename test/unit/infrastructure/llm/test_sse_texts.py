@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from app.infrastructure.llm import anthropic_chat, gemini_chat  # noqa: E402
+
+# Lines that carry no text in either API: SSE separators, comments used as
+# keep-alives, event names, and payloads that aren't JSON.
+_NO_TEXT_LINES = ["", ": keep-alive", ":", "event: ping", "data: not json", "retry: 3000"]
+
+
+def _data(payload: dict) -> str:
+    return "data: " + json.dumps(payload)
+
+
+class TestAnthropicSseTexts:
+    def test_text_delta_yields_its_text(self):
+        line = _data({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "Hel"}})
+
+        assert anthropic_chat._sse_texts(line) == ["Hel"]
+
+    @pytest.mark.parametrize("line", _NO_TEXT_LINES)
+    def test_blank_and_keep_alive_lines_yield_nothing(self, line):
+        assert anthropic_chat._sse_texts(line) == []
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {"type": "ping"},
+            {"type": "message_start", "message": {"id": "msg_1"}},
+            {"type": "content_block_delta", "delta": {"type": "input_json_delta", "partial_json": "{"}},
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": ""}},
+            {"type": "message_stop"},
+        ],
+    )
+    def test_events_without_text_yield_nothing(self, payload):
+        assert anthropic_chat._sse_texts(_data(payload)) == []
+
+    def test_done_sentinel_ends_the_stream(self):
+        assert anthropic_chat._sse_texts("data: [DONE]") is None
+
+
+class TestGeminiSseTexts:
+    def test_every_text_part_is_yielded_in_order(self):
+        line = _data(
+            {"candidates": [{"content": {"role": "model", "parts": [{"text": "Hel"}, {"text": "lo"}, {"text": ""}]}}]}
+        )
+
+        assert gemini_chat._sse_texts(line) == ["Hel", "lo"]
+
+    @pytest.mark.parametrize("line", _NO_TEXT_LINES)
+    def test_blank_and_keep_alive_lines_yield_nothing(self, line):
+        assert gemini_chat._sse_texts(line) == []
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {"candidates": []},
+            {"usageMetadata": {"promptTokenCount": 10}},
+            {"candidates": [{"finishReason": "STOP"}]},
+            {"candidates": [{"content": {"parts": ["not a dict"]}}]},
+        ],
+    )
+    def test_chunks_without_text_yield_nothing(self, payload):
+        assert gemini_chat._sse_texts(_data(payload)) == []
+
+    @pytest.mark.parametrize("line", ["data: [DONE]", "data: [DONE] "])
+    def test_done_sentinel_ends_the_stream(self, line):
+        assert gemini_chat._sse_texts(line) is None
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from app.domain.chat.services.run_metrics import RunTimings  # noqa: E402
+from app.infrastructure.metrics.prometheus_run_metrics import PrometheusRunMetrics  # noqa: E402
+
+
+class TestPrometheusRunMetrics:
+    def test_observed_runs_show_up_in_the_exposition(self):
+        # Arrange
+        metrics = PrometheusRunMetrics()
+        timings = RunTimings(
+            history_s=0.002,
+            retrieval_s=0.03,
+            first_token_s=0.4,
+            stream_s=2.0,
+            total_s=2.1,
+            tokens=100,
+            retrieval_stages={"encode": 0.02, "bm25": 0.003},
+        )
+
+        # Act
+        metrics.observe_run(timings, status="done")
+        body, content_type = metrics.render()
+
+        # Assert
+        text = body.decode()
+        assert content_type.startswith("text/plain")
+        assert 'rag_search_stage_seconds_count{stage="encode"} 1.0' in text
+        assert 'run_stage_seconds_sum{stage="first_token"} 0.4' in text
+        assert "run_tokens_per_second_sum 50.0" in text
+        assert 'runs_total{status="done"} 1.0' in text
+
+    def test_runs_without_tokens_skip_first_token_and_throughput(self):
+        # Arrange
+        metrics = PrometheusRunMetrics()
+
+        # Act
+        metrics.observe_run(RunTimings(total_s=0.01), status="error")
+
+        # Assert
+        text = metrics.render()[0].decode()
+        assert 'run_stage_seconds_count{stage="first_token"}' not in text
+        assert "run_tokens_per_second_count 0.0" in text
+        assert 'runs_total{status="error"} 1.0' in text
@@ -0,0 +1,227 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag.bm25 import BM25_FILENAME, SparseBM25
+
+
+def _corpus(seed: int = 7, docs: int = 300, vocab: int = 80) -> list[list[str]]:
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    # Zipf-like: a few words appear in most docs (negative IDF -> epsilon floor).
+    weights = [1.0 / (i + 1) for i in range(vocab)]
+    return [rng.choices(words, weights=weights, k=rng.randint(1, 40)) for _ in range(docs)]
+
+
+class TestSparseBM25:
+    def test_repeated_terms_count_per_occurrence(self):
+        # Arrange
+        bm25 = SparseBM25.from_corpus([["python", "java"], ["go"], ["rust", "go"]])
+
+        # Act
+        once = bm25.get_scores(["python"])
+        twice = bm25.get_scores(["python", "python"])
+
+        # Assert
+        assert twice[0] == pytest.approx(2 * once[0])
+
+    def test_unknown_terms_score_zero(self):
+        # Arrange
+        bm25 = SparseBM25.from_corpus([["python"], ["go"]])
+
+        # Act
+        top_ids, scores = bm25.top_k(["cobol"], 5)
+
+        # Assert
+        assert top_ids.size == 0 and scores.size == 0
+
+    def test_top_k_is_sorted_and_positive(self):
+        # Arrange
+        bm25 = SparseBM25.from_corpus(_corpus())
+
+        # Act
+        top_ids, scores = bm25.top_k(["w3", "w40", "w41"], 10)
+
+        # Assert
+        assert len(top_ids) == 10
+        assert all(scores > 0)
+        assert list(scores) == sorted(scores, reverse=True)
+
+
+    def test_removed_documents_keep_their_ids_and_leave_the_statistics(self):
+        # Arrange
+        corpus = _corpus()
+        live = [doc for i, doc in enumerate(corpus) if i % 3]
+        with_holes = [doc if i % 3 else None for i, doc in enumerate(corpus)]
+
+        # Act
+        compact = SparseBM25.from_corpus(live)
+        sparse = SparseBM25.from_corpus(with_holes)
+
+        # Assert: same scores, at the original doc ids.
+        scores = sparse.get_scores(["w3", "w40"])
+        assert sparse.num_docs == len(corpus)
+        assert sparse.params["avgdl"] == compact.params["avgdl"]
+        assert not scores[::3].any()
+        assert np.allclose(scores[[i for i in range(len(corpus)) if i % 3]], compact.get_scores(["w3", "w40"]))
+
+
+class TestParityWithRankBM25:
+    def test_scores_match_bm25okapi(self):
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        # Arrange
+        corpus = _corpus()
+        okapi = rank_bm25.BM25Okapi(corpus)
+        converted = SparseBM25.from_okapi(okapi)
+        fitted = SparseBM25.from_corpus(corpus)
+        queries = [["w0"], ["w1", "w5", "w60"], ["w2", "w2", "w79"], ["nope", "w10"]]
+
+        # Act & Assert
+        for q in queries:
+            expected = okapi.get_scores(q)
+            assert np.array_equal(converted.get_scores(q), expected)
+            assert np.array_equal(fitted.get_scores(q), expected)
+
+    def test_top_k_matches_full_sort(self):
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        # Arrange
+        corpus = _corpus(seed=11, docs=1000)
+        okapi = rank_bm25.BM25Okapi(corpus)
+        bm25 = SparseBM25.from_okapi(okapi)
+        query = ["w7", "w33", "w50"]
+
+        # Act
+        top_ids, _ = bm25.top_k(query, 20)
+
+        # Assert
+        scores = okapi.get_scores(query)
+        expected = sorted(np.flatnonzero(scores > 0), key=lambda i: (-scores[i], i))[:20]
+        assert list(top_ids) == expected
+
+
+class TestMaxScoreTopK:
+    def test_matches_exhaustive_scoring(self):
+        # Arrange
+        corpus = _corpus(seed=3, docs=2000, vocab=300)
+        bm25 = SparseBM25.from_corpus(corpus)
+        rng = random.Random(5)
+        queries = [[f"w{rng.randrange(300)}" for _ in range(rng.randint(1, 6))] for _ in range(50)]
+
+        for q in queries:
+            # Act
+            top_ids, top_scores = bm25.top_k(q, 10)
+
+            # Assert
+            scores = bm25.get_scores(q)
+            expected = sorted(np.flatnonzero(scores > 0), key=lambda i: (-scores[i], i))[:10]
+            assert list(top_ids) == expected
+            assert np.allclose(top_scores, scores[expected])
+
+    def test_batch_returns_exactly_what_top_k_returns(self):
+        # Arrange
+        corpus = _corpus(seed=3, docs=2000, vocab=300)
+        bm25 = SparseBM25.from_corpus(corpus)
+        rng = random.Random(9)
+        queries = [[f"w{rng.randrange(300)}" for _ in range(rng.randint(1, 6))] for _ in range(40)]
+        queries += [[], ["unknown"], ["w0", "w0", "w1"]]
+
+        # Act: blocks of 3 queries, so several bincount passes are used.
+        batch = bm25.top_k_batch(queries, 10, block_cells=3 * 2000)
+
+        # Assert
+        for q, (ids, scores) in zip(queries, batch):
+            expected_ids, expected_scores = bm25.top_k(q, 10)
+            np.testing.assert_array_equal(ids, expected_ids)
+            np.testing.assert_array_equal(scores, expected_scores)
+
+    def test_save_and_load_roundtrip(self, tmp_path):
+        # Arrange
+        bm25 = SparseBM25.from_corpus(_corpus())
+
+        # Act
+        bm25.save(tmp_path)
+        loaded = SparseBM25.load(tmp_path)
+
+        # Assert
+        assert SparseBM25.exists(tmp_path)
+        assert loaded.vocab == bm25.vocab
+        assert loaded.params == bm25.params
+        assert np.array_equal(loaded.max_scores, bm25.max_scores)
+        assert np.array_equal(loaded.get_scores(["w1", "w9"]), bm25.get_scores(["w1", "w9"]))
+
+    def test_mmap_load_scores_like_in_memory(self, tmp_path):
+        # Arrange
+        bm25 = SparseBM25.from_corpus(_corpus())
+        bm25.save(tmp_path)
+
+        # Act
+        mapped = SparseBM25.load(tmp_path, mmap=True)
+
+        # Assert
+        assert isinstance(mapped.data, np.memmap)
+        assert np.array_equal(mapped.top_k(["w2", "w30"], 5)[0], bm25.top_k(["w2", "w30"], 5)[0])
+
+    def test_empty_index_roundtrip(self, tmp_path):
+        # Arrange
+        SparseBM25.from_corpus([[], []]).save(tmp_path)
+
+        # Act
+        loaded = SparseBM25.load(tmp_path)
+
+        # Assert
+        assert loaded.vocab == {}
+        assert loaded.num_docs == 2
+        assert loaded.top_k(["python"], 3)[0].size == 0
+
+
+class TestBinaryFormat:
+    def test_arrays_are_aligned_views_of_the_file(self, tmp_path):
+        # Arrange
+        SparseBM25.from_corpus(_corpus()).save(tmp_path)
+
+        # Act
+        loaded = SparseBM25.load(tmp_path, mmap=True)
+
+        # Assert
+        assert not loaded.data.flags.owndata
+        assert loaded.data.ctypes.data % 8 == 0
+        assert loaded.indptr.dtype == np.int64
+
+    def test_payload_corruption_is_detected(self, tmp_path):
+        # Arrange
+        path = SparseBM25.from_corpus(_corpus()).save(tmp_path)
+        raw = bytearray(path.read_bytes())
+        raw[-3] ^= 0xFF
+        path.write_bytes(bytes(raw))
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="payload checksum"):
+            SparseBM25.load(tmp_path)
+        SparseBM25.load(tmp_path, verify=False)
+
+    def test_header_corruption_is_detected(self, tmp_path):
+        # Arrange
+        path = SparseBM25.from_corpus(_corpus()).save(tmp_path)
+        raw = bytearray(path.read_bytes())
+        raw[30] ^= 0xFF
+        path.write_bytes(bytes(raw))
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="header checksum"):
+            SparseBM25.load(tmp_path, verify=False)
+
+    def test_rejects_other_files_and_versions(self, tmp_path):
+        # Arrange
+        path = SparseBM25.from_corpus(_corpus()).save(tmp_path)
+        raw = bytearray(path.read_bytes())
+
+        # Act / Assert
+        raw[8] = 99
+        path.write_bytes(bytes(raw))
+        with pytest.raises(ValueError, match="format version 99"):
+            SparseBM25.load(tmp_path)
+        (tmp_path / BM25_FILENAME).write_bytes(b"\x80\x04not a bm25 index at all")
+        with pytest.raises(ValueError, match="not a BM25 index"):
+            SparseBM25.load(tmp_path)
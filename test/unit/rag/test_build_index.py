@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("faiss")
+
+from rag.rag_cli import build_index  # noqa: E402
+
+
+def slow_first_extract(pdf_path, *, chunk_chars, overlap_chars):
+    """Stands in for extract_chunks in worker processes: earlier PDFs finish last."""
+    index = int(Path(pdf_path).stem)
+    time.sleep(0.05 * max(0, 4 - index))
+    return [f"{pdf_path.stem}:{chunk_chars}:{overlap_chars}"], f"hash-{index}"
+
+
+class RecordingPool:
+    """ProcessPoolExecutor stand-in that runs submissions inline and counts them."""
+
+    def __init__(self, max_workers):
+        self.submitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class TestIterExtracted:
+    def test_pool_results_come_back_in_input_order(self, monkeypatch):
+        # Arrange
+        monkeypatch.setattr(build_index, "extract_chunks", slow_first_extract)
+        paths = [Path(f"{i}.pdf") for i in range(8)]
+
+        # Act
+        results = list(build_index.iter_extracted(paths, chunk_chars=100, overlap_chars=10, workers=2))
+
+        # Assert
+        assert results == [([f"{i}:100:10"], f"hash-{i}") for i in range(8)]
+
+    def test_pool_keeps_at_most_two_submissions_per_worker_in_flight(self, monkeypatch):
+        # Arrange
+        pools = []
+
+        def make_pool(max_workers):
+            pools.append(RecordingPool(max_workers))
+            return pools[-1]
+
+        monkeypatch.setattr(build_index, "extract_chunks", slow_first_extract)
+        monkeypatch.setattr(build_index, "ProcessPoolExecutor", make_pool)
+        paths = [Path(f"{i}.pdf") for i in range(20)]
+
+        # Act: consume one result at a time, like the indexing loop, and count what
+        # was submitted but not yielded yet.
+        in_flight = []
+        for read, _ in enumerate(build_index.iter_extracted(paths, chunk_chars=100, overlap_chars=10, workers=3)):
+            in_flight.append(pools[0].submitted - read)
+
+        # Assert
+        assert max(in_flight) == 2 * 3
+        assert pools[0].submitted == 20
@@ -0,0 +1,159 @@
+import pytest
+
+from rag.cache import NORMALIZATION_VERSION, QueryEmbeddingCache, SearchResultCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestNormalizeQuery:
+    def test_collapses_whitespace_and_keeps_case(self):
+        assert normalize_query("  Who knows\tPython?\n ") == "Who knows Python?"
+
+    def test_applies_nfkc(self):
+        assert normalize_query("ｋｕｂｅｒｎｅｔｅｓ") == "kubernetes"
+
+
+class TestQueryEmbeddingCache:
+    def test_miss_then_hit(self):
+        # Arrange
+        cache = QueryEmbeddingCache(model_name="m")
+        calls: list[str] = []
+
+        def compute(text):
+            calls.append(text)
+            return [0.1, 0.2]
+
+        # Act
+        first = cache.get_or_compute("python", compute)
+        second = cache.get_or_compute("python", compute)
+
+        # Assert
+        assert first == second == [0.1, 0.2]
+        assert calls == ["python"]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+    def test_evicts_least_recently_used(self):
+        # Arrange
+        cache = QueryEmbeddingCache(model_name="m", max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        # Act
+        cache.put("c", 3)
+
+        # Assert
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_expire_after_ttl(self):
+        # Arrange
+        clock = FakeClock()
+        cache = QueryEmbeddingCache(model_name="m", ttl_seconds=10.0, clock=clock)
+        cache.put("a", 1)
+
+        # Act
+        clock.now += 10.0
+
+        # Assert
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 0
+
+    def test_save_and_load_roundtrip(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        # Arrange
+        path = tmp_path / "query_cache.npz"
+        cache = QueryEmbeddingCache(model_name="m")
+        cache.put("python", np.ones((1, 4), dtype="float32"))
+
+        # Act
+        saved = cache.save(path)
+        warm = QueryEmbeddingCache(model_name="m")
+        loaded = warm.load(path)
+
+        # Assert
+        assert saved == loaded == 1
+        assert warm.get("python").shape == (1, 4)
+
+    def test_saved_file_loads_without_pickle(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        # Arrange
+        path = tmp_path / "query_cache.npz"
+        cache = QueryEmbeddingCache(model_name="m")
+        cache.put("ingeniero de datos, Málaga", np.ones((1, 4), dtype="float32"))
+        cache.put("python", np.zeros((1, 4), dtype="float32"))
+
+        # Act
+        cache.save(path)
+        warm = QueryEmbeddingCache(model_name="m")
+        loaded = warm.load(path)
+
+        # Assert
+        with np.load(path, allow_pickle=False) as data:
+            assert sorted(data["queries"].tolist()) == ["ingeniero de datos, Málaga", "python"]
+        assert loaded == 2
+        assert warm.get("ingeniero de datos, Málaga").sum() == 4
+
+    def test_load_rejects_files_that_need_pickle(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        # Arrange: an object array, as an untrusted file could carry.
+        path = tmp_path / "query_cache.npz"
+        np.savez(
+            path,
+            model_name=np.array("m"),
+            normalization=np.array(NORMALIZATION_VERSION),
+            queries=np.array(["python"], dtype=object),
+            stored_at=np.array([1000.0]),
+            vectors=np.ones((1, 4), dtype="float32"),
+        )
+
+        # Act
+        loaded = QueryEmbeddingCache(model_name="m", clock=FakeClock(1000.0)).load(path)
+
+        # Assert
+        assert loaded == 0
+
+    def test_load_ignores_cache_of_another_model(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        # Arrange
+        path = tmp_path / "query_cache.npz"
+        cache = QueryEmbeddingCache(model_name="m")
+        cache.put("python", np.ones((1, 4), dtype="float32"))
+        cache.save(path)
+
+        # Act
+        loaded = QueryEmbeddingCache(model_name="other").load(path)
+
+        # Assert
+        assert loaded == 0
+
+
+class TestSearchResultCache:
+    def test_key_normalizes_query(self):
+        # Arrange
+        a = SearchResultCache.key(index_version="v", query="who knows  Kubernetes ", mode="hybrid", topk=5, rrf_k=60)
+        b = SearchResultCache.key(index_version="v", query="who knows Kubernetes", mode="hybrid", topk=5, rrf_k=60)
+
+        # Assert
+        assert a == b
+
+    def test_index_version_and_params_are_part_of_the_key(self):
+        # Arrange
+        cache = SearchResultCache(max_entries=8)
+        key = SearchResultCache.key(index_version="v1", query="q", mode="hybrid", topk=5, rrf_k=60)
+        cache.put(key, {"results": [1]})
+
+        # Act & Assert
+        assert cache.get(key) == {"results": [1]}
+        assert cache.get(SearchResultCache.key(index_version="v2", query="q", mode="hybrid", topk=5, rrf_k=60)) is None
+        assert cache.get(SearchResultCache.key(index_version="v1", query="q", mode="bm25", topk=5, rrf_k=60)) is None
+        assert cache.get(SearchResultCache.key(index_version="v1", query="q", mode="hybrid", topk=10, rrf_k=60)) is None
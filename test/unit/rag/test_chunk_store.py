@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag.chunk_store import ChunkHits, ChunkStore, ScoredHits
+
+
+def _records() -> list[dict]:
+    return [
+        {"chunk_id": 0, "cv_id": "cv_001", "pdf_path": "cvs/cv_001/cv.pdf", "chunk_index": 0, "text": "Python, Docker"},
+        {"chunk_id": 1, "cv_id": "cv_001", "pdf_path": "cvs/cv_001/cv.pdf", "chunk_index": 1, "text": "Señor développeur"},
+        {"chunk_id": 2, "cv_id": "cv_002", "pdf_path": "cvs/cv_002/cv.pdf", "chunk_index": 0, "text": ""},
+    ]
+
+
+class TestChunkStore:
+    @pytest.mark.parametrize("mmap", [True, False])
+    def test_roundtrip_by_chunk_id(self, tmp_path, mmap):
+        # Arrange
+        ChunkStore.from_records(_records()).save(tmp_path)
+
+        # Act
+        store = ChunkStore.open(tmp_path, mmap=mmap)
+
+        # Assert
+        assert ChunkStore.exists(tmp_path)
+        assert len(store) == 3
+        assert store[1] == _records()[1]
+        assert store[-1] == _records()[2]
+        assert list(store) == _records()
+
+    def test_out_of_range(self, tmp_path):
+        # Arrange
+        ChunkStore.from_records(_records()).save(tmp_path)
+        store = ChunkStore.open(tmp_path)
+
+        # Act / Assert
+        with pytest.raises(IndexError):
+            store[3]
+
+    def test_empty_store(self, tmp_path):
+        # Arrange
+        ChunkStore.from_records([]).save(tmp_path)
+
+        # Act
+        store = ChunkStore.open(tmp_path)
+
+        # Assert
+        assert len(store) == 0
+        assert list(store) == []
+
+    def test_cv_ids_and_paths_are_interned(self):
+        # Act
+        store = ChunkStore.from_records(_records())
+
+        # Assert
+        assert store.cv_ids == ["cv_001", "cv_002"]
+        assert store.cv_idx.tolist() == [0, 0, 1]
+        assert store.cv_id(1) == "cv_001"
+        assert store.text(1) == "Señor développeur"
+
+    def test_missing_chunk_ids_are_removed_rows(self, tmp_path):
+        # Arrange
+        records = [_records()[0], {**_records()[2], "chunk_id": 3}]
+        ChunkStore.from_records(records).save(tmp_path)
+
+        # Act
+        store = ChunkStore.open(tmp_path)
+
+        # Assert
+        assert len(store) == 4
+        assert [store.is_live(i) for i in range(4)] == [True, False, False, True]
+        assert list(store) == records
+        with pytest.raises(KeyError):
+            store[1]
+
+    def test_records_must_be_in_chunk_id_order(self):
+        with pytest.raises(ValueError, match="chunk id order"):
+            ChunkStore.from_records(list(reversed(_records())))
+
+
+class TestChunkHits:
+    def test_materializes_only_the_hits_read(self):
+        # Arrange
+        store = MagicMock(spec=ChunkStore)
+        store.__getitem__.side_effect = lambda idx: _records()[idx]
+        hits = ChunkHits(store, np.array([2, 0, 1]), np.array([3.0, 2.0, 1.0]))
+
+        # Act
+        top = hits[:2]
+        again = hits[0]
+
+        # Assert
+        assert top == [{"score": 3.0, **_records()[2]}, {"score": 2.0, **_records()[0]}]
+        assert again is top[0]
+        assert store.__getitem__.call_count == 2
+
+    def test_scored_hits_pair_rank_scores_with_docs(self):
+        # Arrange
+        hits = ChunkHits(ChunkStore.from_records(_records()), np.array([1, 2]), np.array([0.5, 0.25]))
+
+        # Act
+        pairs = ScoredHits(np.array([0.03, 0.02]), hits)
+
+        # Assert
+        assert len(pairs) == 2
+        assert pairs[1] == (0.02, {"score": 0.25, **_records()[2]})
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag.embedding_backend import OnnxEmbedder, embedder_id, load_embedder, parity  # noqa: E402
+
+
+class FakeTokenizer:
+    """One token per word (id = word length), right-padded with 0."""
+
+    def __call__(self, texts, *, padding, truncation, max_length, return_tensors):
+        ids = [[len(w) for w in t.split()][:max_length] for t in texts]
+        width = max(len(i) for i in ids)
+        return {
+            "input_ids": np.asarray([i + [0] * (width - len(i)) for i in ids]),
+            "attention_mask": np.asarray([[1] * len(i) + [0] * (width - len(i)) for i in ids]),
+        }
+
+
+class FakeSession:
+    """Token state = [id, 1, position]: easy to pool by hand."""
+
+    def __init__(self, inputs=("input_ids", "attention_mask")):
+        self.inputs = inputs
+        self.feeds = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=n) for n in self.inputs]
+
+    def run(self, output_names, feeds):
+        self.feeds.append(feeds)
+        ids = feeds["input_ids"].astype(np.float32)
+        pos = np.broadcast_to(np.arange(ids.shape[1], dtype=np.float32), ids.shape)
+        return [np.stack([ids, np.ones_like(ids), pos], axis=-1)]
+
+
+class TestOnnxEmbedder:
+    def test_mean_pooling_ignores_padding(self):
+        # Arrange
+        embedder = OnnxEmbedder(session=FakeSession(), tokenizer=FakeTokenizer(), normalize=False)
+
+        # Act
+        X = embedder.encode(["aaa b", "cc"], batch_size=8)
+
+        # Assert
+        np.testing.assert_allclose(X, [[2.0, 1.0, 0.5], [2.0, 1.0, 0.0]])
+        assert X.dtype == np.float32
+
+    def test_cls_pooling_normalized_and_batched(self):
+        # Arrange
+        session = FakeSession()
+        embedder = OnnxEmbedder(session=session, tokenizer=FakeTokenizer(), pooling="cls", normalize=True)
+
+        # Act
+        X = embedder.encode(["aaaa b", "c", "dd"], batch_size=2)
+
+        # Assert
+        assert len(session.feeds) == 2
+        np.testing.assert_allclose(np.linalg.norm(X, axis=1), 1.0, rtol=1e-6)
+        np.testing.assert_allclose(X[0], np.asarray([4.0, 1.0, 0.0]) / np.sqrt(17), rtol=1e-6)
+
+    def test_token_type_ids_are_zero_filled_when_the_model_expects_them(self):
+        # Arrange
+        session = FakeSession(inputs=("input_ids", "attention_mask", "token_type_ids"))
+        embedder = OnnxEmbedder(session=session, tokenizer=FakeTokenizer())
+
+        # Act
+        embedder.encode(["a b"])
+
+        # Assert
+        np.testing.assert_array_equal(session.feeds[0]["token_type_ids"], [[0, 0]])
+
+    def test_rejects_unknown_pooling(self):
+        with pytest.raises(ValueError, match="Unsupported pooling"):
+            OnnxEmbedder(session=FakeSession(), tokenizer=FakeTokenizer(), pooling="max")
+
+
+class TestParity:
+    def test_returns_the_lowest_cosine(self):
+        a = np.asarray([[1.0, 0.0], [0.0, 1.0]])
+        b = np.asarray([[2.0, 0.0], [0.1, 1.0]])
+
+        assert parity(a, b, threshold=0.99) == pytest.approx(1 / np.sqrt(1.01))
+
+    def test_raises_below_threshold(self):
+        with pytest.raises(ValueError, match="parity check failed"):
+            parity(np.eye(2), np.asarray([[1.0, 0.0], [1.0, 1.0]]), threshold=0.98)
+
+
+class TestLoadEmbedder:
+    def test_backend_is_part_of_the_id_except_for_torch(self):
+        assert embedder_id("m", "torch") == "m"
+        assert embedder_id("m", "onnx-int8") == "m#onnx-int8"
+
+    def test_rejects_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unsupported EMBEDDING_BACKEND"):
+            load_embedder("m", "tensorrt")
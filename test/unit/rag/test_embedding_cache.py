@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag.embedding_cache import EmbeddingCache, cached_passage_embeddings, passage_key  # noqa: E402
+
+
+def _encode_calls(calls):
+    def encode(passages):
+        calls.append(list(passages))
+        return np.asarray([[len(p), 1.0] for p in passages], dtype=np.float32)
+
+    return encode
+
+
+class TestEmbeddingCache:
+    def test_only_new_text_is_encoded(self, tmp_path):
+        # Arrange
+        calls = []
+        with EmbeddingCache(tmp_path / "cache.sqlite") as cache:
+            cached_passage_embeddings(["python", "java"], model_name="m", cache=cache, encode=_encode_calls(calls))
+
+        # Act
+        with EmbeddingCache(tmp_path / "cache.sqlite") as cache:
+            X = cached_passage_embeddings(
+                ["java", "rust", "rust", "python"], model_name="m", cache=cache, encode=_encode_calls(calls)
+            )
+            hits, misses = cache.hits, cache.misses
+
+        # Assert
+        assert calls == [["passage: python", "passage: java"], ["passage: rust"]]
+        assert X.dtype == np.float32
+        np.testing.assert_array_equal(X[:, 0], [len("passage: java"), len("passage: rust"), len("passage: rust"), len("passage: python")])
+        assert (hits, misses) == (2, 1)
+
+    def test_model_name_is_part_of_the_key(self, tmp_path):
+        # Arrange
+        calls = []
+        with EmbeddingCache(tmp_path / "cache.sqlite") as cache:
+            cached_passage_embeddings(["python"], model_name="a", cache=cache, encode=_encode_calls(calls))
+
+            # Act
+            cached_passage_embeddings(["python"], model_name="b", cache=cache, encode=_encode_calls(calls))
+
+        # Assert
+        assert len(calls) == 2
+        assert passage_key("a", "passage: python") != passage_key("b", "passage: python")
+
+    def test_prune_evicts_unreferenced_entries(self, tmp_path):
+        # Arrange
+        with EmbeddingCache(tmp_path / "cache.sqlite") as cache:
+            cached_passage_embeddings(["a", "b", "c"], model_name="m", cache=cache, encode=_encode_calls([]))
+
+            # Act
+            evicted = cache.prune([passage_key("m", "passage: b")])
+
+            # Assert
+            assert evicted == 2
+            assert len(cache) == 1
+            assert list(cache.get_many([passage_key("m", "passage: b"), passage_key("m", "passage: a")])) == [
+                passage_key("m", "passage: b")
+            ]
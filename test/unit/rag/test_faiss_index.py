@@ -0,0 +1,109 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+
+from rag.faiss_index import (
+    apply_search_params,
+    build_faiss_index,
+    index_vectors,
+    measure,
+    recall_at_k,
+    supports_remove,
+)
+
+
+def _vectors(n: int = 2000, dim: int = 32, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    X = (centers[rng.integers(0, 20, size=n)] + 0.3 * rng.normal(size=(n, dim))).astype("float32")
+    faiss.normalize_L2(X)
+    return X
+
+
+class TestBuildFaissIndex:
+    @pytest.mark.parametrize(
+        "index_type, knobs",
+        [("ivf", {"nprobe": 1000}), ("hnsw", {"ef_search": 256}), ("ivfpq", {"nprobe": 1000})],
+    )
+    def test_approximate_indexes_reach_flat_results_with_wide_search(self, index_type, knobs):
+        # Arrange
+        X = _vectors()
+        queries = X[:50]
+        flat, _ = build_faiss_index(X, index_type="flat")
+        truth, _ = measure(flat, queries, 10)
+
+        # Act
+        index, params = build_faiss_index(X, index_type=index_type, pq_m=8)
+        apply_search_params(index, params, **knobs)
+        found, _ = measure(index, queries, 10)
+
+        # Assert: PQ compresses the vectors, so its ranking stays lossy.
+        assert params["index_type"] == index_type
+        assert recall_at_k(truth, found) >= (0.4 if index_type == "ivfpq" else 0.95)
+
+    def test_params_roundtrip_through_a_written_index(self, tmp_path):
+        # Arrange
+        index, params = build_faiss_index(_vectors(), index_type="ivf", nlist=16, nprobe=4)
+        faiss.write_index(index, str(tmp_path / "faiss.index"))
+
+        # Act
+        loaded = faiss.read_index(str(tmp_path / "faiss.index"))
+        default = apply_search_params(loaded, params)
+        overridden = apply_search_params(loaded, params, nprobe=64)
+
+        # Assert
+        assert params == {"index_type": "ivf", "nlist": 16, "nprobe": 4}
+        assert default["nprobe"] == 4
+        assert overridden["nprobe"] == 16  # capped at nlist
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw"])
+    def test_index_vectors_recovers_the_stored_vectors(self, index_type):
+        # Arrange
+        X = _vectors(n=300)
+        index, _ = build_faiss_index(X, ids=np.arange(300) * 2, index_type=index_type, nlist=4)
+
+        # Act
+        vectors = index_vectors(index)
+
+        # Assert: same rows, in storage order.
+        assert np.allclose(vectors[np.lexsort(vectors.T)], X[np.lexsort(X.T)])
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf"])
+    def test_vectors_are_searched_and_removed_by_id(self, index_type):
+        # Arrange
+        X = _vectors(n=300)
+        index, _ = build_faiss_index(X, ids=np.arange(300) + 1000, index_type=index_type, nlist=4)
+        apply_search_params(index, {"nprobe": 4})
+
+        # Act
+        _, before = index.search(X[7:8], 1)
+        index.remove_ids(np.array([1007], dtype=np.int64))
+        _, after = index.search(X[7:8], 1)
+
+        # Assert
+        assert supports_remove(index)
+        assert before[0][0] == 1007
+        assert after[0][0] != 1007
+        assert index.ntotal == 299
+
+    def test_hnsw_does_not_support_remove(self):
+        index, _ = build_faiss_index(_vectors(n=50), ids=np.arange(50), index_type="hnsw")
+
+        assert not supports_remove(index)
+
+    def test_unsupported_index_type(self):
+        with pytest.raises(ValueError, match="Unsupported index_type"):
+            build_faiss_index(_vectors(n=10), index_type="lsh")
+
+    def test_ivfpq_needs_enough_training_vectors(self):
+        with pytest.raises(ValueError, match="needs at least 256 vectors"):
+            build_faiss_index(_vectors(n=100), index_type="ivfpq", pq_m=8)
+
+
+class TestRecallAtK:
+    def test_counts_overlap_and_ignores_missing_ids(self):
+        truth = np.array([[1, 2, 3, 4], [5, 6, -1, -1]])
+        found = np.array([[4, 3, 9, 8], [6, 5, -1, -1]])
+
+        assert recall_at_k(truth, found) == pytest.approx(4 / 6)
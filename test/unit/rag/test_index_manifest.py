@@ -0,0 +1,97 @@
+import os
+
+from rag.index_manifest import chunk_ids, diff_files, file_entry, file_key, full_rebuild_reason
+
+
+def _pdf(tmp_path, name: str, content: bytes):
+    path = tmp_path / name / "cv.pdf"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+class TestDiffFiles:
+    def test_classifies_added_changed_removed_and_touched(self, tmp_path):
+        # Arrange
+        same = _pdf(tmp_path, "cv_001", b"same")
+        edited = _pdf(tmp_path, "cv_002", b"before")
+        touched = _pdf(tmp_path, "cv_003", b"touched")
+        gone = _pdf(tmp_path, "cv_004", b"gone")
+        old = {
+            file_key(p, tmp_path): file_entry(p, cv_id=p.parent.name, first_chunk_id=i * 10, chunk_count=10)
+            for i, p in enumerate([same, edited, touched, gone])
+        }
+        gone.unlink()
+        edited.write_bytes(b"after!")
+        st = touched.stat()
+        os.utime(touched, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        new = _pdf(tmp_path, "cv_005", b"new")
+
+        # Act
+        diff = diff_files(old, {file_key(p, tmp_path): p for p in [same, edited, touched, new]})
+
+        # Assert
+        assert diff.added == ["cv_005/cv.pdf"]
+        assert diff.changed == ["cv_002/cv.pdf"]
+        assert diff.removed == ["cv_004/cv.pdf"]
+        assert list(diff.touched) == ["cv_003/cv.pdf"]
+        assert diff.touched["cv_003/cv.pdf"]["mtime_ns"] == touched.stat().st_mtime_ns
+        assert chunk_ids(diff.touched["cv_003/cv.pdf"]) == range(20, 30)
+        assert diff.has_changes
+
+    def test_no_changes(self, tmp_path):
+        # Arrange
+        path = _pdf(tmp_path, "cv_001", b"same")
+        old = {file_key(path, tmp_path): file_entry(path, cv_id="cv_001", first_chunk_id=0, chunk_count=3)}
+
+        # Act
+        diff = diff_files(old, {file_key(path, tmp_path): path})
+
+        # Assert
+        assert not diff.has_changes
+        assert diff.touched == {}
+
+
+class TestFullRebuildReason:
+    CONFIG = {
+        "embedding_model": "m",
+        "embedding_backend": "torch",
+        "chunk_chars": 500,
+        "overlap_chars": 50,
+        "index_type": "flat",
+    }
+
+    def _manifest(self, **overrides):
+        return {
+            "embedding_model": "m",
+            "embedding_backend": "torch",
+            "chunk_chars": 500,
+            "overlap_chars": 50,
+            "faiss": {"index_type": "flat"},
+            "files": {},
+            "next_chunk_id": 0,
+            **overrides,
+        }
+
+    def test_incremental_when_settings_match(self):
+        assert full_rebuild_reason(self._manifest(), self.CONFIG) is None
+
+    def test_rebuilds_without_manifest_or_file_entries(self):
+        legacy = self._manifest()
+        del legacy["files"]
+
+        assert full_rebuild_reason(None, self.CONFIG) == "no manifest"
+        assert full_rebuild_reason(legacy, self.CONFIG) == "manifest has no per-file entries"
+
+    def test_rebuilds_when_chunking_model_or_index_type_change(self):
+        assert "chunk_chars" in full_rebuild_reason(self._manifest(chunk_chars=800), self.CONFIG)
+        assert "embedding_model" in full_rebuild_reason(self._manifest(embedding_model="other"), self.CONFIG)
+        assert "index_type" in full_rebuild_reason(self._manifest(faiss={"index_type": "hnsw"}), self.CONFIG)
+
+    def test_rebuilds_when_embedding_backend_changes(self):
+        legacy = self._manifest()
+        del legacy["embedding_backend"]
+
+        assert "embedding_backend" in full_rebuild_reason(self._manifest(embedding_backend="onnx-int8"), self.CONFIG)
+        assert full_rebuild_reason(legacy, self.CONFIG) is None
+        assert "embedding_backend" in full_rebuild_reason(legacy, {**self.CONFIG, "embedding_backend": "onnx"})
@@ -0,0 +1,60 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag.length_batching import encode_by_length, padded_tokens, token_budget_batches  # noqa: E402
+
+
+class TestTokenBudgetBatches:
+    def test_batches_stay_under_the_padded_token_budget(self):
+        # Arrange
+        lengths = [120, 10, 128, 30, 64, 12, 128, 40, 8]
+
+        # Act
+        batches = token_budget_batches(lengths, max_tokens=256)
+
+        # Assert
+        assert sorted(int(i) for batch in batches for i in batch) == list(range(len(lengths)))
+        for batch in batches:
+            assert len(batch) * max(lengths[i] for i in batch) <= 256
+        # Longest first: the short chunks share the last batches.
+        assert [lengths[i] for i in batches[0]] == [128, 128]
+
+    def test_item_over_budget_gets_its_own_batch_and_max_items_caps(self):
+        assert [b.tolist() for b in token_budget_batches([600, 5, 5, 5], max_tokens=256, max_items=2)] == [[0], [1, 2], [3]]
+
+    def test_sorting_cuts_padding_on_mixed_lengths(self):
+        # Arrange: full 500-char chunks mixed with the short tail chunk of each CV.
+        rng = np.random.default_rng(0)
+        lengths = np.where(rng.random(2000) < 0.7, 128, rng.integers(8, 128, size=2000)).tolist()
+        in_order = [list(range(i, min(i + 64, len(lengths)))) for i in range(0, len(lengths), 64)]
+
+        # Act
+        bucketed = token_budget_batches(lengths, max_tokens=64 * 128)
+
+        # Assert
+        assert padded_tokens(lengths, bucketed) < padded_tokens(lengths, in_order)
+        # In document order ~15% of the processed tokens are padding; sorted, ~3%.
+        assert padded_tokens(lengths, bucketed) <= 1.05 * sum(lengths)
+        assert len(bucketed) <= len(in_order)
+
+
+class TestEncodeByLength:
+    def test_rows_come_back_in_input_order(self):
+        # Arrange
+        items = ["a", "bbbbbb", "cc", "dddd", "e"]
+        seen_batches = []
+
+        def encode_batch(batch):
+            seen_batches.append(batch)
+            return np.asarray([[len(t), ord(t[0])] for t in batch], dtype=np.float32)
+
+        # Act
+        X = encode_by_length(items, lengths=[len(t) for t in items], encode_batch=encode_batch, max_tokens=6)
+
+        # Assert
+        assert seen_batches[0] == ["bbbbbb"]
+        np.testing.assert_array_equal(X[:, 1], [ord(t[0]) for t in items])
+
+    def test_empty_input(self):
+        assert encode_by_length([], lengths=[], encode_batch=None, max_tokens=8).shape == (0, 0)
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag.micro_batch import MicroBatchEncoder, wrap_model  # noqa: E402
+
+
+class FakeModel:
+    """Row i = [len(text), normalized flag]; each encode call takes `delay` seconds."""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.max_seq_length = 512
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail_on in texts:
+            raise RuntimeError("boom")
+        return np.asarray([[len(t), float(normalize_embeddings)] for t in texts], dtype=np.float32)
+
+
+def _concurrently(encoder, texts, **kwargs):
+    barrier = threading.Barrier(len(texts))
+    results = [None] * len(texts)
+
+    def call(i):
+        barrier.wait()
+        try:
+            results[i] = encoder.encode([texts[i]], **kwargs)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestMicroBatchEncoder:
+    def test_concurrent_calls_share_a_forward_pass(self):
+        # Arrange
+        model = FakeModel(delay=0.01)
+        encoder = MicroBatchEncoder(model, max_batch=64, max_wait_s=0.05)
+        texts = ["a" * (i + 1) for i in range(16)]
+
+        # Act
+        results = _concurrently(encoder, texts, normalize_embeddings=True)
+        encoder.close()
+
+        # Assert: every caller gets its own row, in far fewer model calls.
+        for text, X in zip(texts, results):
+            np.testing.assert_array_equal(X, [[len(text), 1.0]])
+        assert len(model.calls) < len(texts)
+        assert encoder.stats()["calls"] == len(texts)
+
+    def test_batches_never_exceed_max_batch_unless_a_single_call_does(self):
+        # Arrange
+        model = FakeModel()
+        encoder = MicroBatchEncoder(model, max_batch=4, max_wait_s=0.05)
+
+        # Act
+        _concurrently(encoder, [f"q{i}" for i in range(12)])
+        big = encoder.encode([f"p{i}" for i in range(10)])
+        encoder.close()
+
+        # Assert
+        assert max(len(c) for c in model.calls[:-1]) <= 4
+        assert big.shape == (10, 2)
+
+    def test_normalized_and_raw_requests_are_encoded_separately(self):
+        # Arrange
+        model = FakeModel()
+        encoder = MicroBatchEncoder(model, max_batch=64, max_wait_s=0.05)
+        barrier = threading.Barrier(2)
+        out = {}
+
+        def call(flag):
+            barrier.wait()
+            out[flag] = encoder.encode(["abc"], normalize_embeddings=flag)
+
+        # Act
+        threads = [threading.Thread(target=call, args=(flag,)) for flag in (False, True)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        encoder.close()
+
+        # Assert
+        np.testing.assert_array_equal(out[False], [[3, 0.0]])
+        np.testing.assert_array_equal(out[True], [[3, 1.0]])
+
+    def test_errors_reach_every_caller_of_the_batch(self):
+        # Arrange
+        encoder = MicroBatchEncoder(FakeModel(fail_on="bad"), max_batch=64, max_wait_s=0.05)
+
+        # Act
+        results = _concurrently(encoder, ["bad", "good"])
+        after = encoder.encode(["fine"])
+        encoder.close()
+
+        # Assert: the failed batch doesn't stop the encoder.
+        assert all(isinstance(r, RuntimeError) or r.shape == (1, 2) for r in results)
+        assert any(isinstance(r, RuntimeError) for r in results)
+        np.testing.assert_array_equal(after, [[4, 0.0]])
+
+    def test_model_attributes_and_close(self):
+        # Arrange
+        encoder = MicroBatchEncoder(FakeModel(), max_wait_s=0.001)
+
+        # Act
+        encoder.close()
+
+        # Assert
+        assert encoder.max_seq_length == 512
+        with pytest.raises(RuntimeError, match="closed"):
+            encoder.encode(["late"])
+
+    def test_zero_window_returns_the_model_itself(self):
+        model = FakeModel()
+
+        assert wrap_model(model, max_batch=32, max_wait_s=0) is model
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from rag.pipeline import format_stats, run_pipeline
+
+
+def _batches(size):
+    def stage(items):
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return stage
+
+
+class TestRunPipeline:
+    def test_items_flow_through_stages_in_order(self):
+        # Arrange
+        written = []
+
+        # Act
+        stats = run_pipeline(
+            ("source", range(10)),
+            [("double", lambda items: (2 * i for i in items)), ("batch", _batches(4))],
+            ("sink", written.append),
+            maxsize=2,
+        )
+
+        # Assert
+        assert written == [[0, 2, 4, 6], [8, 10, 12, 14], [16, 18]]
+        assert [(st.name, st.items_in, st.items_out) for st in stats] == [
+            ("source", 10, 10),
+            ("double", 10, 10),
+            ("batch", 10, 3),
+            ("sink", 3, 3),
+        ]
+
+    def test_queues_stay_bounded_behind_a_slow_sink(self):
+        # Arrange
+        produced = []
+
+        def source():
+            for i in range(20):
+                produced.append(i)
+                yield i
+
+        def slow_sink(item):
+            time.sleep(0.002)
+            # source -> queue -> stage -> queue -> sink: at most 2 queues + 2 in hand ahead.
+            assert len(produced) - item <= 2 * 2 + 3
+
+        # Act
+        stats = run_pipeline(("source", source()), [("pass", lambda items: items)], ("sink", slow_sink), maxsize=2)
+
+        # Assert
+        assert all(st.queue_max <= 2 for st in stats)
+        assert stats[-1].items_out == 20
+
+    def test_a_failing_stage_stops_the_pipeline_and_raises(self):
+        # Arrange
+        def explode(items):
+            for item in items:
+                if item == 3:
+                    raise RuntimeError("bad pdf")
+                yield item
+
+        threads_before = threading.active_count()
+
+        # Act / Assert
+        with pytest.raises(RuntimeError, match="bad pdf"):
+            run_pipeline(("source", iter(range(1000))), [("explode", explode)], ("sink", lambda item: None), maxsize=1)
+        assert threading.active_count() == threads_before
+
+    def test_a_failing_sink_raises(self):
+        def sink(item):
+            raise ValueError("disk full")
+
+        with pytest.raises(ValueError, match="disk full"):
+            run_pipeline(("source", range(100)), [], ("sink", sink), maxsize=1)
+
+    def test_format_stats_lists_every_stage(self):
+        # Arrange
+        stats = run_pipeline(("extract", range(3)), [("embed", lambda items: items)], ("write", lambda item: None))
+
+        # Act
+        report = format_stats(stats, wall_s=0.5, maxsize=8)
+
+        # Assert
+        assert report.splitlines()[0] == "Pipeline: 0.50 s wall, queues of 8"
+        assert [line.split()[0] for line in report.splitlines()[2:]] == ["extract", "embed", "write"]
@@ -0,0 +1,215 @@
+import hashlib
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+
+from rag import retrieval  # noqa: E402
+from rag.bm25 import SparseBM25  # noqa: E402
+from rag.cache import QueryEmbeddingCache, SearchResultCache  # noqa: E402
+from rag.chunk_store import ChunkStore  # noqa: E402
+from rag.retrieval import BM25_WORD_RE, SEARCH_STAGES, run_search_batch, run_search_with_model  # noqa: E402
+
+TEXTS = [
+    "Senior DevOps engineer with Jenkins, Ansible and Kubernetes",
+    "Backend developer: Python, Django, PostgreSQL",
+    "Data engineer building Spark and Kafka pipelines in Python",
+    "Frontend developer, React and TypeScript",
+    "Java Spring Boot microservices on Kubernetes",
+    "Machine learning engineer, Python, PyTorch, MLOps with Jenkins",
+]
+QUERIES = ["python developer", "Kubernetes", "jenkins pipelines", "python developer", "nothing matches"]
+
+
+class FakeModel:
+    """Deterministic per-text vectors, independent of the batch they are encoded in."""
+
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+        self.calls.append(list(texts))
+        rows = []
+        for t in texts:
+            seed = int.from_bytes(hashlib.sha256(t.encode("utf-8")).digest()[:4], "little")
+            rows.append(np.random.default_rng(seed).standard_normal(self.dim))
+        X = np.asarray(rows, dtype=np.float32)
+        if normalize_embeddings:
+            X /= np.linalg.norm(X, axis=1, keepdims=True)
+        return X
+
+
+@pytest.fixture
+def index_data():
+    model = FakeModel()
+    X = model.encode([f"passage: {t}" for t in TEXTS], normalize_embeddings=True)
+    index = faiss.IndexFlatIP(X.shape[1])
+    index.add(X)
+    records = [
+        {"chunk_id": i, "cv_id": f"cv_{i:03d}", "pdf_path": "", "chunk_index": 0, "text": t} for i, t in enumerate(TEXTS)
+    ]
+    return {
+        "faiss_index": index,
+        "chunks": ChunkStore.from_records(records),
+        "bm25": SparseBM25.from_corpus([BM25_WORD_RE.findall(t.lower()) for t in TEXTS]),
+        "version": "v1",
+    }
+
+
+def _summary(out):
+    return {
+        "query": out["query"],
+        "results": [(r["chunk_id"], r["score"]) for r in out["results"]],
+        "faiss": None if out["faiss_results"] is None else [(r["chunk_id"], r["score"]) for r in out["faiss_results"]],
+        "bm25": None if out["bm25_results"] is None else [(r["chunk_id"], r["score"]) for r in out["bm25_results"]],
+        "reranked": None if out["reranked"] is None else [(s, r["chunk_id"]) for s, r in out["reranked"]],
+    }
+
+
+class TestRunSearchBatch:
+    @pytest.mark.parametrize("mode", ["faiss", "bm25", "hybrid", "reranked"])
+    def test_same_results_as_the_single_query_path(self, index_data, mode):
+        # Arrange
+        expected = [_summary(run_search_with_model(index_data, FakeModel(), q, topk=3, mode=mode)) for q in QUERIES]
+
+        # Act
+        outs = run_search_batch(index_data, FakeModel(), QUERIES, topk=3, mode=mode)
+
+        # Assert
+        assert [_summary(out) for out in outs] == expected
+
+    def test_encodes_distinct_queries_in_one_call_and_uses_the_query_cache(self, index_data):
+        # Arrange
+        model = FakeModel()
+        cache = QueryEmbeddingCache(model_name="fake")
+        run_search_batch(index_data, model, ["Kubernetes"], query_cache=cache)
+        model.calls.clear()
+
+        # Act
+        run_search_batch(index_data, model, QUERIES, query_cache=cache)
+
+        # Assert
+        assert model.calls == [["query: python developer", "query: jenkins pipelines", "query: nothing matches"]]
+
+    def test_result_cache_serves_repeated_queries(self, index_data):
+        # Arrange
+        model = FakeModel()
+        cache = SearchResultCache()
+        first = run_search_batch(index_data, model, QUERIES[:2], result_cache=cache)
+        model.calls.clear()
+
+        # Act
+        second = run_search_batch(index_data, model, QUERIES[:2], result_cache=cache)
+
+        # Assert
+        assert model.calls == []
+        assert [_summary(o) for o in second] == [_summary(o) for o in first]
+
+    def test_empty_batch(self, index_data):
+        assert run_search_batch(index_data, FakeModel(), []) == []
+
+
+class ThreadRecordingBM25:
+    """SparseBM25 wrapper that records the thread each query is scored on."""
+
+    def __init__(self, bm25):
+        self.bm25 = bm25
+        self.threads = []
+
+    def top_k(self, tokens, k):
+        self.threads.append(threading.current_thread().name)
+        return self.bm25.top_k(tokens, k)
+
+    def top_k_batch(self, queries, k):
+        self.threads.append(threading.current_thread().name)
+        return self.bm25.top_k_batch(queries, k)
+
+
+class TestParallelLegs:
+    @pytest.mark.parametrize("mode", ["faiss", "bm25", "hybrid", "reranked"])
+    def test_parallel_legs_return_the_sequential_results(self, index_data, mode):
+        # Arrange
+        def single(q, parallel):
+            return _summary(run_search_with_model(index_data, FakeModel(), q, mode=mode, parallel_legs=parallel))
+
+        expected = [single(q, False) for q in QUERIES]
+
+        # Act
+        parallel = [single(q, True) for q in QUERIES]
+        batch = [_summary(o) for o in run_search_batch(index_data, FakeModel(), QUERIES, mode=mode, parallel_legs=True)]
+
+        # Assert
+        assert parallel == expected
+        assert batch == expected
+
+    def test_hybrid_bm25_leg_runs_off_the_calling_thread(self, index_data):
+        # Arrange
+        bm25 = ThreadRecordingBM25(index_data["bm25"])
+        data = {**index_data, "bm25": bm25}
+
+        # Act
+        run_search_with_model(data, FakeModel(), "python", mode="hybrid", parallel_legs=True)
+        run_search_batch(data, FakeModel(), QUERIES, mode="hybrid", parallel_legs=True)
+        run_search_with_model(data, FakeModel(), "python", mode="bm25", parallel_legs=True)
+
+        # Assert: only the hybrid searches hand BM25 to the pool.
+        caller = threading.current_thread().name
+        assert [name != caller for name in bm25.threads] == [True, True, False]
+
+
+class TestSearchTimings:
+    @pytest.mark.parametrize("parallel", [False, True])
+    def test_hybrid_search_times_every_stage(self, index_data, parallel):
+        # Arrange
+        timings = {}
+
+        # Act
+        run_search_with_model(index_data, FakeModel(), "python developer", parallel_legs=parallel, timings=timings)
+
+        # Assert
+        assert set(timings) == set(SEARCH_STAGES)
+        assert all(seconds >= 0 for seconds in timings.values())
+
+    def test_tokenize_stage_does_the_work_both_legs_use(self, index_data, monkeypatch):
+        # Arrange
+        calls = []
+
+        def counted(name, fn):
+            return lambda query: calls.append(name) or fn(query)
+
+        monkeypatch.setattr(retrieval, "normalize_query", counted("normalize", retrieval.normalize_query))
+        monkeypatch.setattr(retrieval, "bm25_tokenize", counted("bm25", retrieval.bm25_tokenize))
+        timings = {}
+
+        # Act
+        out = run_search_with_model(index_data, FakeModel(), "Python Developer", parallel_legs=False, timings=timings)
+
+        # Assert: query text is prepared once, inside the tokenize stage, and the legs reuse it.
+        assert sorted(calls) == ["bm25", "normalize"]
+        assert "tokenize" in timings
+        assert len(out["bm25_results"]) > 0
+
+    def test_single_leg_modes_skip_the_other_leg_and_rrf(self, index_data):
+        # Arrange
+        timings = {}
+
+        # Act
+        run_search_with_model(index_data, FakeModel(), "python", mode="faiss", timings=timings)
+
+        # Assert
+        assert set(timings) == {"tokenize", "encode", "faiss", "materialize"}
+
+    def test_result_cache_hit_records_no_stage(self, index_data):
+        # Arrange
+        cache = SearchResultCache()
+        run_search_with_model(index_data, FakeModel(), "python", result_cache=cache)
+        timings = {}
+
+        # Act
+        run_search_with_model(index_data, FakeModel(), "python", result_cache=cache, timings=timings)
+
+        # Assert
+        assert timings == {}